@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Benchmark of catalog generation against loading the cached catalog
+
+Each measurement runs in a fresh interpreter, so module imports are cold as
+they would be at server start.
+
+Usage: python scripts/benchmark_catalog.py [RUNS]
+"""
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+
+SETUP = f"""
+import sys, time, json
+sys.path.insert(0, {str(project_root)!r})
+from pathlib import Path
+from src.infrastructure.adapters.catalog_generator import CatalogGenerator
+generator = CatalogGenerator(Path(sys.argv[1]))
+"""
+
+CASES = {
+    "full scan": "start = time.perf_counter(); generator.generate(force=True)",
+    "incremental scan, nothing changed": "start = time.perf_counter(); generator.generate()",
+    "cached catalog, same diagrams version": "start = time.perf_counter(); generator.ensure_catalog()",
+    "cached catalog + compiled repository load": (
+        "from src.infrastructure.adapters.provider_repository import ProviderRepository\n"
+        "start = time.perf_counter()\n"
+        "ProviderRepository(generator.ensure_catalog(), Path(sys.argv[1]) / 'catalog.bin')"
+    ),
+}
+
+
+def run_case(code: str, catalog_dir: str) -> float:
+    """Run one measurement in a fresh interpreter, returning milliseconds"""
+    script = SETUP + code + "\nprint(json.dumps((time.perf_counter() - start) * 1000))"
+    output = subprocess.run(
+        [sys.executable, "-c", script, catalog_dir],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    with tempfile.TemporaryDirectory() as catalog_dir:
+        # Prime the catalog and the compiled file
+        run_case(CASES["cached catalog + compiled repository load"], catalog_dir)
+        for name, code in CASES.items():
+            times = [run_case(code, catalog_dir) for _ in range(runs)]
+            print(f"{name:45s} median {statistics.median(times):8.1f} ms  (min {min(times):.1f}, max {max(times):.1f})")
+
+
+if __name__ == "__main__":
+    main()
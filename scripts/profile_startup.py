@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Import-time profile of the MCP server start
+
+Runs `python -X importtime` on the server module in a fresh interpreter and
+reports where startup time goes, grouped by top-level package, followed by
+the cost of the first tool call, which builds the diagram service.
+
+Usage: python scripts/profile_startup.py [TOP]
+"""
+import json
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+
+SERVER_MODULE = "src.application.mcp.server_modular"
+
+FIRST_CALL = f"""
+import json, sys, time
+sys.path.insert(0, {str(project_root)!r})
+start = time.perf_counter()
+import {SERVER_MODULE} as server
+imported = time.perf_counter()
+server.diagram_service.get_available_providers()
+done = time.perf_counter()
+print(json.dumps({{
+    'import_ms': (imported - start) * 1000,
+    'first_call_ms': (done - imported) * 1000,
+}}))
+"""
+
+
+def profile_imports() -> list:
+    """Import the server module with -X importtime, returning (module, self us, cumulative us)"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {SERVER_MODULE}"],
+        cwd=project_root, check=True, capture_output=True, text=True
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main() -> None:
+    top = int(sys.argv[1]) if len(sys.argv) > 1 else 15
+    rows = profile_imports()
+
+    by_package = defaultdict(int)
+    for name, self_us, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+    total_us = sum(by_package.values())
+
+    print(f"Importing {SERVER_MODULE}: {total_us / 1000:.1f} ms in {len(rows)} modules\n")
+    print("By top-level package (self time):")
+    for package, us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {package:30s} {us / 1000:8.1f} ms  {us * 100 / total_us:5.1f}%")
+
+    print("\nSlowest modules (cumulative time):")
+    for name, _, cumulative_us in sorted(rows, key=lambda row: -row[2])[:top]:
+        print(f"  {name:60s} {cumulative_us / 1000:8.1f} ms")
+
+    imported = {name for name, _, _ in rows}
+    deferred = [m for m in ("diagrams", "graphviz", "PIL", "src.application.services.diagram_service")
+                if m not in imported]
+    print(f"\nDeferred until the first tool call: {', '.join(deferred) or 'nothing'}")
+
+    output = subprocess.run(
+        [sys.executable, "-c", FIRST_CALL], cwd=project_root, check=True, capture_output=True, text=True
+    ).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    print(f"Server module import (no importtime overhead): {timings['import_ms']:.1f} ms")
+    print(f"First tool call, building the service:       {timings['first_call_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
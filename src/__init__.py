@@ -10,9 +10,16 @@ __author__ = "Diagram AI Generator Team"
 __email__ = "contact@diagram-ai.com"
 __description__ = "Professional AI-powered architecture diagram generator with MCP server support"
 
-# Expose main components
-from .application.services.diagram_service import DiagramService
-from .application.mcp.server_modular import main as run_mcp_server
+from .lazy_exports import make_lazy_getattr
+
+# Main components, imported on first access: importing the package must stay
+# cheap because the MCP server is started per client session
+_LAZY_EXPORTS = {
+    "DiagramService": (".application.services.diagram_service", "DiagramService"),
+    "run_mcp_server": (".application.mcp.server_modular", "main"),
+}
+
+__getattr__ = make_lazy_getattr(__name__, _LAZY_EXPORTS)
 
 __all__ = [
     "DiagramService",
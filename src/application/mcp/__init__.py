@@ -1,5 +1,12 @@
 """MCP Server for Diagram AI Generator"""
 
-from .server_modular import main
+from src.lazy_exports import make_lazy_getattr
 
-__all__ = ["main"]
\ No newline at end of file
+# Imported on first access, so importing the package does not start loading the server
+_LAZY_EXPORTS = {
+    "main": (".server_modular", "main"),
+}
+
+__getattr__ = make_lazy_getattr(__name__, _LAZY_EXPORTS)
+
+__all__ = ["main"]
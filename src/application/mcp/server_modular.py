@@ -16,11 +16,12 @@ except ImportError:
 project_root = Path(__file__).parent.parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from src.application.services.diagram_service import DiagramService
+from src.application.services.lazy_diagram_service import LazyDiagramService
 from src.application.mcp.tools.registry import ToolRegistry
 
-# Crear instancia del servicio de diagramas
-diagram_service = DiagramService()
+# Crear el servicio de diagramas de forma diferida: se construye en la primera
+# llamada a una herramienta (o en segundo plano tras arrancar), no al importar
+diagram_service = LazyDiagramService()
 
 # Crear instancia del registro de herramientas
 tool_registry = ToolRegistry(diagram_service)
@@ -36,6 +37,9 @@ for tool_name, tool_method in tool_registry.get_tool_methods().items():
 def main():
     """Función principal para ejecutar el servidor MCP"""
     try:
+        # Construir el servicio y pre-importar los módulos de iconos más usados en segundo plano
+        diagram_service.start_warmup()
+        
         # Ejecutar el servidor MCP - esto bloquea hasta que se cierre
         mcp.run()
     except KeyboardInterrupt:
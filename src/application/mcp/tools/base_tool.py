@@ -1,13 +1,46 @@
-from typing import Callable, Dict, Any
+from typing import Callable, Dict, Any, Optional
+from src.application.mcp.tools.tool_executor import ToolExecutor, ToolExecutorBusyError
+from src.domain.value_objects.diagram_result import DiagramResult
 
 tool_registry: Dict[str, Callable[..., Any]] = {}
 
 def register_tool(func: Callable[..., Any]) -> Callable[..., Any]:
     """Decorator to register MCP tools automatically."""
     tool_registry[func.__name__] = func
+    func._is_mcp_tool = True
     return func
 
 class BaseTool:
     """Base class for all MCP tools."""
-    def __init__(self, diagram_service: Any):
-        self.diagram_service = diagram_service
\ No newline at end of file
+    def __init__(self, diagram_service: Any, executor: Optional[ToolExecutor] = None):
+        self.diagram_service = diagram_service
+        # Runs renders off the event loop; shared by all tools of a registry
+        self.executor = executor or ToolExecutor()
+
+    async def run_render(self, func: Callable[..., Dict[str, Any]], *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        """Run a rendering service call in the executor; a busy result if no thread is free"""
+        try:
+            return await self.executor.run(func, *args, **kwargs)
+        except ToolExecutorBusyError as e:
+            return DiagramResult.busy_result(str(e)).to_dict()
+
+    @staticmethod
+    def format_corrections(result: Dict[str, Any]) -> str:
+        """Describe the node types that were found elsewhere in the catalog, if any"""
+        if not result.get('corrections'):
+            return ""
+        lines = [
+            f"- {c['component_id']}: {c['from']} → {c['to']}" for c in result['corrections']
+        ]
+        return "\n\n🔧 Corrected node types (use these in future specs):\n" + "\n".join(lines)
+
+    @staticmethod
+    def format_issues(result: Dict[str, Any]) -> str:
+        """Describe the problems found in the specification, if any"""
+        if not result.get('issues'):
+            return ""
+        lines = [
+            f"- {'❌' if i['severity'] == 'error' else '⚠️ '} {i['location']}: {i['message']}"
+            for i in result['issues']
+        ]
+        return "\n\n🔎 Specification problems:\n" + "\n".join(lines)
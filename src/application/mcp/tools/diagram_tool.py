@@ -1,6 +1,7 @@
 import json
 from typing import Optional
 from src.application.mcp.tools.base_tool import BaseTool, register_tool
+from src.domain.value_objects.diagram_result import IMAGE_FORMAT_PATH
 from src.application.mcp.tools.tool_constants import (
     LANGUAGE_INSTRUCTION,
     SINGLE_CLOUD_EXAMPLE,
@@ -10,7 +11,7 @@ from src.application.mcp.tools.tool_constants import (
 
 class DiagramTool(BaseTool):
     @register_tool
-    def create_diagram_from_json(
+    async def create_diagram_from_json(
         self,
         diagram_spec: str,
         title: Optional[str] = None
@@ -36,6 +37,8 @@ class DiagramTool(BaseTool):
             - Use exact node names from get_category_nodes()
             - Connections support: color, style, label
             - Layouts: "horizontal" or "vertical"
+            - Optional "output_formats": any of "svg", "pdf", "dot" in addition
+              to the PNG, all drawn from the same layout
             
             title: Optional diagram title (overrides spec title)
         
@@ -51,7 +54,11 @@ class DiagramTool(BaseTool):
                 spec['title'] = title
             
             # Generar el diagrama
-            result = self.diagram_service.create_diagram_from_spec(spec)
+            # Only the file path is reported, so skip optimizing the image.
+            # Rendered in the tool executor so other calls are served meanwhile
+            result = await self.run_render(
+                self.diagram_service.create_diagram_from_spec, spec, image_format=IMAGE_FORMAT_PATH
+            )
             
             if result['success']:
                 response = f"""✅ Diagram created successfully!
@@ -62,6 +69,7 @@ class DiagramTool(BaseTool):
 - Components: {result['components_count']}
 - Connections: {result['connections_count']}
 - Size: {result['image_size_mb']} MB
+- Diagram ID: {result['diagram_id']} (use with update_diagram_from_json)
 
 📁 File saved at: `{result['file_path']}`
 
@@ -69,11 +77,74 @@ To open: `open "{result['file_path']}"`
 
 🖼️ Image saved locally (use the 'open' command above to view)"""
                 
-                return response
+                other_files = {
+                    fmt: path for fmt, path in (result['output_files'] or {}).items() if fmt != 'png'
+                }
+                if other_files:
+                    response += "\n\n📄 Other formats:\n" + "\n".join(
+                        f"- {fmt.upper()}: `{path}`" for fmt, path in other_files.items()
+                    )
+                
+                return response + self.format_corrections(result) + self.format_issues(result)
             else:
-                return f"❌ Error: {result['error']}"
+                return f"❌ Error: {result['error']}" + self.format_issues(result)
                 
         except json.JSONDecodeError as e:
             return f"❌ Error: Invalid JSON - {str(e)}"
         except Exception as e:
-            return f"❌ Error generating diagram: {str(e)}"
\ No newline at end of file
+            return f"❌ Error generating diagram: {str(e)}"
+
+    @register_tool
+    async def update_diagram_from_json(
+        self,
+        diagram_id: str,
+        changes: str
+    ) -> str:
+        """
+        Update a previously created diagram by sending only what changed.
+
+        Components that are not touched keep their position in the new image.
+
+        Args:
+            diagram_id: Diagram ID returned by create_diagram_from_json or
+                        a previous update_diagram_from_json call
+            changes: JSON object with any of these keys:
+                - "add_components": components, same format as in a diagram
+                  spec, optionally with "cluster" to place them in a cluster.
+                  A component with an existing id replaces it.
+                - "remove_components": list of component ids (their
+                  connections are removed too)
+                - "add_connections": connections, same format as in a spec
+                - "remove_connections": list of {"from": id, "to": id}
+                - "add_clusters": clusters, same format as in a spec
+                - "remove_clusters": list of cluster names (components stay)
+
+        Returns:
+            Diagram generation result with the new file path and diagram ID
+        """
+        try:
+            result = await self.run_render(
+                self.diagram_service.update_diagram,
+                diagram_id, json.loads(changes), image_format=IMAGE_FORMAT_PATH
+            )
+
+            if result['success']:
+                return f"""✅ Diagram updated successfully!
+
+📊 Details:
+- Title: {result['title']}
+- Components: {result['components_count']}
+- Connections: {result['connections_count']}
+- Size: {result['image_size_mb']} MB
+- Diagram ID: {result['diagram_id']}
+
+📁 File saved at: `{result['file_path']}`
+
+To open: `open "{result['file_path']}"`""" + self.format_corrections(result) + self.format_issues(result)
+            else:
+                return f"❌ Error: {result['error']}" + self.format_issues(result)
+
+        except json.JSONDecodeError as e:
+            return f"❌ Error: Invalid JSON - {str(e)}"
+        except Exception as e:
+            return f"❌ Error updating diagram: {str(e)}"
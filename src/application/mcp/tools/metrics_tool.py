@@ -0,0 +1,40 @@
+from src.application.mcp.tools.base_tool import BaseTool, register_tool
+
+class MetricsTool(BaseTool):
+    @register_tool
+    def get_render_metrics(self) -> str:
+        """
+        Show where diagram requests spend their time.
+
+        Lists per-stage latency (parse, validate, resolve, queue_wait, render,
+        graphviz, optimize, base64) over recent requests, with the render
+        queue state. Timing is off unless the server runs with
+        DIAGRAM_METRICS=on or DIAGRAM_METRICS_FILE set.
+
+        Returns:
+            Per-stage request count, mean and p50/p95/p99/max latency
+        """
+        try:
+            metrics = self.diagram_service.get_render_metrics()
+            if not metrics['enabled']:
+                return "⏱️ Render metrics are off. Set DIAGRAM_METRICS=on (or DIAGRAM_METRICS_FILE) and restart the server."
+
+            response = f"⏱️ RENDER METRICS ({metrics['requests']} requests)\n\n"
+            response += "| Stage | Count | Avg ms | p50 | p95 | p99 | Max | Bytes |\n"
+            response += "|---|---|---|---|---|---|---|---|\n"
+            for stage, s in metrics['stages'].items():
+                response += (
+                    f"| {stage} | {s['count']} | {s['avg_ms']} | {s['p50_ms']} | {s['p95_ms']} "
+                    f"| {s['p99_ms']} | {s['max_ms']} | {s['bytes_total'] or '-'} |\n"
+                )
+
+            queue = self.diagram_service.get_render_queue_stats()
+            response += (
+                f"\n🚦 Render queue: {queue['running']}/{queue['max_concurrent']} running, "
+                f"{queue['queued']}/{queue['max_queued']} queued, {queue['rejected']} rejected, "
+                f"wait avg {queue['wait_ms_avg']} ms / max {queue['wait_ms_max']} ms"
+            )
+            return response
+
+        except Exception as e:
+            return f"❌ Error: {str(e)}"
@@ -1,11 +1,12 @@
 from typing import Dict, Any
 from src.application.mcp.tools.base_tool import BaseTool, register_tool
 from src.application.mcp.tools.tool_constants import LANGUAGE_INSTRUCTION, MULTI_CLOUD_EXAMPLE
+from src.domain.value_objects.diagram_result import IMAGE_FORMAT_PATH
 import json
 
 class MultiCloudTool(BaseTool):
     @register_tool
-    def create_multicloud_diagram(
+    async def create_multicloud_diagram(
         self,
         title: str,
         components: str,
@@ -45,7 +46,9 @@ class MultiCloudTool(BaseTool):
                 "clusters": []
             }
             
-            result = self.diagram_service.create_diagram_from_spec(spec)
+            result = await self.run_render(
+                self.diagram_service.create_diagram_from_spec, spec, image_format=IMAGE_FORMAT_PATH
+            )
             
             if result['success']:
                 return f"""✅ Multi-cloud diagram created!
@@ -55,12 +58,13 @@ class MultiCloudTool(BaseTool):
 - Components: {result['components_count']} (from multiple providers)
 - Connections: {result['connections_count']}
 - Size: {result['image_size_mb']} MB
+- Diagram ID: {result['diagram_id']}
 
 📁 File: `{result['file_path']}`
 
-To open: `open "{result['file_path']}"`"""
+To open: `open "{result['file_path']}"`""" + self.format_corrections(result) + self.format_issues(result)
             else:
-                return f"❌ Error: {result['error']}"
+                return f"❌ Error: {result['error']}" + self.format_issues(result)
                 
         except json.JSONDecodeError as e:
             return f"❌ Error: Invalid JSON - {str(e)}"
@@ -1,16 +1,26 @@
-from typing import Dict, List, Type
+from typing import TYPE_CHECKING, Dict, List, Optional, Type, Union
 from src.application.mcp.tools.base_tool import BaseTool
+from src.application.mcp.tools.tool_executor import ToolExecutor
 from src.application.mcp.tools.providers_tool import ProvidersTool
 from src.application.mcp.tools.categories_tool import CategoriesTool
 from src.application.mcp.tools.nodes_tool import NodesTool
 from src.application.mcp.tools.diagram_tool import DiagramTool
 from src.application.mcp.tools.multicloud_tool import MultiCloudTool
-from src.application.services.diagram_service import DiagramService
+from src.application.mcp.tools.metrics_tool import MetricsTool
+
+if TYPE_CHECKING:
+    from src.application.services.diagram_service import DiagramService
+    from src.application.services.lazy_diagram_service import LazyDiagramService
 
 
 class ToolRegistry:
-    def __init__(self, diagram_service: DiagramService):
+    def __init__(
+        self,
+        diagram_service: Union['DiagramService', 'LazyDiagramService'],
+        executor: Optional[ToolExecutor] = None
+    ):
         self.diagram_service = diagram_service
+        self.executor = executor or ToolExecutor()
         self._tools: Dict[str, BaseTool] = {}
         self._register_all_tools()
 
@@ -22,9 +32,10 @@ class ToolRegistry:
             NodesTool,
             DiagramTool,
             MultiCloudTool,
+            MetricsTool,
         ]
         for tool_class in tool_classes:
-            instance = tool_class(self.diagram_service)
+            instance = tool_class(self.diagram_service, self.executor)
             self._tools[tool_class.__name__] = instance
 
     def get_tool_methods(self) -> Dict[str, callable]:
@@ -32,8 +43,10 @@ class ToolRegistry:
         methods = {}
         for tool_instance in self._tools.values():
             for name in dir(tool_instance):
-                # Include all methods that don't start with underscore and are registered
-                if not name.startswith("_") and hasattr(getattr(tool_instance, name), '_is_mcp_tool'):
+                # Include all methods that don't start with underscore and are registered.
+                # The marker is looked up on the class, so instance attributes such as
+                # a lazily built service are never touched here
+                if not name.startswith("_") and hasattr(getattr(type(tool_instance), name, None), '_is_mcp_tool'):
                     method = getattr(tool_instance, name)
                     if callable(method):
                         methods[name] = method
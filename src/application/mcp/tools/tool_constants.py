@@ -100,7 +100,9 @@ RECOMMENDED_WORKFLOW = """
 3. get_category_nodes(provider, category) → Get exact node names
 4. create_diagram_from_json() → Create diagram with exact names from step 3
 
-⚠️  Using exact names from the discovery steps ensures correct icons!
+⚡ Common names work without discovery: "Load Balancer", "S3 bucket", "Postgres",
+"Pod", "ELB" and the like are mapped to the right icon, and each mapping is
+listed in the result's corrections. Use the discovery steps for anything unusual.
 """
 
 # Connection styling options
@@ -0,0 +1,120 @@
+"""Thread pool that runs blocking tool work off the event loop"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from src.infrastructure.adapters.render_scheduler import get_scheduler_limits
+
+# Threads beyond the render slots and queue, for calls that do not wait on
+# a render: cache hits, lookups of coalesced renders and image encoding
+HEADROOM_THREADS = 4
+
+
+def get_default_max_workers() -> int:
+    """
+    Concurrent blocking tool calls, from DIAGRAM_TOOL_THREADS
+
+    Defaults to every render the scheduler runs or queues plus
+    HEADROOM_THREADS, so that waiting renders are queued, ordered and
+    refused by the scheduler rather than by this pool.
+    """
+    env_threads = os.getenv('DIAGRAM_TOOL_THREADS')
+    if env_threads:
+        return max(1, int(env_threads))
+    max_concurrent, max_queued = get_scheduler_limits()
+    return max_concurrent + max_queued + HEADROOM_THREADS
+
+
+class ToolExecutorBusyError(RuntimeError):
+    """Raised when every thread of the tool executor is taken"""
+
+    def __init__(self, max_workers: int):
+        super().__init__(
+            f"Server busy: all {max_workers} tool threads are in use, try again shortly"
+        )
+        self.max_workers = max_workers
+
+
+class ToolExecutor:
+    """
+    Runs rendering and image work for async tools in a bounded thread pool
+
+    FastMCP runs every tool on one event loop, so a tool that renders in
+    place makes all other calls wait for dot and Pillow. Tools that render
+    await run() instead. The pool never queues work: a call that finds
+    every thread taken is refused with ToolExecutorBusyError, so waiting
+    happens in the render scheduler, which orders renders by cost and
+    bounds its queue. The pool is created on first use.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Initialize executor
+
+        Args:
+            max_workers: Blocking calls run at once. If None, see
+                        get_default_max_workers.
+        """
+        self.max_workers = max_workers or get_default_max_workers()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._active = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a blocking call in the pool and wait for it without blocking the loop
+
+        Args:
+            func: Function to call
+            *args: Positional arguments
+            **kwargs: Keyword arguments
+
+        Returns:
+            What func returned; exceptions are raised here
+
+        Raises:
+            ToolExecutorBusyError: If no thread is free
+        """
+        with self._lock:
+            if self._active >= self.max_workers:
+                self.rejected += 1
+                raise ToolExecutorBusyError(self.max_workers)
+            self._active += 1
+        # A thread is free for every admitted call, so none waits in the pool
+        return await asyncio.get_running_loop().run_in_executor(
+            self._get_executor(), partial(self._call, func, args, kwargs)
+        )
+
+    def _call(self, func: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        """Run func in a pool thread, freeing its place when it returns"""
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Get the pool, creating it on first use"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="diagram-tool"
+                )
+            return self._executor
+
+    def stats(self) -> Dict[str, Any]:
+        """Get calls in progress, the thread limit and refused calls"""
+        with self._lock:
+            return {'active': self._active, 'max_workers': self.max_workers, 'rejected': self.rejected}
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the pool; it is created again if run() is called later"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -1,5 +1,13 @@
 """Services layer for Diagram AI Generator"""
 
-from .diagram_service import DiagramService
+from src.lazy_exports import make_lazy_getattr
 
-__all__ = ["DiagramService"]
\ No newline at end of file
+# Imported on first access, so importing the package does not load diagrams
+_LAZY_EXPORTS = {
+    "DiagramService": (".diagram_service", "DiagramService"),
+    "LazyDiagramService": (".lazy_diagram_service", "LazyDiagramService"),
+}
+
+__getattr__ = make_lazy_getattr(__name__, _LAZY_EXPORTS)
+
+__all__ = ["DiagramService", "LazyDiagramService"]
@@ -1,19 +1,56 @@
 """
 Refactored diagram service following hexagonal architecture
 """
+import atexit
+import os
+import time
+from dataclasses import replace
+from functools import partial
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 from src.domain.value_objects.diagram_specification import DiagramSpecification
-from src.domain.value_objects.diagram_result import DiagramResult
+from src.domain.value_objects.diagram_result import DiagramResult, IMAGE_FORMAT_BASE64, IMAGE_FORMATS
+from src.domain.value_objects.lazy_image import LazyImage
+from src.domain.value_objects.specification_delta import SpecificationDelta
 from src.domain.services.node_resolver import NodeResolver
+from src.domain.services.specification_validator import SpecificationValidator
+from src.domain.services.stage_timer import (
+    STAGE_PARSE,
+    STAGE_QUEUE_WAIT,
+    STAGE_RENDER,
+    STAGE_RESOLVE,
+    STAGE_SHARED_WAIT,
+    STAGE_VALIDATE,
+    StageTimer,
+    current_timer,
+    use_timer
+)
 from src.domain.ports.diagram_storage_port import DiagramStoragePort
 from src.domain.ports.provider_repository_port import ProviderRepositoryPort
+from src.domain.ports.render_engine_port import RenderEnginePort
+from src.infrastructure.adapters.diagram_history import DiagramHistory
 from src.infrastructure.adapters.filesystem_storage import FilesystemDiagramStorage
 from src.infrastructure.adapters.provider_repository import ProviderRepository
 from src.infrastructure.adapters.node_class_loader import NodeClassLoader
 from src.infrastructure.adapters.image_optimizer import ImageOptimizer
-from src.infrastructure.adapters.diagram_builder import DiagramBuilder
+from src.infrastructure.adapters.catalog_generator import get_default_catalog_dir
+from src.infrastructure.adapters.module_warmer import ModuleWarmer, is_warmup_enabled
+from src.infrastructure.adapters.render_cache import RenderCache
+from src.infrastructure.adapters.render_metrics import RenderMetrics, create_render_metrics
+from src.infrastructure.adapters.single_flight import SingleFlight
+from src.infrastructure.adapters.render_scheduler import (
+    RenderQueueFullError,
+    RenderScheduler,
+    create_render_scheduler,
+    estimate_render_cost
+)
+from src.infrastructure.adapters.render_engines import (
+    InProcessRenderEngine,
+    ProcessPoolRenderEngine,
+    create_diagram_builder,
+    get_builder_class
+)
 
 
 class DiagramService:
@@ -27,7 +64,11 @@ class DiagramService:
     def __init__(
         self,
         storage: Optional[DiagramStoragePort] = None,
-        provider_repository: Optional[ProviderRepositoryPort] = None
+        provider_repository: Optional[ProviderRepositoryPort] = None,
+        render_cache: Optional[RenderCache] = None,
+        render_engine: Optional[RenderEnginePort] = None,
+        render_scheduler: Optional[RenderScheduler] = None,
+        render_metrics: Optional[RenderMetrics] = None
     ):
         """
         Initialize diagram service with dependency injection
@@ -35,65 +76,348 @@ class DiagramService:
         Args:
             storage: Storage adapter for saving diagrams
             provider_repository: Repository for provider data
+            render_cache: Cache for rendered results. If None, one is sized from
+                         the DIAGRAM_RENDER_CACHE_SIZE environment variable
+                         (0 disables caching).
+            render_engine: Engine that renders specifications. If None, renders
+                          in-process, or in a pool of DIAGRAM_RENDER_WORKERS
+                          worker processes when that variable is set.
+                          DIAGRAM_RENDER_BUILDER selects the builder: "dot"
+                          (default), which writes DOT directly and caches
+                          layouts, or "diagrams" for the diagrams object graph.
+            render_scheduler: Admission control for renders. If None, allows
+                             DIAGRAM_RENDER_CONCURRENCY renders at once (default:
+                             one per render worker) with DIAGRAM_RENDER_QUEUE_SIZE
+                             more waiting (default 16).
+            render_metrics: Per-stage timing collector. If None, configured by
+                           DIAGRAM_METRICS and DIAGRAM_METRICS_FILE (off by default).
         """
         # Infrastructure adapters
         self.storage = storage or FilesystemDiagramStorage()
         self.provider_repository = provider_repository or ProviderRepository()
         self.node_loader = NodeClassLoader()
-        self.image_optimizer = ImageOptimizer()
+        self.image_optimizer = ImageOptimizer(
+            max_width=int(os.getenv('DIAGRAM_MAX_WIDTH', '1000')),
+            max_height=int(os.getenv('DIAGRAM_MAX_HEIGHT', '800')),
+            mode=os.getenv('DIAGRAM_IMAGE_MODE', 'rgb'),
+            effort=os.getenv('DIAGRAM_IMAGE_EFFORT', 'max')
+        )
+        if render_cache is None:
+            render_cache = RenderCache(
+                max_entries=int(os.getenv('DIAGRAM_RENDER_CACHE_SIZE', '128'))
+            )
+        self.render_cache = render_cache
+        # Identical renders requested at the same time are done once
+        self.in_flight_renders = SingleFlight()
+        self.diagram_history = DiagramHistory(
+            max_entries=int(os.getenv('DIAGRAM_HISTORY_SIZE', '256'))
+        )
         
         # Domain services
-        self.node_resolver = NodeResolver(self.node_loader, self.provider_repository)
+        self.node_resolver = NodeResolver(
+            self.node_loader,
+            self.provider_repository,
+            cache_size=int(os.getenv('DIAGRAM_RESOLUTION_CACHE_SIZE', '1024'))
+        )
+        self.spec_validator = SpecificationValidator(
+            self.node_resolver,
+            strict_node_types=os.getenv('DIAGRAM_STRICT_NODE_TYPES', 'off').lower() in ('on', '1', 'true')
+        )
         
         # Diagram builder
-        self.diagram_builder = DiagramBuilder(
+        self.builder_type = os.getenv('DIAGRAM_RENDER_BUILDER', 'dot')
+        self.diagram_builder = get_builder_class(self.builder_type)(
             self.node_resolver,
-            self.storage.get_output_directory()
+            self.storage.get_output_directory(),
+            output_size=self._get_output_size()
+        )
+        
+        # Render engine
+        self.render_engine = render_engine or self._create_render_engine()
+        
+        # Render admission and ordering, cheapest waiting render first
+        self.render_scheduler = render_scheduler or create_render_scheduler()
+        
+        # Per-stage latency of each request
+        self.render_metrics = render_metrics or create_render_metrics()
+        
+        # Provider module warm-up, started by start_warmup()
+        self.module_warmer = self._create_module_warmer()
+    
+    def _create_render_engine(self) -> RenderEnginePort:
+        """Create the render engine configured by environment variables"""
+        workers = int(os.getenv('DIAGRAM_RENDER_WORKERS', '0'))
+        if workers > 0:
+            return ProcessPoolRenderEngine(
+                self.storage.get_output_directory(),
+                max_workers=workers,
+                max_jobs_per_worker=int(os.getenv('DIAGRAM_RENDER_WORKER_MAX_JOBS', '100')) or None,
+                builder_factory=partial(
+                    create_diagram_builder,
+                    builder_type=self.builder_type,
+                    output_size=self._get_output_size()
+                )
+            )
+        return InProcessRenderEngine(self.diagram_builder)
+    
+    def _create_module_warmer(self) -> Optional[ModuleWarmer]:
+        """Create the module warmer configured by environment variables, None if disabled"""
+        if not is_warmup_enabled():
+            return None
+        modules = os.getenv('DIAGRAM_WARMUP_MODULES')
+        return ModuleWarmer(
+            self.node_loader,
+            modules=[m.strip() for m in modules.split(',') if m.strip()] if modules is not None else None,
+            usage_path=get_default_catalog_dir() / "module_usage.json",
+            learned_limit=int(os.getenv('DIAGRAM_WARMUP_LEARNED', '20'))
         )
     
-    def create_diagram_from_spec(self, spec_dict: Dict[str, Any]) -> Dict[str, Any]:
+    def start_warmup(self) -> None:
+        """
+        Import the commonly used provider modules in the background
+        
+        Meant to be called once the server is up, so the first diagrams do
+        not pay for these imports. Module usage is saved at exit to improve
+        the next warm-up.
+        """
+        if self.module_warmer is None:
+            return
+        self.module_warmer.start()
+        atexit.register(self.module_warmer.save_usage)
+    
+    def get_warmup_stats(self) -> Optional[Dict[str, Any]]:
+        """Get warm-up progress and per-module import times, None if disabled"""
+        return self.module_warmer.stats() if self.module_warmer is not None else None
+    
+    def create_diagram_from_spec(
+        self,
+        spec_dict: Dict[str, Any],
+        image_format: str = IMAGE_FORMAT_BASE64
+    ) -> Dict[str, Any]:
         """
         Create diagram from specification dictionary
         
         Args:
             spec_dict: Dictionary containing diagram specification
+            image_format: How the image is returned: "path" (file path only,
+                         the image is not optimized), "bytes" (optimized PNG
+                         in 'image_bytes') or "base64" (default)
         
         Returns:
             Dictionary with generation result
         """
+        timer = self.render_metrics.start_request()
         try:
-            # Parse specification into value object
-            spec = DiagramSpecification.from_dict(spec_dict)
+            self._check_image_format(image_format)
             
-            # Build diagram
-            image_path = self.diagram_builder.build(spec)
+            with use_timer(timer):
+                # Parse specification into value object
+                with timer.stage(STAGE_PARSE):
+                    spec = DiagramSpecification.from_dict(spec_dict)
+                
+                return self._finish(self._render_spec(spec), image_format, timer)
+            
+        except Exception as e:
+            return DiagramResult.failure_result(
+                f'Error generating diagram: {str(e)}'
+            ).to_dict()
+    
+    def update_diagram(
+        self,
+        diagram_id: str,
+        changes: Dict[str, Any],
+        image_format: str = IMAGE_FORMAT_BASE64
+    ) -> Dict[str, Any]:
+        """
+        Re-render a previously generated diagram with some changes
+        
+        Args:
+            diagram_id: ID returned when the diagram was generated
+            changes: Delta dictionary (add_components, remove_components,
+                    add_connections, remove_connections, add_clusters,
+                    remove_clusters), see SpecificationDelta
+            image_format: How the image is returned, see create_diagram_from_spec
+        
+        Returns:
+            Dictionary with generation result, including the new diagram ID
+        """
+        timer = self.render_metrics.start_request()
+        try:
+            self._check_image_format(image_format)
             
-            # Verify file exists
-            if not Path(image_path).exists():
+            previous = self.diagram_history.get(diagram_id)
+            if previous is None:
                 return DiagramResult.failure_result(
-                    f'Failed to generate file: {image_path}'
+                    f'Unknown diagram ID: {diagram_id}'
                 ).to_dict()
             
-            # Optimize and encode image
-            image_data = self.image_optimizer.optimize_and_encode(image_path)
-            image_size_mb = self.image_optimizer.get_image_size_mb(image_data)
-            
-            # Return success result
-            return DiagramResult.success_result(
-                title=spec.title,
-                file_path=image_path,
-                image_base64=image_data,
-                image_size_mb=image_size_mb,
-                components_count=len(spec.components),
-                connections_count=len(spec.connections),
-                provider=spec.provider
-            ).to_dict()
+            with use_timer(timer):
+                with timer.stage(STAGE_PARSE):
+                    delta = SpecificationDelta.from_dict(changes)
+                    spec = delta.apply_to(previous)
+                
+                return self._finish(self._render_spec(spec, previous), image_format, timer)
             
         except Exception as e:
             return DiagramResult.failure_result(
-                f'Error generating diagram: {str(e)}'
+                f'Error updating diagram: {str(e)}'
             ).to_dict()
     
+    def _finish(self, result: DiagramResult, image_format: str, timer: StageTimer) -> Dict[str, Any]:
+        """Convert a result to a dictionary and record the request's stage timings"""
+        if timer.enabled:
+            result = replace(result, timer=timer)
+        result_dict = result.to_dict(image_format)
+        self.render_metrics.record(timer)
+        return result_dict
+    
+    @staticmethod
+    def _check_image_format(image_format: str) -> None:
+        """Reject unknown image formats before doing any work"""
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(
+                f"Unknown image format: {image_format}. Use one of: {', '.join(IMAGE_FORMATS)}"
+            )
+    
+    def _render_spec(
+        self,
+        spec: DiagramSpecification,
+        previous: Optional[DiagramSpecification] = None
+    ) -> DiagramResult:
+        """Render a specification, or return the stored render of an identical one"""
+        timer = current_timer()
+        
+        # Reject broken specifications before paying for a render
+        with timer.stage(STAGE_VALIDATE):
+            validation = self.spec_validator.validate(spec)
+        issues = [issue.to_dict() for issue in validation] or None
+        if SpecificationValidator.has_errors(validation):
+            errors = sum(1 for issue in validation if issue.is_error)
+            return DiagramResult.failure_result(
+                f'Invalid specification: {errors} error{"s" if errors != 1 else ""} found',
+                issues=issues
+            )
+        
+        # Point misplaced or misspelled node types at their catalog location
+        with timer.stage(STAGE_RESOLVE):
+            spec, resolutions = self.node_resolver.correct_specification(spec)
+        corrections = [
+            {'component_id': component_id, **resolution.to_dict()}
+            for component_id, resolution in resolutions.items()
+        ] or None
+        
+        cache_key = RenderCache.make_key(spec, self._get_render_settings())
+        diagram_id = cache_key[:16]
+        
+        # Join an identical render that is already running (e.g. a retried
+        # tool call); the cache is filled before the render is released, so
+        # a later request finds it there
+        start = time.perf_counter()
+        try:
+            result, shared = self.in_flight_renders.do(
+                cache_key,
+                partial(self._render_uncached, spec, previous, cache_key, diagram_id)
+            )
+        except RenderQueueFullError as e:
+            return DiagramResult.busy_result(str(e))
+        if shared:
+            timer.add(STAGE_SHARED_WAIT, time.perf_counter() - start)
+        # Only diagrams that rendered can be updated later
+        if result.success:
+            self.diagram_history.put(diagram_id, spec)
+        return replace(result, corrections=corrections, issues=issues, shared=shared)
+    
+    def _render_uncached(
+        self,
+        spec: DiagramSpecification,
+        previous: Optional[DiagramSpecification],
+        cache_key: str,
+        diagram_id: str
+    ) -> DiagramResult:
+        """Render a corrected specification unless an identical one is cached"""
+        # Return the stored render for an identical spec
+        cached_result = self.render_cache.get(cache_key)
+        if cached_result is not None:
+            return cached_result
+        
+        # Build diagram once a render slot is free; refused when too many are waiting
+        timer = current_timer()
+        with self.render_scheduler.slot(estimate_render_cost(spec)) as waited:
+            timer.add(STAGE_QUEUE_WAIT, waited)
+            with timer.stage(STAGE_RENDER):
+                image_path = self.render_engine.render(spec, previous, cache_key)
+        
+        # Verify file exists
+        if not Path(image_path).exists():
+            return DiagramResult.failure_result(
+                f'Failed to generate file: {image_path}'
+            )
+        
+        if timer.enabled:
+            timer.add_bytes(STAGE_RENDER, Path(image_path).stat().st_size)
+        
+        # Other formats are written next to the PNG from the same layout
+        output_files = {
+            fmt: str(Path(image_path).with_suffix(f'.{fmt}')) for fmt in spec.output_formats
+        }
+        
+        # Optimize and encode image only when a caller asks for the data
+        result = DiagramResult.success_result(
+            title=spec.title,
+            file_path=image_path,
+            image=LazyImage(image_path, self.image_optimizer.encode),
+            components_count=len(spec.components),
+            connections_count=len(spec.connections),
+            provider=spec.provider,
+            diagram_id=diagram_id,
+            output_files=output_files
+        )
+        self.render_cache.put(cache_key, result)
+        
+        return result
+    
+    def shutdown(self) -> None:
+        """Release render engine resources such as worker processes"""
+        self.render_engine.shutdown()
+        if self.module_warmer is not None:
+            # Saved here instead of at exit, so the usage is counted once
+            atexit.unregister(self.module_warmer.save_usage)
+            self.module_warmer.save_usage()
+    
+    def get_render_cache_stats(self) -> Dict[str, Any]:
+        """Get render cache size and hit/miss counters"""
+        return self.render_cache.stats()
+    
+    def get_render_queue_stats(self) -> Dict[str, Any]:
+        """Get running and queued renders, rejections and queue wait times"""
+        return self.render_scheduler.stats()
+    
+    def get_render_metrics(self) -> Dict[str, Any]:
+        """Get per-stage request counts, mean and recent latency percentiles"""
+        return self.render_metrics.summary()
+    
+    def get_in_flight_stats(self) -> Dict[str, Any]:
+        """Get renders in progress, renders run and requests that joined a running one"""
+        return self.in_flight_renders.stats()
+    
+    def get_resolution_cache_stats(self) -> Dict[str, Any]:
+        """Get node resolution cache size and hit/miss counters"""
+        return self.node_resolver.get_cache_stats()
+    
+    def _get_output_size(self) -> Tuple[int, int]:
+        """Image size to render at, so images never need resizing afterwards"""
+        return (self.image_optimizer.max_width, self.image_optimizer.max_height)
+    
+    def _get_render_settings(self) -> Dict[str, Any]:
+        """Settings that, besides the spec, determine the rendered output"""
+        return {
+            **self.render_engine.get_render_settings(),
+            'max_width': self.image_optimizer.max_width,
+            'max_height': self.image_optimizer.max_height,
+            'image_mode': self.image_optimizer.mode,
+            'image_effort': self.image_optimizer.effort
+        }
+    
     # Query methods (delegated to repository)
     
     def get_available_providers(self) -> List[str]:
@@ -108,7 +432,12 @@ class DiagramService:
         """Get available nodes for a provider category"""
         return self.provider_repository.get_category_nodes(provider, category)
     
-    def search_nodes(self, query: str, provider: str = None) -> List[Dict[str, str]]:
-        """Search for nodes by name"""
-        return self.provider_repository.search_nodes(query, provider)
+    def search_nodes(
+        self,
+        query: str,
+        provider: str = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, str]]:
+        """Search for nodes by name, best match first"""
+        return self.provider_repository.search_nodes(query, provider, limit)
 
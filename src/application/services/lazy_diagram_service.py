@@ -0,0 +1,100 @@
+"""
+Diagram service built on first use
+"""
+import sys
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from src.infrastructure.adapters.module_warmer import is_warmup_enabled
+
+if TYPE_CHECKING:
+    from src.application.services.diagram_service import DiagramService
+
+
+def _create_diagram_service() -> 'DiagramService':
+    """Import and build the default diagram service"""
+    from src.application.services.diagram_service import DiagramService
+    return DiagramService()
+
+
+class LazyDiagramService:
+    """
+    Stand-in for DiagramService that builds the real service on first use
+
+    Building the service loads the provider catalog, imports diagrams and PIL
+    and creates the output directory. The MCP server holds this stand-in
+    instead, so it can answer the client handshake before paying for any of
+    that. Attribute access is forwarded to the real service, which is built
+    once, under a lock, by whichever caller gets there first.
+    """
+
+    def __init__(self, factory: Optional[Callable[[], 'DiagramService']] = None):
+        """
+        Initialize stand-in
+
+        Args:
+            factory: Builds the real service (default: DiagramService())
+        """
+        self._factory = factory or _create_diagram_service
+        self._service: Optional['DiagramService'] = None
+        self._lock = threading.Lock()
+        self._loader: Optional[threading.Thread] = None
+        # Milliseconds spent importing and building the real service
+        self.load_ms: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the real service has been built"""
+        return self._service is not None
+
+    def get(self) -> 'DiagramService':
+        """Get the real service, building it if needed"""
+        service = self._service
+        if service is not None:
+            return service
+        with self._lock:
+            if self._service is None:
+                start = time.perf_counter()
+                self._service = self._factory()
+                self.load_ms = round((time.perf_counter() - start) * 1000, 1)
+            return self._service
+
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for attributes the stand-in itself does not have. Special
+        # names are probed by copy, pickle and introspection and must not build it
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+    def start_warmup(self) -> None:
+        """
+        Build the service and warm up provider modules in a background thread
+
+        Does nothing when DIAGRAM_WARMUP is off; the service is then built by
+        the first tool call.
+        """
+        if self._loader is not None or not is_warmup_enabled():
+            return
+        self._loader = threading.Thread(
+            target=self._load_and_warm_up, name="diagram-service-load", daemon=True
+        )
+        self._loader.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the background build to finish, returning whether the service is built"""
+        if self._loader is not None:
+            self._loader.join(timeout)
+        return self.loaded
+
+    def shutdown(self) -> None:
+        """Shut down the real service if it was ever built"""
+        if self._service is not None:
+            self._service.shutdown()
+
+    def _load_and_warm_up(self) -> None:
+        """Background build; a failure is left for the first tool call to report"""
+        try:
+            self.get().start_warmup()
+        except Exception as e:
+            print(f"⚠️  Background service start failed: {e}", file=sys.stderr)
@@ -1,6 +1,9 @@
 """Provider repository port"""
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import TYPE_CHECKING, List, Dict, Optional
+
+if TYPE_CHECKING:
+    from src.domain.services.node_matcher import MatchIndexes
 
 
 class ProviderRepositoryPort(ABC):
@@ -27,7 +30,25 @@ class ProviderRepositoryPort(ABC):
         pass
     
     @abstractmethod
-    def search_nodes(self, query: str, provider: str = None) -> List[Dict[str, str]]:
-        """Search for nodes by query"""
+    def find_node(self, node_type: str, provider: str = None) -> List[Dict[str, str]]:
+        """Find every provider category listing a node type"""
         pass
-
+    
+    @abstractmethod
+    def find_alias(self, provider: str, name: str) -> Optional[Dict[str, str]]:
+        """Find the node class a synonym or class alias stands for"""
+        pass
+    
+    @abstractmethod
+    def search_nodes(
+        self,
+        query: str,
+        provider: str = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, str]]:
+        """Search for nodes by query, best match first"""
+        pass
+    
+    def get_match_indexes(self) -> Optional['MatchIndexes']:
+        """Prebuilt fuzzy matching indexes, or None to let the matcher build them"""
+        return None
@@ -0,0 +1,50 @@
+"""
+Port (interface) for diagram render engines.
+This allows us to swap how specifications are turned into images
+(in-process, worker process pool, etc.)
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+
+from src.domain.value_objects.diagram_specification import DiagramSpecification
+
+
+class RenderEnginePort(ABC):
+    """Interface for rendering diagram specifications to image files"""
+
+    @abstractmethod
+    def render(
+        self,
+        spec: DiagramSpecification,
+        previous: Optional[DiagramSpecification] = None,
+        digest: Optional[str] = None
+    ) -> str:
+        """
+        Render a diagram specification
+
+        Args:
+            spec: Diagram specification
+            previous: Specification this one was edited from, if any. Engines
+                     may reuse its layout so unchanged parts keep their place.
+            digest: Hex digest of spec and render settings the caller already
+                   computed (the render cache key), used to name the output
+                   file instead of hashing the spec again
+
+        Returns:
+            str: Path to the generated PNG file
+        """
+        pass
+
+    @abstractmethod
+    def get_render_settings(self) -> Dict[str, Any]:
+        """
+        Get the settings that affect the rendered image
+
+        Returns:
+            Dict: JSON-serializable settings, used to key cached results
+        """
+        pass
+
+    def shutdown(self) -> None:
+        """Release any resources held by the engine"""
+        pass
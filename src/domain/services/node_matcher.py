@@ -0,0 +1,298 @@
+"""Fuzzy node name matching domain service"""
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# Candidates scoring below this are not considered a match
+MIN_SCORE = 0.5
+
+# Names compared by edit distance per query, those sharing the most trigrams
+EDIT_CANDIDATES = 32
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase a node name and drop everything but letters and digits"""
+    return _NON_ALNUM.sub('', name.lower())
+
+
+def trigrams(name: str) -> List[str]:
+    """Trigrams of a normalized name, padded so short names still have some"""
+    padded = f"  {name} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def edit_distance(a: str, b: str, max_distance: Optional[int] = None) -> int:
+    """
+    Levenshtein distance between two strings
+
+    Args:
+        a: First string
+        b: Second string
+        max_distance: Stop early once the distance is known to exceed this;
+                      the returned value is then max_distance + 1
+
+    Returns:
+        Number of single-character edits turning one string into the other
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def similarity(query: str, name: str, min_score: float = 0.0) -> float:
+    """
+    Score how well a normalized name matches a normalized query
+
+    Args:
+        query: Normalized query
+        name: Normalized candidate name
+        min_score: Scores below this may be returned as 0.0 to save work
+
+    Returns:
+        1.0 for identical names, down to 0.0. One name containing the
+        other scores at least 0.7 ("postgres" in "postgresql"); otherwise
+        the score is the edit distance relative to the longer name.
+    """
+    score = containment(query, name)
+    if score is not None:
+        return score
+    longest = max(len(query), len(name))
+    max_distance = int(longest * (1 - min_score))
+    distance = edit_distance(query, name, max_distance)
+    return 0.0 if distance > max_distance else 1 - distance / longest
+
+
+def containment(query: str, name: str) -> Optional[float]:
+    """Similarity of two names when one contains the other, else None"""
+    if query == name:
+        return 1.0
+    shorter, longer = sorted((query, name), key=len)
+    if shorter and shorter in longer:
+        return 0.7 + 0.3 * len(shorter) / len(longer)
+    return None
+
+
+class TrigramIndex:
+    """Trigram index over a fixed list of names"""
+
+    def __init__(self, names: List[str]):
+        """
+        Build the index
+
+        Args:
+            names: Names to index; duplicates are indexed once
+        """
+        self.names = list(dict.fromkeys(names))
+        self._normalized = [normalize_name(name) for name in self.names]
+        self._postings: Dict[str, List[int]] = {}
+        for name_id, normalized in enumerate(self._normalized):
+            for gram in set(trigrams(normalized)):
+                self._postings.setdefault(gram, []).append(name_id)
+
+    def match(
+        self,
+        query: str,
+        limit: int = 5,
+        min_score: float = MIN_SCORE
+    ) -> List[Tuple[str, float]]:
+        """
+        Find the names closest to a query
+
+        Only names sharing a trigram with the query are scored, and only the
+        EDIT_CANDIDATES of them sharing the most are compared by edit distance.
+
+        Args:
+            query: Name to match, case and punctuation insensitive
+            limit: Maximum number of candidates
+            min_score: Lowest similarity to accept
+
+        Returns:
+            (name, score) pairs, best first
+        """
+        normalized = normalize_name(query)
+        if not normalized:
+            return []
+
+        shared: Dict[int, int] = {}
+        for gram in set(trigrams(normalized)):
+            for name_id in self._postings.get(gram, ()):
+                shared[name_id] = shared.get(name_id, 0) + 1
+
+        scores: Dict[int, float] = {}
+        for name_id in shared:
+            score = containment(normalized, self._normalized[name_id])
+            if score is not None:
+                scores[name_id] = score
+        closest = sorted(shared, key=lambda name_id: -shared[name_id])[:EDIT_CANDIDATES]
+        for name_id in closest:
+            if name_id not in scores:
+                scores[name_id] = similarity(normalized, self._normalized[name_id], min_score)
+
+        scored = sorted(
+            (-score, abs(len(self._normalized[name_id]) - len(normalized)), name_id, score)
+            for name_id, score in scores.items()
+            if score >= min_score
+        )
+
+        return [(self.names[name_id], round(score, 3)) for _, _, name_id, score in scored[:limit]]
+
+    def to_state(self) -> Dict[str, Any]:
+        """Get the index as plain lists and dicts, see from_state"""
+        return {'names': self.names, 'normalized': self._normalized, 'postings': self._postings}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'TrigramIndex':
+        """Restore an index from to_state() without building it again"""
+        index = cls.__new__(cls)
+        index.names = state['names']
+        index._normalized = state['normalized']
+        index._postings = state['postings']
+        return index
+
+
+# Trigram index of a provider's nodes, with the category of each node
+ProviderIndex = Tuple[TrigramIndex, Dict[str, str]]
+
+
+def build_provider_index(categories: Dict[str, List[str]]) -> ProviderIndex:
+    """
+    Index every node of a provider
+
+    Args:
+        categories: Node names by category
+
+    Returns:
+        Index of the node names and the category of each name
+    """
+    category_of: Dict[str, str] = {}
+    for category, nodes in categories.items():
+        for node in nodes or []:
+            # A node listed in several categories resolves to the first one
+            category_of.setdefault(node, category)
+    return TrigramIndex(list(category_of)), category_of
+
+
+class MatchIndexes:
+    """
+    Trigram indexes of every node of each provider
+
+    Built ahead of time so they can be compiled with the catalog (see
+    compiled_catalog) instead of being built by NodeMatcher in every process.
+    Per-category indexes are left out: each is small and quick to build, and
+    a process only uses a few of them.
+    """
+
+    def __init__(self, providers: Dict[str, ProviderIndex]):
+        """
+        Initialize indexes
+
+        Args:
+            providers: Index of each provider, with the category of each node
+        """
+        self.providers = providers
+
+    @classmethod
+    def build(cls, data: Dict[str, Dict[str, List[str]]]) -> 'MatchIndexes':
+        """Build the indexes of a catalog of node names by provider and category"""
+        return cls({provider: build_provider_index(categories or {}) for provider, categories in data.items()})
+
+    def to_state(self) -> Dict[str, Any]:
+        """Get the indexes as plain lists, dicts and tuples, see from_state"""
+        return {
+            provider: (index.to_state(), category_of)
+            for provider, (index, category_of) in self.providers.items()
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'MatchIndexes':
+        """Restore indexes from to_state() without building them again"""
+        return cls({
+            provider: (TrigramIndex.from_state(index), category_of)
+            for provider, (index, category_of) in state.items()
+        })
+
+
+class NodeMatcher:
+    """
+    Fuzzy matcher of node types against the provider catalog
+
+    Uses one trigram index per provider category, built on first use, and one
+    per provider, which comes prebuilt from the repository when it has them
+    (see get_match_indexes) and is otherwise built on first use too. Indexes
+    are kept for the life of the matcher.
+    """
+
+    def __init__(self, providers_repository: 'ProviderRepository'):
+        """
+        Initialize matcher
+
+        Args:
+            providers_repository: Repository for provider data
+        """
+        self.providers_repository = providers_repository
+        prebuilt = providers_repository.get_match_indexes()
+        self._category_indexes: Dict[Tuple[str, str], TrigramIndex] = {}
+        self._provider_indexes: Dict[str, ProviderIndex] = (
+            dict(prebuilt.providers) if prebuilt is not None else {}
+        )
+        self._lock = threading.Lock()
+
+    def match(
+        self,
+        provider: str,
+        category: str,
+        node_type: str,
+        limit: int = 5
+    ) -> List[Tuple[str, float]]:
+        """
+        Find the nodes of a category closest to a node type
+
+        Returns:
+            (node name, score) pairs, best first
+        """
+        key = (provider, category)
+        index = self._category_indexes.get(key)
+        if index is None:
+            index = TrigramIndex(self.providers_repository.get_category_nodes(provider, category))
+            with self._lock:
+                index = self._category_indexes.setdefault(key, index)
+        return index.match(node_type, limit)
+
+    def match_provider(
+        self,
+        provider: str,
+        node_type: str,
+        limit: int = 5
+    ) -> List[Tuple[str, str, float]]:
+        """
+        Find the nodes of any category of a provider closest to a node type
+
+        Returns:
+            (node name, category, score) tuples, best first
+        """
+        entry = self._provider_indexes.get(provider)
+        if entry is None:
+            entry = build_provider_index({
+                category: self.providers_repository.get_category_nodes(provider, category)
+                for category in self.providers_repository.get_provider_categories(provider)
+            })
+            with self._lock:
+                entry = self._provider_indexes.setdefault(provider, entry)
+        index, categories = entry
+        return [(name, categories[name], score) for name, score in index.match(node_type, limit)]
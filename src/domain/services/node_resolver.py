@@ -1,21 +1,48 @@
 """Node resolution domain service"""
-from typing import Optional, List, Any
-from diagrams.generic import Generic
+from dataclasses import replace
+from typing import List, Any, Dict, Tuple
+
+from src.domain.services.node_matcher import NodeMatcher
+from src.domain.services.resolution_cache import CachedResolution, ResolutionCache
+from src.domain.value_objects.diagram_specification import DiagramSpecification
+from src.domain.value_objects.node_resolution import (
+    NodeResolution,
+    MATCH_EXACT,
+    MATCH_RELOCATED,
+    MATCH_ALIAS,
+    MATCH_FUZZY,
+    MATCH_NONE
+)
+
+
+def _generic_node_class() -> Any:
+    """Fallback node class, imported on first use so loading the resolver does not import diagrams"""
+    from diagrams.generic import Generic
+    return Generic
 
 
 class NodeResolver:
     """Resolves node types to diagram node classes"""
     
-    def __init__(self, node_loader: 'NodeClassLoader', providers_repository: 'ProviderRepository'):
+    def __init__(
+        self,
+        node_loader: 'NodeClassLoader',
+        providers_repository: 'ProviderRepository',
+        cache_size: int = 1024
+    ):
         """
         Initialize node resolver
         
         Args:
             node_loader: Adapter for loading node classes dynamically
             providers_repository: Repository for provider data
+            cache_size: Maximum number of resolutions to remember, including
+                       failed ones (0 disables caching)
         """
         self.node_loader = node_loader
         self.providers_repository = providers_repository
+        self.node_matcher = NodeMatcher(providers_repository)
+        self.resolution_cache = ResolutionCache(max_entries=cache_size)
     
     def resolve_node(self, provider: str, category: str, node_type: str) -> Any:
         """
@@ -29,54 +56,196 @@ class NodeResolver:
         Returns:
             Node class, or Generic as fallback
         """
+        key = (provider, category, node_type)
+        cached = self.resolution_cache.get(key)
+        if cached is not None and cached.node_class is not None:
+            # Keep module usage counts (used to learn the warm-up) accurate;
+            # a Generic fallback used no module of the catalog
+            if not cached.fallback:
+                self.node_loader.record_usage(cached.resolution.provider, cached.resolution.category)
+            return cached.node_class
+        
+        resolution = cached.resolution if cached is not None else self._locate_node(*key)
+        node_class = None
+        if resolution.match != MATCH_NONE:
+            node_class = self.node_loader.load_node_class(
+                resolution.provider, resolution.category, resolution.node_type
+            )
+        
+        if not node_class:
+            self.resolution_cache.put(
+                key, CachedResolution(resolution, _generic_node_class(), fallback=True)
+            )
+            return _generic_node_class()
+        
+        if resolution.corrected:
+            where = (
+                "" if (resolution.provider, resolution.category) == (provider, category)
+                else f" from {resolution.provider}/{resolution.category}"
+            )
+            print(f"✅ Using '{resolution.node_type}'{where} instead of '{node_type}'")
+        self.resolution_cache.put(key, CachedResolution(resolution, node_class))
+        return node_class
+    
+    def locate_node(self, provider: str, category: str, node_type: str) -> NodeResolution:
+        """
+        Find where a node type is listed in the catalog, without loading it
+        
+        Results are cached, see _locate_node for the search itself.
+        
+        Args:
+            provider: Cloud provider (aws, azure, gcp, etc.)
+            category: Node category (compute, database, etc.)
+            node_type: Specific node type (EC2, RDS, etc.)
+        
+        Returns:
+            Resolution; its match is MATCH_NONE when nothing was found
+        """
+        key = (provider, category, node_type)
+        cached = self.resolution_cache.get(key)
+        if cached is not None:
+            return cached.resolution
+        
+        resolution = self._locate_node(*key)
+        self.resolution_cache.put(key, CachedResolution(resolution))
+        return resolution
+    
+    def is_listed(self, provider: str, category: str, node_type: str) -> bool:
+        """
+        Check whether the catalog lists a node type, by name or alias
+        
+        Only looks the name up: a misspelled type is not matched, and nothing
+        is printed. See locate_node for the full search.
+        
+        Args:
+            provider: Cloud provider (aws, azure, gcp, etc.)
+            category: Node category (compute, database, etc.)
+            node_type: Specific node type (EC2, RDS, etc.)
+        
+        Returns:
+            True if the name is listed in any category or provider, or is a
+            synonym or class alias of the provider
+        """
+        return bool(
+            self.providers_repository.node_exists(provider, category, node_type)
+            or self.providers_repository.find_node(node_type)
+            or self.providers_repository.find_alias(provider, node_type)
+        )
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get resolution cache size and hit/miss counters"""
+        return self.resolution_cache.stats()
+    
+    def clear_cache(self) -> None:
+        """Forget all cached resolutions"""
+        self.resolution_cache.clear()
+    
+    def _locate_node(self, provider: str, category: str, node_type: str) -> NodeResolution:
+        """
+        Search the catalog for a node type
+        
+        Tried in order: the requested category; the same name in another
+        category of the provider; a synonym or class alias; the closest
+        similar name in the category or, if clearly closer, elsewhere in the
+        provider; the same name in another provider.
+        
+        Args:
+            provider: Cloud provider (aws, azure, gcp, etc.)
+            category: Node category (compute, database, etc.)
+            node_type: Specific node type (EC2, RDS, etc.)
+        
+        Returns:
+            Resolution; its match is MATCH_NONE when nothing was found
+        """
+        def resolution(found_provider: str, found_category: str, found_type: str, match: str):
+            return NodeResolution(
+                requested_provider=provider,
+                requested_category=category,
+                requested_type=node_type,
+                provider=found_provider,
+                category=found_category,
+                node_type=found_type,
+                match=match
+            )
+        
         # Try exact match first
         if self.providers_repository.node_exists(provider, category, node_type):
-            node_class = self.node_loader.load_node_class(provider, category, node_type)
-            if node_class:
-                return node_class
+            return resolution(provider, category, node_type, MATCH_EXACT)
+        
+        # Same name listed elsewhere, preferring the requested provider and category
+        locations = self.providers_repository.find_node(node_type)
+        local = sorted(
+            (loc for loc in locations if loc['provider'] == provider),
+            key=lambda loc: loc['category'] != category
+        )
+        if local:
+            return resolution(local[0]['provider'], local[0]['category'], local[0]['name'], MATCH_RELOCATED)
+        
+        # Synonyms ("load balancer", "S3 bucket") and class aliases (ELB)
+        alias = self.providers_repository.find_alias(provider, node_type)
+        if alias:
+            return resolution(alias['provider'], alias['category'], alias['name'], MATCH_ALIAS)
         
         # Try to find suggestions and use best match
-        suggestions = self._find_suggestions(provider, category, node_type)
-        if suggestions:
+        matches = self.node_matcher.match(provider, category, node_type)
+        if matches:
             print(f"⚠️  Node not found: '{node_type}' in {provider}/{category}")
-            print(f"💡 Suggestions: {', '.join(suggestions[:3])}")
-            
-            # Try first suggestion
-            best_match = suggestions[0]
-            node_class = self.node_loader.load_node_class(provider, category, best_match)
-            if node_class:
-                print(f"✅ Using suggestion: '{best_match}' instead of '{node_type}'")
-                return node_class
-        
-        # Fallback to Generic
-        return Generic
+            print(f"💡 Suggestions: {', '.join(name for name, _ in matches[:3])}")
+        
+        best = (category, matches[0][0]) if matches else None
+        if not matches or matches[0][1] < 1.0:
+            # The category may be wrong; look for a closer node in the whole provider
+            wider = self.node_matcher.match_provider(provider, node_type, limit=1)
+            if wider and (not matches or wider[0][2] > matches[0][1]):
+                best = (wider[0][1], wider[0][0])
+        if best:
+            return resolution(provider, best[0], best[1], MATCH_FUZZY)
+        
+        # Same name in another provider
+        if locations:
+            return resolution(locations[0]['provider'], locations[0]['category'], locations[0]['name'], MATCH_RELOCATED)
+        
+        return resolution(provider, category, node_type, MATCH_NONE)
+    
+    def correct_specification(
+        self,
+        spec: DiagramSpecification
+    ) -> Tuple[DiagramSpecification, Dict[str, NodeResolution]]:
+        """
+        Point components at the catalog location their node type resolves to
+        
+        Components listed under the wrong category or provider, or with a
+        misspelled type, are rewritten so that rendering finds them directly.
+        
+        Args:
+            spec: Specification to check
+        
+        Returns:
+            Corrected specification (the original if nothing changed) and the
+            corrections made, by component id
+        """
+        corrections: Dict[str, NodeResolution] = {}
+        components = []
+        for component in spec.components:
+            provider = component.component_provider or spec.provider
+            resolution = self.locate_node(provider, component.category, component.type)
+            if resolution.corrected:
+                corrections[component.id] = resolution
+                component = replace(
+                    component,
+                    category=resolution.category,
+                    type=resolution.node_type,
+                    component_provider=(
+                        resolution.provider if resolution.provider != provider
+                        else component.component_provider
+                    )
+                )
+            components.append(component)
+        
+        if not corrections:
+            return spec, corrections
+        return replace(spec, components=components), corrections
     
     def _find_suggestions(self, provider: str, category: str, node_type: str) -> List[str]:
-        """Find similar node suggestions"""
-        available_nodes = self.providers_repository.get_category_nodes(provider, category)
-        if not available_nodes:
-            return []
-        
-        suggestions = []
-        node_lower = node_type.lower()
-        
-        # Exact match (case-insensitive)
-        for node in available_nodes:
-            if node.lower() == node_lower:
-                suggestions.append(node)
-        
-        # Contains match
-        for node in available_nodes:
-            if node_lower in node.lower() or node.lower() in node_lower:
-                if node not in suggestions:
-                    suggestions.append(node)
-        
-        # Prefix match (first 3 characters)
-        for node in available_nodes:
-            if (len(node_lower) >= 3 and len(node) >= 3 and 
-                node.lower()[:3] == node_lower[:3]):
-                if node not in suggestions:
-                    suggestions.append(node)
-        
-        return suggestions[:5]
-
+        """Find similar node suggestions in a category, closest first"""
+        return [name for name, _ in self.node_matcher.match(provider, category, node_type)]
@@ -0,0 +1,91 @@
+"""Bounded cache of node resolutions"""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from src.domain.value_objects.node_resolution import NodeResolution, MATCH_NONE
+
+ResolutionKey = Tuple[str, str, str]
+
+
+@dataclass(frozen=True)
+class CachedResolution:
+    """Outcome of resolving one (provider, category, type) triple"""
+    resolution: NodeResolution
+    # Node class it rendered as, None until resolve_node has loaded it
+    node_class: Any = None
+    # True when the node class is the Generic fallback
+    fallback: bool = False
+
+    @property
+    def negative(self) -> bool:
+        """Whether the lookup failed, either in the catalog or when loading the class"""
+        return self.fallback or self.resolution.match == MATCH_NONE
+
+
+class ResolutionCache:
+    """
+    LRU cache of node resolutions keyed by the requested triple
+
+    Failed lookups are cached like successful ones, so a misspelled type
+    repeated across components and requests is searched for (and reported)
+    only once.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Initialize cache
+
+        Args:
+            max_entries: Maximum number of cached triples (0 disables caching)
+        """
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[ResolutionKey, CachedResolution]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: ResolutionKey) -> Optional[CachedResolution]:
+        """Look up a triple, marking it as recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: ResolutionKey, entry: CachedResolution) -> None:
+        """Store the outcome for a triple, evicting the least recently used if full"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all entries and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache size, failed lookups held and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'negative_entries': sum(1 for entry in self._entries.values() if entry.negative),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,112 @@
+"""Specification validation domain service"""
+from typing import Dict, List, Optional
+
+from src.domain.value_objects.diagram_specification import DiagramSpecification
+from src.domain.value_objects.validation_issue import (
+    ValidationIssue,
+    SEVERITY_ERROR,
+    SEVERITY_WARNING,
+    DUPLICATE_COMPONENT_ID,
+    UNKNOWN_CONNECTION_ENDPOINT,
+    UNKNOWN_CLUSTER_MEMBER,
+    COMPONENT_IN_SEVERAL_CLUSTERS,
+    UNKNOWN_NODE_TYPE
+)
+
+
+class SpecificationValidator:
+    """
+    Finds every problem in a specification before it is rendered
+
+    Builders skip connections and cluster members that name no component,
+    so without this check a broken spec renders silently incomplete. The
+    check is one pass over components, connections and cluster members,
+    with a catalog lookup of each node type. Misspelled types are only
+    reported here; the resolve stage picks the closest catalog name.
+    """
+
+    def __init__(self, node_resolver: Optional['NodeResolver'] = None, strict_node_types: bool = False):
+        """
+        Initialize validator
+
+        Args:
+            node_resolver: Resolver used to find node types the catalog does
+                          not list; None to skip that check
+            strict_node_types: Reject node types the catalog does not list
+                              instead of warning about them
+        """
+        self.node_resolver = node_resolver
+        self.strict_node_types = strict_node_types
+
+    def validate(self, spec: DiagramSpecification) -> List[ValidationIssue]:
+        """
+        Check a specification
+
+        Args:
+            spec: Specification to check
+
+        Returns:
+            Every issue found, in specification order; empty if there are none
+        """
+        issues: List[ValidationIssue] = []
+        first_index: Dict[str, int] = {}
+        type_severity = SEVERITY_ERROR if self.strict_node_types else SEVERITY_WARNING
+
+        for index, component in enumerate(spec.components):
+            if component.id in first_index:
+                issues.append(ValidationIssue(
+                    DUPLICATE_COMPONENT_ID,
+                    f"Component id '{component.id}' is already used by components[{first_index[component.id]}]",
+                    f"components[{index}].id"
+                ))
+                continue
+            first_index[component.id] = index
+
+            if self.node_resolver is not None:
+                provider = component.component_provider or spec.provider
+                if not self.node_resolver.is_listed(provider, component.category, component.type):
+                    issues.append(ValidationIssue(
+                        UNKNOWN_NODE_TYPE,
+                        f"Node type '{component.type}' is not in the {provider} catalog"
+                        + ("" if self.strict_node_types else
+                           "; the closest name is used, or a generic node if none is close"),
+                        f"components[{index}].type",
+                        type_severity
+                    ))
+
+        for index, connection in enumerate(spec.connections):
+            for end, component_id in (('from', connection.from_id), ('to', connection.to_id)):
+                if component_id not in first_index:
+                    issues.append(ValidationIssue(
+                        UNKNOWN_CONNECTION_ENDPOINT,
+                        f"Connection {end} '{component_id}' names no component",
+                        f"connections[{index}].{end}"
+                    ))
+
+        cluster_of: Dict[str, str] = {}
+        for index, cluster in enumerate(spec.clusters):
+            for member_index, component_id in enumerate(cluster.component_ids):
+                location = f"clusters[{index}].components[{member_index}]"
+                if component_id not in first_index:
+                    issues.append(ValidationIssue(
+                        UNKNOWN_CLUSTER_MEMBER,
+                        f"Cluster '{cluster.name}' lists '{component_id}', which names no component",
+                        location
+                    ))
+                elif component_id in cluster_of and cluster_of[component_id] != cluster.name:
+                    issues.append(ValidationIssue(
+                        COMPONENT_IN_SEVERAL_CLUSTERS,
+                        f"Component '{component_id}' is already in cluster "
+                        f"'{cluster_of[component_id]}' and is drawn there only",
+                        location,
+                        SEVERITY_WARNING
+                    ))
+                else:
+                    cluster_of[component_id] = cluster.name
+
+        return issues
+
+    @staticmethod
+    def has_errors(issues: List[ValidationIssue]) -> bool:
+        """Whether any issue rejects the specification"""
+        return any(issue.is_error for issue in issues)
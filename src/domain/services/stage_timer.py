@@ -0,0 +1,107 @@
+"""Per-request timing of render pipeline stages"""
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, ContextManager, Dict, Iterator, Optional
+
+# Stage names, in pipeline order
+STAGE_PARSE = 'parse'
+STAGE_VALIDATE = 'validate'
+STAGE_RESOLVE = 'resolve'
+STAGE_QUEUE_WAIT = 'queue_wait'
+STAGE_SHARED_WAIT = 'shared_wait'
+STAGE_RENDER = 'render'
+STAGE_GRAPHVIZ = 'graphviz'
+STAGE_OPTIMIZE = 'optimize'
+STAGE_BASE64 = 'base64'
+
+
+class StageTimer:
+    """
+    Durations and output sizes of the stages of one request
+
+    Stages may nest (graphviz runs inside render) and may repeat, in which
+    case their durations add up. Code deep in the pipeline reaches the
+    request's timer through current_timer() instead of a parameter.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        """Start timing a request"""
+        self.stages_ms: Dict[str, float] = {}
+        self.bytes: Dict[str, int] = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the body of a with block as a stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float) -> None:
+        """Add a duration measured elsewhere to a stage"""
+        self.stages_ms[name] = self.stages_ms.get(name, 0.0) + seconds * 1000
+
+    def add_bytes(self, name: str, size: int) -> None:
+        """Record how many bytes a stage produced"""
+        self.bytes[name] = self.bytes.get(name, 0) + size
+
+    def elapsed_ms(self) -> float:
+        """Time since the request started"""
+        return (time.perf_counter() - self._start) * 1000
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        """Convert to dictionary"""
+        return {
+            'total_ms': round(self.elapsed_ms(), 3),
+            'stages_ms': {name: round(ms, 3) for name, ms in self.stages_ms.items()},
+            'bytes': dict(self.bytes)
+        }
+
+
+class _NullStageTimer(StageTimer):
+    """Timer used when metrics are off; every method does nothing"""
+
+    enabled = False
+
+    def __init__(self):
+        self._context = nullcontext()
+
+    def stage(self, name: str) -> ContextManager[None]:
+        return self._context
+
+    def add(self, name: str, seconds: float) -> None:
+        pass
+
+    def add_bytes(self, name: str, size: int) -> None:
+        pass
+
+    def elapsed_ms(self) -> float:
+        return 0.0
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return None
+
+
+NULL_TIMER: StageTimer = _NullStageTimer()
+
+_current_timer: ContextVar[StageTimer] = ContextVar('diagram_stage_timer', default=NULL_TIMER)
+
+
+def current_timer() -> StageTimer:
+    """Timer of the request being handled in this context, NULL_TIMER if none"""
+    return _current_timer.get()
+
+
+@contextmanager
+def use_timer(timer: StageTimer) -> Iterator[StageTimer]:
+    """Make a timer the current one for the body of a with block"""
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
@@ -1,6 +1,16 @@
 """Diagram generation result value object"""
-from dataclasses import dataclass
-from typing import Optional
+import base64
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from src.domain.services.stage_timer import NULL_TIMER, STAGE_BASE64, STAGE_OPTIMIZE, StageTimer
+from src.domain.value_objects.lazy_image import LazyImage
+
+# How a result dictionary carries the image
+IMAGE_FORMAT_PATH = 'path'        # file path only, no image data
+IMAGE_FORMAT_BYTES = 'bytes'      # optimized image bytes in 'image_bytes'
+IMAGE_FORMAT_BASE64 = 'base64'    # optimized image as base64 in 'image_base64'
+IMAGE_FORMATS = (IMAGE_FORMAT_PATH, IMAGE_FORMAT_BYTES, IMAGE_FORMAT_BASE64)
 
 
 @dataclass(frozen=True)
@@ -14,18 +24,39 @@ class DiagramResult:
     components_count: Optional[int] = None
     connections_count: Optional[int] = None
     provider: Optional[str] = None
+    diagram_id: Optional[str] = None
     error: Optional[str] = None
+    cached: bool = False
+    # Produced by an identical render that was already running, see SingleFlight
+    shared: bool = False
+    # Refused because too many renders were waiting; the request can be retried
+    busy: bool = False
+    # Path of every rendered output format, by format
+    output_files: Optional[Dict[str, str]] = None
+    # Components whose node type was found elsewhere in the catalog, see NodeResolution
+    corrections: Optional[List[Dict[str, str]]] = None
+    # Problems found in the specification, see ValidationIssue
+    issues: Optional[List[Dict[str, str]]] = None
+    # Lazily optimized image; when set, image data is produced by to_dict on demand
+    image: Optional[LazyImage] = field(default=None, compare=False, repr=False)
+    # Stage timings of the request, when metrics are on; to_dict adds its image work
+    timer: Optional[StageTimer] = field(default=None, compare=False, repr=False)
     
     @classmethod
     def success_result(
         cls,
         title: str,
         file_path: str,
-        image_base64: str,
-        image_size_mb: float,
         components_count: int,
         connections_count: int,
-        provider: str
+        provider: str,
+        image_base64: Optional[str] = None,
+        image_size_mb: Optional[float] = None,
+        diagram_id: Optional[str] = None,
+        image: Optional[LazyImage] = None,
+        output_files: Optional[Dict[str, str]] = None,
+        corrections: Optional[List[Dict[str, str]]] = None,
+        issues: Optional[List[Dict[str, str]]] = None
     ) -> 'DiagramResult':
         """Create a successful result"""
         return cls(
@@ -36,25 +67,84 @@ class DiagramResult:
             image_size_mb=image_size_mb,
             components_count=components_count,
             connections_count=connections_count,
-            provider=provider.upper()
+            provider=provider.upper(),
+            diagram_id=diagram_id,
+            image=image,
+            output_files=output_files,
+            corrections=corrections,
+            issues=issues
         )
     
     @classmethod
-    def failure_result(cls, error: str) -> 'DiagramResult':
+    def failure_result(
+        cls,
+        error: str,
+        issues: Optional[List[Dict[str, str]]] = None
+    ) -> 'DiagramResult':
         """Create a failure result"""
-        return cls(success=False, error=error)
+        return cls(success=False, error=error, issues=issues)
     
-    def to_dict(self) -> dict:
-        """Convert to dictionary"""
-        return {
+    @classmethod
+    def busy_result(cls, error: str) -> 'DiagramResult':
+        """Create a result for a render refused under load"""
+        return cls(success=False, error=error, busy=True)
+    
+    def to_dict(self, image_format: str = IMAGE_FORMAT_BASE64) -> dict:
+        """
+        Convert to dictionary
+        
+        Args:
+            image_format: IMAGE_FORMAT_PATH, IMAGE_FORMAT_BYTES or IMAGE_FORMAT_BASE64.
+                         The image is only optimized when its data is included.
+        
+        Returns:
+            Result dictionary
+        """
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unknown image format: {image_format}")
+        
+        timer = self.timer or NULL_TIMER
+        image_base64 = self.image_base64
+        image_size_mb = self.image_size_mb
+        image_bytes = None
+        if self.image is not None:
+            if image_format == IMAGE_FORMAT_PATH:
+                image_size_mb = self.image.get_file_size_mb()
+            else:
+                with timer.stage(STAGE_OPTIMIZE):
+                    encoded = self.image.get_encoded()
+                timer.add_bytes(STAGE_OPTIMIZE, len(encoded.data))
+                image_size_mb = self.image.get_size_mb()
+            image_base64 = None
+            if image_format == IMAGE_FORMAT_BASE64:
+                with timer.stage(STAGE_BASE64):
+                    image_base64 = self.image.get_base64()
+                timer.add_bytes(STAGE_BASE64, len(image_base64))
+            if image_format == IMAGE_FORMAT_BYTES:
+                image_bytes = self.image.get_bytes()
+        elif image_format == IMAGE_FORMAT_BYTES and image_base64 is not None:
+            image_bytes = base64.b64decode(image_base64)
+        
+        result = {
             'success': self.success,
             'title': self.title,
             'file_path': self.file_path,
-            'image_base64': self.image_base64,
-            'image_size_mb': self.image_size_mb,
+            'image_base64': image_base64 if image_format == IMAGE_FORMAT_BASE64 else None,
+            'image_size_mb': image_size_mb,
             'components_count': self.components_count,
             'connections_count': self.connections_count,
             'provider': self.provider,
-            'error': self.error
+            'diagram_id': self.diagram_id,
+            'error': self.error,
+            'cached': self.cached,
+            'shared': self.shared,
+            'busy': self.busy,
+            'output_files': dict(self.output_files) if self.output_files else None,
+            'corrections': [dict(c) for c in self.corrections] if self.corrections else None,
+            'issues': [dict(i) for i in self.issues] if self.issues else None,
+            'image_stats': self.image.get_stats() if self.image is not None else None,
+            'timings': timer.to_dict()
         }
-
+        if image_format == IMAGE_FORMAT_BYTES:
+            result['image_bytes'] = image_bytes
+        return result
@@ -2,8 +2,11 @@
 from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional
 
+# Output formats a diagram can be rendered to; PNG is always produced
+OUTPUT_FORMATS = ("png", "svg", "pdf", "dot")
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class Component:
     """Represents a diagram component"""
     id: str
@@ -17,7 +20,7 @@ class Component:
         return self.label or self.id
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Connection:
     """Represents a connection between components"""
     from_id: str
@@ -27,22 +30,44 @@ class Connection:
     style: Optional[str] = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ComponentCluster:
     """Represents a logical grouping of components"""
     name: str
     component_ids: List[str] = field(default_factory=list)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DiagramSpecification:
-    """Complete specification for diagram generation"""
+    """
+    Complete specification for diagram generation
+    
+    Components are indexed by id and by cluster when the specification is
+    created, so lookups do not scan the component list. Like the other value
+    objects it must not be modified after creation; use dataclasses.replace.
+    """
     title: str
     provider: str = "aws"
     layout: str = "vertical"
     components: List[Component] = field(default_factory=list)
     connections: List[Connection] = field(default_factory=list)
     clusters: List[ComponentCluster] = field(default_factory=list)
+    output_formats: List[str] = field(default_factory=lambda: ["png"])
+    # Lookup indexes, built once per specification in __post_init__
+    _components_by_id: Dict[str, Component] = field(init=False, repr=False, compare=False)
+    _clusters_by_component: Dict[str, ComponentCluster] = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        """Index components by id and by cluster, keeping the first of any duplicates"""
+        components_by_id: Dict[str, Component] = {}
+        for component in self.components:
+            components_by_id.setdefault(component.id, component)
+        clusters_by_component: Dict[str, ComponentCluster] = {}
+        for cluster in self.clusters:
+            for comp_id in cluster.component_ids:
+                clusters_by_component.setdefault(comp_id, cluster)
+        object.__setattr__(self, '_components_by_id', components_by_id)
+        object.__setattr__(self, '_clusters_by_component', clusters_by_component)
     
     @classmethod
     def from_dict(cls, spec: Dict[str, Any]) -> 'DiagramSpecification':
@@ -77,28 +102,75 @@ class DiagramSpecification:
             for cl in spec.get('clusters', [])
         ]
         
+        output_formats = ["png"]
+        for fmt in spec.get('output_formats', []):
+            fmt = fmt.lower()
+            if fmt not in OUTPUT_FORMATS:
+                raise ValueError(
+                    f"Unsupported output format: {fmt}. Use one of: {', '.join(OUTPUT_FORMATS)}"
+                )
+            if fmt not in output_formats:
+                output_formats.append(fmt)
+        
         return cls(
             title=spec.get('title', 'Diagram'),
             provider=spec.get('provider', 'aws').lower(),
             layout=spec.get('layout', 'vertical'),
             components=components,
             connections=connections,
-            clusters=clusters
+            clusters=clusters,
+            output_formats=output_formats
         )
     
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert back to the dictionary format accepted by from_dict"""
+        return {
+            'title': self.title,
+            'provider': self.provider,
+            'layout': self.layout,
+            'components': [
+                {
+                    'id': c.id,
+                    'type': c.type,
+                    'category': c.category,
+                    'label': c.label,
+                    'component_provider': c.component_provider
+                }
+                for c in self.components
+            ],
+            'connections': [
+                {
+                    'from': c.from_id,
+                    'to': c.to_id,
+                    'label': c.label,
+                    'color': c.color,
+                    'style': c.style
+                }
+                for c in self.connections
+            ],
+            'clusters': [
+                {
+                    'name': cl.name,
+                    'components': list(cl.component_ids)
+                }
+                for cl in self.clusters
+            ],
+            'output_formats': list(self.output_formats)
+        }
+    
     def get_direction(self) -> str:
         """Get graph direction based on layout"""
         return "TB" if self.layout == "vertical" else "LR"
     
     def get_unclustered_components(self) -> List[Component]:
         """Get components not in any cluster"""
-        clustered_ids = set()
-        for cluster in self.clusters:
-            clustered_ids.update(cluster.component_ids)
-        
-        return [c for c in self.components if c.id not in clustered_ids]
+        return [c for c in self.components if c.id not in self._clusters_by_component]
     
     def get_component_by_id(self, component_id: str) -> Optional[Component]:
         """Find component by ID"""
-        return next((c for c in self.components if c.id == component_id), None)
+        return self._components_by_id.get(component_id)
+    
+    def get_component_cluster(self, component_id: str) -> Optional[ComponentCluster]:
+        """Find the cluster a component belongs to, the first one if it is listed in several"""
+        return self._clusters_by_component.get(component_id)
 
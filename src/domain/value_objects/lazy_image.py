@@ -0,0 +1,87 @@
+"""Lazily optimized diagram image"""
+import base64
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+
+@dataclass(frozen=True)
+class EncodedImage:
+    """Optimized image bytes and how they were produced"""
+    data: bytes
+    original_bytes: int
+    encode_ms: float
+    encoding: str
+
+    @property
+    def savings_percent(self) -> float:
+        """Size reduction relative to the original file"""
+        if not self.original_bytes:
+            return 0.0
+        return round(100 * (1 - len(self.data) / self.original_bytes), 1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get encoding statistics, without the image data"""
+        return {
+            'encoding': self.encoding,
+            'encode_ms': self.encode_ms,
+            'original_bytes': self.original_bytes,
+            'encoded_bytes': len(self.data),
+            'savings_percent': self.savings_percent
+        }
+
+
+class LazyImage:
+    """
+    Handle to a rendered image file
+
+    The optimized image bytes are only produced the first time they are
+    asked for, then kept, so callers that only need the file path never pay
+    for decoding, resizing and re-encoding the image.
+    """
+
+    def __init__(self, path: str, encode: Callable[[str], EncodedImage]):
+        """
+        Initialize handle
+
+        Args:
+            path: Path to the rendered image file
+            encode: Function turning the file into an optimized image
+        """
+        self.path = path
+        self._encode = encode
+        self._encoded: Optional[EncodedImage] = None
+        self._lock = threading.Lock()
+
+    def get_encoded(self) -> EncodedImage:
+        """Get the optimized image, optimizing on first use"""
+        if self._encoded is None:
+            with self._lock:
+                if self._encoded is None:
+                    self._encoded = self._encode(self.path)
+        return self._encoded
+
+    def get_bytes(self) -> bytes:
+        """Get the optimized image bytes"""
+        return self.get_encoded().data
+
+    def get_base64(self) -> str:
+        """Get the optimized image as a base64 string"""
+        return base64.b64encode(self.get_bytes()).decode('utf-8')
+
+    def get_size_mb(self) -> float:
+        """Get the size of the optimized image in MB"""
+        return round(len(self.get_bytes()) / 1024 / 1024, 2)
+
+    def get_file_size_mb(self) -> float:
+        """Get the size of the rendered file in MB, without optimizing it"""
+        return round(os.path.getsize(self.path) / 1024 / 1024, 2)
+
+    def get_stats(self) -> Optional[Dict[str, Any]]:
+        """Get encoding statistics, or None if the image has not been optimized"""
+        return self._encoded.get_stats() if self._encoded is not None else None
+
+    def is_loaded(self) -> bool:
+        """Check whether the optimized bytes have been produced"""
+        return self._encoded is not None
@@ -0,0 +1,35 @@
+"""Node resolution value object"""
+from dataclasses import dataclass
+from typing import Dict
+
+# How a requested node type was found in the catalog
+MATCH_EXACT = 'exact'            # listed under the requested provider and category
+MATCH_RELOCATED = 'relocated'    # same name, listed under another category or provider
+MATCH_ALIAS = 'alias'            # synonym or class alias of a catalog name
+MATCH_FUZZY = 'fuzzy'            # closest similar name
+MATCH_NONE = 'none'              # not found, rendered as Generic
+
+
+@dataclass(frozen=True)
+class NodeResolution:
+    """Catalog location a requested node type resolved to"""
+    requested_provider: str
+    requested_category: str
+    requested_type: str
+    provider: str
+    category: str
+    node_type: str
+    match: str = MATCH_EXACT
+
+    @property
+    def corrected(self) -> bool:
+        """Whether the node was found somewhere other than where it was asked for"""
+        return self.match in (MATCH_RELOCATED, MATCH_ALIAS, MATCH_FUZZY)
+
+    def to_dict(self) -> Dict[str, str]:
+        """Describe the correction as requested and resolved provider/category/type paths"""
+        return {
+            'from': f"{self.requested_provider}/{self.requested_category}/{self.requested_type}",
+            'to': f"{self.provider}/{self.category}/{self.node_type}",
+            'match': self.match
+        }
@@ -0,0 +1,141 @@
+"""Diagram specification delta value object"""
+from dataclasses import dataclass, field, replace
+from typing import List, Dict, Any, Optional, Tuple
+
+from src.domain.value_objects.diagram_specification import (
+    DiagramSpecification,
+    Component,
+    Connection,
+    ComponentCluster
+)
+
+
+@dataclass(frozen=True)
+class SpecificationDelta:
+    """
+    Changes to apply to a previously rendered specification
+
+    Removals are applied before additions. Removing a component also removes
+    its connections and cluster memberships; removing a cluster leaves its
+    components in the diagram, unclustered. Adding a component with an
+    existing id replaces it, and adding a cluster with an existing name adds
+    the listed components to it.
+    """
+    add_components: List[Component] = field(default_factory=list)
+    remove_components: List[str] = field(default_factory=list)
+    add_connections: List[Connection] = field(default_factory=list)
+    remove_connections: List[Tuple[str, str]] = field(default_factory=list)
+    add_clusters: List[ComponentCluster] = field(default_factory=list)
+    remove_clusters: List[str] = field(default_factory=list)
+    # Cluster each added component joins, by component id
+    component_clusters: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, delta: Dict[str, Any]) -> 'SpecificationDelta':
+        """
+        Create delta from dictionary
+
+        Components, connections and clusters use the same format as in a
+        specification. Added components may name a "cluster" to join;
+        removed connections are given by their "from" and "to" ids.
+        """
+        spec = DiagramSpecification.from_dict({
+            'components': delta.get('add_components', []),
+            'connections': delta.get('add_connections', []),
+            'clusters': delta.get('add_clusters', [])
+        })
+
+        return cls(
+            add_components=spec.components,
+            remove_components=list(delta.get('remove_components', [])),
+            add_connections=spec.connections,
+            remove_connections=[
+                (c['from'], c['to']) for c in delta.get('remove_connections', [])
+            ],
+            add_clusters=spec.clusters,
+            remove_clusters=list(delta.get('remove_clusters', [])),
+            component_clusters={
+                c['id']: c['cluster']
+                for c in delta.get('add_components', [])
+                if c.get('cluster')
+            }
+        )
+
+    def apply_to(self, spec: DiagramSpecification) -> DiagramSpecification:
+        """
+        Apply the changes to a specification
+
+        Args:
+            spec: Specification to change
+
+        Returns:
+            New specification; the original is left untouched
+        """
+        removed_ids = set(self.remove_components)
+        removed_connections = set(self.remove_connections)
+        removed_clusters = set(self.remove_clusters)
+
+        # Components: drop removed ones, replace re-added ones in place
+        added = {c.id: c for c in self.add_components}
+        components = [
+            added.pop(c.id, c) for c in spec.components if c.id not in removed_ids
+        ]
+        components.extend(c for c in self.add_components if c.id in added)
+
+        # Connections
+        connections = [
+            c for c in spec.connections
+            if c.from_id not in removed_ids
+            and c.to_id not in removed_ids
+            and (c.from_id, c.to_id) not in removed_connections
+        ]
+        connections.extend(self.add_connections)
+
+        # Clusters: a component belongs to at most one cluster
+        memberships = dict(self.component_clusters)
+        for cluster in self.add_clusters:
+            memberships.update((comp_id, cluster.name) for comp_id in cluster.component_ids)
+
+        clusters: List[ComponentCluster] = []
+        for cluster in spec.clusters + self.add_clusters:
+            if cluster.name in removed_clusters:
+                continue
+            existing = self._find_cluster(clusters, cluster.name)
+            member_ids = [
+                comp_id for comp_id in cluster.component_ids
+                if comp_id not in removed_ids
+                and memberships.get(comp_id, cluster.name) == cluster.name
+            ]
+            if existing is None:
+                clusters.append(replace(cluster, component_ids=member_ids))
+            else:
+                clusters[clusters.index(existing)] = replace(
+                    existing,
+                    component_ids=existing.component_ids + [
+                        comp_id for comp_id in member_ids if comp_id not in existing.component_ids
+                    ]
+                )
+
+        for comp_id, cluster_name in self.component_clusters.items():
+            cluster = self._find_cluster(clusters, cluster_name)
+            if cluster is None:
+                clusters.append(ComponentCluster(name=cluster_name, component_ids=[comp_id]))
+            elif comp_id not in cluster.component_ids:
+                clusters[clusters.index(cluster)] = replace(
+                    cluster, component_ids=cluster.component_ids + [comp_id]
+                )
+
+        return replace(
+            spec,
+            components=components,
+            connections=connections,
+            clusters=clusters
+        )
+
+    @staticmethod
+    def _find_cluster(
+        clusters: List[ComponentCluster],
+        name: str
+    ) -> Optional[ComponentCluster]:
+        """Find a cluster by name"""
+        return next((cl for cl in clusters if cl.name == name), None)
@@ -0,0 +1,38 @@
+"""Specification validation issue value object"""
+from dataclasses import dataclass
+from typing import Dict
+
+# Errors reject the specification; warnings are reported with the diagram
+SEVERITY_ERROR = 'error'
+SEVERITY_WARNING = 'warning'
+
+# Issue codes
+DUPLICATE_COMPONENT_ID = 'duplicate_component_id'
+UNKNOWN_CONNECTION_ENDPOINT = 'unknown_connection_endpoint'
+UNKNOWN_CLUSTER_MEMBER = 'unknown_cluster_member'
+COMPONENT_IN_SEVERAL_CLUSTERS = 'component_in_several_clusters'
+UNKNOWN_NODE_TYPE = 'unknown_node_type'
+
+
+@dataclass(frozen=True, slots=True)
+class ValidationIssue:
+    """One problem found in a diagram specification"""
+    code: str
+    message: str
+    # Where in the specification, e.g. "connections[2].to"
+    location: str
+    severity: str = SEVERITY_ERROR
+
+    @property
+    def is_error(self) -> bool:
+        """Whether the issue rejects the specification"""
+        return self.severity == SEVERITY_ERROR
+
+    def to_dict(self) -> Dict[str, str]:
+        """Convert to dictionary"""
+        return {
+            'code': self.code,
+            'severity': self.severity,
+            'location': self.location,
+            'message': self.message
+        }
@@ -0,0 +1,217 @@
+"""Provider catalog generated from the installed diagrams package"""
+import importlib
+import inspect
+import json
+import os
+import pkgutil
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.infrastructure.adapters.compiled_catalog import get_diagrams_version
+from src.infrastructure.adapters.node_alias_index import ALIASES_FILE_NAME
+
+# Subpackages of diagrams that hold shared base classes, not provider nodes
+NON_PROVIDER_PACKAGES = {"base"}
+
+
+def get_default_catalog_dir() -> Path:
+    """Generated catalog location, from DIAGRAM_CATALOG_DIR or the user cache directory"""
+    env_path = os.getenv('DIAGRAM_CATALOG_DIR')
+    if env_path:
+        return Path(env_path)
+    return Path.home() / ".cache" / "diagram-ai-generator"
+
+
+def scan_category_module(module_name: str) -> List[str]:
+    """
+    List the node classes of a diagrams category module
+
+    Args:
+        module_name: Module to import, e.g. "diagrams.aws.database"
+
+    Returns:
+        Public node class names in definition order, then the module-level
+        aliases of those classes (e.g. ElastiCache for Elasticache)
+    """
+    classes, aliases = scan_category_classes(module_name)
+    return classes + list(aliases)
+
+
+def scan_category_classes(module_name: str) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Find the node classes and class aliases of a diagrams category module
+
+    Args:
+        module_name: Module to import, e.g. "diagrams.aws.database"
+
+    Returns:
+        Public node class names in definition order, and the module-level
+        aliases with the class each one names (e.g. {"ElastiCache": "Elasticache"})
+    """
+    from diagrams import Node
+
+    module = importlib.import_module(module_name)
+    classes, aliases = [], {}
+    for name, value in vars(module).items():
+        if (name.startswith("_") or not inspect.isclass(value)
+                or not issubclass(value, Node) or value.__module__ != module_name):
+            continue
+        if name == value.__name__:
+            classes.append(name)
+        else:
+            aliases[name] = value.__name__
+    return classes, aliases
+
+
+class CatalogGenerator:
+    """
+    Builds diagrams_structure.json from the installed diagrams package
+
+    Every diagrams.<provider>.<category> module is scanned for node classes
+    and aliases. The result is written with a manifest recording the diagrams
+    version and a signature (size and modification time) of each module, so
+    a later run with the same version reuses the catalog without scanning,
+    and a run after an upgrade only imports the modules that changed. The
+    class aliases are also written on their own, to diagrams_aliases.json,
+    for node name resolution.
+    """
+
+    def __init__(self, output_dir: Optional[Path] = None):
+        """
+        Initialize generator
+
+        Args:
+            output_dir: Directory for the catalog and its manifest.
+                       If None, uses environment variable or default.
+        """
+        self.output_dir = Path(output_dir) if output_dir else get_default_catalog_dir()
+        self.catalog_path = self.output_dir / "diagrams_structure.json"
+        self.manifest_path = self.output_dir / "diagrams_structure.manifest.json"
+        self.aliases_path = self.output_dir / ALIASES_FILE_NAME
+
+    def ensure_catalog(self) -> Path:
+        """
+        Get the generated catalog, generating it if missing or outdated
+
+        Returns:
+            Path of the catalog JSON
+        """
+        manifest = self._read_manifest()
+        if (manifest.get('diagrams_version') != get_diagrams_version()
+                or not self.catalog_path.exists() or not self.aliases_path.exists()):
+            self.generate()
+        return self.catalog_path
+
+    def generate(self, force: bool = False) -> Dict[str, Any]:
+        """
+        Scan the installed diagrams package and write the catalog
+
+        Args:
+            force: Import every module, ignoring the signatures in the manifest
+
+        Returns:
+            Statistics: diagrams version, providers, nodes, modules scanned
+            and reused, and elapsed seconds
+        """
+        start = time.perf_counter()
+        previous = {} if force else self._read_manifest().get('modules', {})
+
+        catalog: Dict[str, Dict[str, List[str]]] = {}
+        aliases: Dict[str, Dict[str, Dict[str, str]]] = {}
+        modules: Dict[str, Dict[str, Any]] = {}
+        scanned = reused = 0
+        for provider, category, path in self._walk():
+            providers = catalog.setdefault(provider, {})
+            if category is None:
+                continue
+            module_name = f"diagrams.{provider}.{category}"
+            signature = self._signature(path)
+            cached = previous.get(module_name)
+            if (cached is not None and cached.get('signature') == signature
+                    and 'aliases' in cached):
+                classes, module_aliases = cached['nodes'], cached['aliases']
+                reused += 1
+            else:
+                classes, module_aliases = scan_category_classes(module_name)
+                scanned += 1
+            modules[module_name] = {'signature': signature, 'nodes': classes, 'aliases': module_aliases}
+            providers[category] = classes + list(module_aliases)
+            if module_aliases:
+                aliases.setdefault(provider, {})[category] = module_aliases
+
+        manifest = {'diagrams_version': get_diagrams_version(), 'modules': modules}
+        self._write_json(self.catalog_path, catalog)
+        self._write_json(self.aliases_path, aliases)
+        self._write_json(self.manifest_path, manifest)
+
+        return {
+            'diagrams_version': manifest['diagrams_version'],
+            'providers': len(catalog),
+            'nodes': sum(len(nodes) for categories in catalog.values() for nodes in categories.values()),
+            'modules_scanned': scanned,
+            'modules_reused': reused,
+            'seconds': round(time.perf_counter() - start, 3)
+        }
+
+    def _walk(self):
+        """
+        Yield (provider, category, module file) for every category module
+
+        Providers without category modules (c4, custom) are yielded once with
+        category and file None, so they still appear in the catalog.
+        """
+        import diagrams
+
+        for provider_info in sorted(pkgutil.iter_modules(diagrams.__path__), key=lambda m: m.name):
+            if not provider_info.ispkg or provider_info.name in NON_PROVIDER_PACKAGES:
+                continue
+            provider_path = Path(provider_info.module_finder.path) / provider_info.name
+            categories = [
+                info for info in pkgutil.iter_modules([str(provider_path)])
+                if not info.ispkg and not info.name.startswith("_")
+            ]
+            if not categories:
+                yield provider_info.name, None, None
+            for info in sorted(categories, key=lambda m: m.name):
+                yield provider_info.name, info.name, provider_path / f"{info.name}.py"
+
+    @staticmethod
+    def _signature(path: Optional[Path]) -> Optional[str]:
+        """Size and modification time of a module file"""
+        if path is None or not path.exists():
+            return None
+        stat = path.stat()
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        """Read the manifest of the last run, empty if there is none"""
+        try:
+            return json.loads(self.manifest_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _write_json(path: Path, data: Any) -> None:
+        """Write JSON atomically"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(data, indent=2), encoding='utf-8')
+        os.replace(tmp_path, path)
+
+
+def main() -> None:
+    """Generate the catalog: python -m src.infrastructure.adapters.catalog_generator [--force] [DIR]"""
+    args = [arg for arg in sys.argv[1:] if arg != "--force"]
+    generator = CatalogGenerator(Path(args[0]) if args else None)
+    stats = generator.generate(force="--force" in sys.argv[1:])
+    print(
+        f"Generated {stats['nodes']} nodes in {stats['providers']} providers for diagrams "
+        f"{stats['diagrams_version']} ({stats['modules_scanned']} modules scanned, "
+        f"{stats['modules_reused']} reused) in {stats['seconds']}s: {generator.catalog_path}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""Precompiled provider catalog with its lookup indexes"""
+import hashlib
+import json
+import marshal
+import os
+import struct
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from src.domain.services.node_matcher import MatchIndexes
+from src.infrastructure.adapters.node_alias_index import (
+    NodeAliasIndex,
+    get_alias_sources,
+    load_alias_index
+)
+from src.infrastructure.adapters.node_search_index import NodeSearchIndex
+
+# File layout: MAGIC, header length (uint32, little endian), JSON header,
+# payload. The payload is marshalled plain data (dicts, lists, tuples,
+# strings, bytes), which unlike a pickle cannot run code when loaded. Bump
+# FORMAT_VERSION whenever the payload layout changes.
+MAGIC = b"DAICAT\x00\x01"
+FORMAT_VERSION = 2
+_HEADER_LENGTH = struct.Struct("<I")
+
+_catalogs: Dict[Tuple[str, str], 'CompiledCatalog'] = {}
+_catalogs_lock = threading.Lock()
+
+
+class CompiledCatalog:
+    """Provider catalog together with the lookup indexes built from it"""
+
+    def __init__(
+        self,
+        data: Dict[str, Dict[str, Any]],
+        search_index: NodeSearchIndex,
+        match_indexes: MatchIndexes,
+        alias_index: NodeAliasIndex,
+        catalog_hash: str,
+        aliases_hash: str,
+        diagrams_version: str
+    ):
+        """
+        Initialize catalog
+
+        Args:
+            data: Node names by provider and category
+            search_index: Name search index built from data
+            match_indexes: Fuzzy matching indexes built from data
+            alias_index: Synonym and class alias index for data
+            catalog_hash: SHA-256 of the catalog JSON file
+            aliases_hash: SHA-256 of the files the alias index was built from
+            diagrams_version: Installed diagrams version the catalog was compiled for
+        """
+        self.data = data
+        self.search_index = search_index
+        self.match_indexes = match_indexes
+        self.alias_index = alias_index
+        self.catalog_hash = catalog_hash
+        self.aliases_hash = aliases_hash
+        self.diagrams_version = diagrams_version
+
+    @classmethod
+    def from_json(cls, json_bytes: bytes, json_path: Path) -> 'CompiledCatalog':
+        """
+        Parse a catalog JSON file and build its indexes
+
+        Args:
+            json_bytes: Content of the catalog JSON file
+            json_path: Catalog JSON file, to find its class aliases
+        """
+        data = json.loads(json_bytes)
+        return cls(
+            data,
+            NodeSearchIndex(data),
+            MatchIndexes.build(data),
+            load_alias_index(json_path, data),
+            get_catalog_hash(json_bytes),
+            get_aliases_hash(json_path),
+            get_diagrams_version()
+        )
+
+    @classmethod
+    def empty(cls) -> 'CompiledCatalog':
+        """Catalog without providers, used when the catalog cannot be loaded"""
+        return cls({}, NodeSearchIndex({}), MatchIndexes({}), NodeAliasIndex({}, {}, {}), '', '', '')
+
+    def header(self) -> Dict[str, Any]:
+        """Values a compiled file must match to be reused"""
+        return {
+            'format': FORMAT_VERSION,
+            'catalog_hash': self.catalog_hash,
+            'aliases_hash': self.aliases_hash,
+            'diagrams_version': self.diagrams_version
+        }
+
+    def write(self, path: Path) -> None:
+        """
+        Write the compiled catalog
+
+        The file is written next to its destination and moved into place, so
+        processes loading it concurrently never see a partial file.
+        """
+        header = json.dumps(self.header()).encode('utf-8')
+        payload = marshal.dumps({
+            'data': self.data,
+            'search_index': self.search_index.to_state(),
+            'match_indexes': self.match_indexes.to_state(),
+            'alias_index': self.alias_index.to_state()
+        })
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(MAGIC + _HEADER_LENGTH.pack(len(header)) + header + payload)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def read(cls, path: Path, expected: Dict[str, Any]) -> Optional['CompiledCatalog']:
+        """
+        Load a compiled catalog
+
+        The payload is loaded into a private copy, so this speeds up start-up
+        but does not share memory between processes.
+
+        Args:
+            path: Compiled catalog file
+            expected: Header the file must carry, see header()
+
+        Returns:
+            Catalog, or None if the file is missing, damaged or stale
+        """
+        try:
+            content = Path(path).read_bytes()
+            if content[:len(MAGIC)] != MAGIC:
+                return None
+            start = len(MAGIC) + _HEADER_LENGTH.size
+            (header_length,) = _HEADER_LENGTH.unpack(content[len(MAGIC):start])
+            header = json.loads(content[start:start + header_length])
+            if header != expected:
+                return None
+            payload = marshal.loads(memoryview(content)[start + header_length:])
+            return cls(
+                payload['data'],
+                NodeSearchIndex.from_state(payload['search_index']),
+                MatchIndexes.from_state(payload['match_indexes']),
+                NodeAliasIndex.from_state(payload['alias_index']),
+                expected['catalog_hash'],
+                expected['aliases_hash'],
+                expected['diagrams_version']
+            )
+        except (OSError, ValueError, EOFError, struct.error, TypeError, KeyError, AttributeError):
+            # A payload not shaped like the current format is rebuilt like a stale one
+            return None
+
+
+def get_catalog_hash(json_bytes: bytes) -> str:
+    """Hex SHA-256 of a catalog JSON file"""
+    return hashlib.sha256(json_bytes).hexdigest()
+
+
+def get_aliases_hash(json_path: Path) -> str:
+    """Hex SHA-256 of the class aliases and synonyms files of a catalog, see get_alias_sources"""
+    digest = hashlib.sha256()
+    for path in get_alias_sources(json_path):
+        try:
+            content = Path(path).read_bytes()
+        except OSError:
+            content = b''
+        digest.update(_HEADER_LENGTH.pack(len(content)) + content)
+    return digest.hexdigest()
+
+
+def get_expected_header(json_path: Path, json_bytes: bytes) -> Dict[str, Any]:
+    """
+    Header a compiled file of a catalog must carry to be reused
+
+    Args:
+        json_path: Catalog JSON file
+        json_bytes: Its content
+    """
+    return {
+        'format': FORMAT_VERSION,
+        'catalog_hash': get_catalog_hash(json_bytes),
+        'aliases_hash': get_aliases_hash(json_path),
+        'diagrams_version': get_diagrams_version()
+    }
+
+
+def get_diagrams_version() -> str:
+    """Installed diagrams package version"""
+    from importlib import metadata
+
+    try:
+        return metadata.version('diagrams')
+    except metadata.PackageNotFoundError:
+        return 'unknown'
+
+
+def get_default_compiled_path() -> Path:
+    """Compiled catalog location, from DIAGRAM_CATALOG_PATH or the user cache directory"""
+    env_path = os.getenv('DIAGRAM_CATALOG_PATH')
+    if env_path:
+        return Path(env_path)
+    return Path.home() / ".cache" / "diagram-ai-generator" / "catalog.bin"
+
+
+def load_catalog(json_path: Path, compiled_path: Optional[Path] = None) -> CompiledCatalog:
+    """
+    Load a provider catalog and its indexes
+
+    Each catalog is loaded once per process and shared by every caller. The
+    compiled file is used when its catalog hash, alias files hash and diagrams
+    version match; otherwise the JSON is parsed, indexed and the compiled file
+    rewritten.
+    Compiled files are only read, never modified in place, so worker processes
+    can load the same file while another process rewrites it.
+
+    Args:
+        json_path: Catalog JSON file
+        compiled_path: Compiled catalog file, None to always parse the JSON
+
+    Returns:
+        Loaded catalog
+    """
+    json_bytes = Path(json_path).read_bytes()
+    expected = get_expected_header(json_path, json_bytes)
+    key = (str(Path(json_path).resolve()), expected['catalog_hash'] + expected['aliases_hash'])
+
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is not None:
+            return catalog
+
+        if compiled_path is not None:
+            catalog = CompiledCatalog.read(compiled_path, expected)
+
+        if catalog is None:
+            catalog = CompiledCatalog.from_json(json_bytes, json_path)
+            if compiled_path is not None:
+                try:
+                    catalog.write(compiled_path)
+                except OSError:
+                    # A read-only location only costs the faster start
+                    pass
+
+        _catalogs[key] = catalog
+        return catalog
+
+
+def main() -> None:
+    """Compile the bundled catalog: python -m src.infrastructure.adapters.compiled_catalog [OUTPUT]"""
+    from src.infrastructure.adapters.provider_repository import get_default_json_path
+
+    output = Path(sys.argv[1]) if len(sys.argv) > 1 else get_default_compiled_path()
+    json_path = get_default_json_path()
+    catalog = CompiledCatalog.from_json(json_path.read_bytes(), json_path)
+    catalog.write(output)
+    print(f"Compiled {len(catalog.search_index)} nodes for diagrams {catalog.diagrams_version} to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,102 @@
 """Diagram builder using diagrams library"""
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 
-from diagrams import Diagram, Cluster, Edge
+from diagrams import Diagram, Cluster, Edge, setdiagram
 
 from src.domain.value_objects.diagram_specification import DiagramSpecification, Component
 from src.domain.services.node_resolver import NodeResolver
+from src.domain.services.stage_timer import STAGE_GRAPHVIZ, current_timer
+from src.infrastructure.adapters.graphviz_renderer import GraphvizRenderer, create_graphviz_renderer
+from src.infrastructure.adapters.render_cache import RenderCache
+
+
+class RendererDiagram(Diagram):
+    """Diagram that renders through a GraphvizRenderer on exit, all formats from one layout"""
+    
+    def __init__(self, *args, renderer: GraphvizRenderer, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.renderer = renderer
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            formats = self.outformat if isinstance(self.outformat, list) else [self.outformat]
+            timer = current_timer()
+            with timer.stage(STAGE_GRAPHVIZ):
+                if len(formats) == 1:
+                    outputs = {formats[0]: self.renderer.render(self.dot.source, formats[0])}
+                else:
+                    outputs = self.renderer.render_many(self.dot.source, formats)
+            timer.add_bytes(STAGE_GRAPHVIZ, sum(len(output) for output in outputs.values()))
+            for fmt, output in outputs.items():
+                with open(f"{self.filename}.{fmt}", 'wb') as f:
+                    f.write(output)
+        setdiagram(None)
 
 
 class DiagramBuilder:
     """Builds diagrams using the diagrams library"""
     
-    def __init__(self, node_resolver: NodeResolver, output_dir: Path):
+    GRAPH_ATTR = {"dpi": "150", "size": "12,10", "bgcolor": "white"}
+    
+    def __init__(
+        self,
+        node_resolver: NodeResolver,
+        output_dir: Path,
+        renderer: Optional[GraphvizRenderer] = None,
+        output_size: Optional[Tuple[int, int]] = None
+    ):
         """
         Initialize diagram builder
         
         Args:
             node_resolver: Service to resolve node types
             output_dir: Directory for output files
+            renderer: Graphviz backend. If None, uses the configured default.
+            output_size: Maximum image width and height in pixels. Graphviz
+                        scales larger diagrams down to fit while rendering,
+                        so the image never needs resizing afterwards. If None,
+                        the default 12x10 inch bound is used.
         """
         self.node_resolver = node_resolver
         self.output_dir = output_dir
+        self.renderer = renderer or create_graphviz_renderer()
+        self.graph_attr = self._get_graph_attr(output_size)
     
-    def build(self, spec: DiagramSpecification) -> str:
+    def build(
+        self,
+        spec: DiagramSpecification,
+        previous: Optional[DiagramSpecification] = None,
+        digest: Optional[str] = None
+    ) -> str:
         """
         Build diagram from specification
         
         Args:
             spec: Diagram specification
+            previous: Specification this one was edited from. Unused: the
+                     diagrams library always lays the graph out from scratch.
+            digest: Render cache key of spec with these settings, if already
+                   known; computed otherwise
         
         Returns:
-            Path to generated PNG file
+            Path to generated PNG file. Other output formats of the spec are
+            written next to it, with the format as extension.
         """
         # Generate filename
-        filename = self._generate_filename(spec.title)
+        filename = self._generate_filename(spec, digest)
         output_path = str(self.output_dir / filename)
         
         # Create diagram
-        with Diagram(
+        with RendererDiagram(
             spec.title,
             filename=output_path,
             show=False,
             direction=spec.get_direction(),
-            graph_attr={"dpi": "150", "size": "12,10", "bgcolor": "white"}
+            graph_attr=dict(self.graph_attr),
+            outformat=list(spec.output_formats),
+            renderer=self.renderer
         ):
             # Build node map
             nodes = self._build_nodes(spec)
@@ -54,22 +107,41 @@ class DiagramBuilder:
         # Return path to PNG file
         return f"{output_path}.png"
     
-    def _generate_filename(self, title: str) -> str:
-        """Generate safe filename from title"""
+    def get_render_settings(self) -> Dict[str, Any]:
+        """Get the settings that affect the rendered image"""
+        return {"builder": type(self).__name__, "graph_attr": dict(self.graph_attr)}
+    
+    def _get_graph_attr(self, output_size: Optional[Tuple[int, int]]) -> Dict[str, str]:
+        """Get graph attributes, bounding the drawing to the output size"""
+        graph_attr = dict(self.GRAPH_ATTR)
+        if output_size:
+            # Graphviz size is in inches; at the configured dpi it bounds the pixels
+            dpi = float(graph_attr["dpi"])
+            width, height = output_size
+            graph_attr["size"] = f"{width / dpi:.4f},{height / dpi:.4f}"
+        return graph_attr
+    
+    def _generate_filename(self, spec: DiagramSpecification, digest: Optional[str] = None) -> str:
+        """
+        Generate safe filename from title, content and time
+        
+        The content digest keeps two different diagrams with the same title,
+        rendered within the same second, from overwriting each other's files
+        (which cached results point at). It is the render cache key, passed in
+        by the caller when it has one already.
+        """
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        safe_title = safe_title.replace(' ', '_')[:50]
-        return f"{safe_title}_{timestamp}" if safe_title else f"diagram_{timestamp}"
+        if digest is None:
+            digest = RenderCache.make_key(spec, self.get_render_settings())
+        digest = digest[:12]
+        safe_title = "".join(c for c in spec.title if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        safe_title = safe_title.replace(' ', '_')[:50] or "diagram"
+        return f"{safe_title}_{digest}_{timestamp}"
     
     def _build_nodes(self, spec: DiagramSpecification) -> Dict[str, Any]:
         """Build all diagram nodes"""
         nodes = {}
         
-        # Create cluster components map
-        cluster_component_ids = set()
-        for cluster in spec.clusters:
-            cluster_component_ids.update(cluster.component_ids)
-        
         # Create unclustered nodes
         for component in spec.get_unclustered_components():
             nodes[component.id] = self._create_node(component, spec.provider)
@@ -79,7 +151,7 @@ class DiagramBuilder:
             with Cluster(cluster.name):
                 for comp_id in cluster.component_ids:
                     component = spec.get_component_by_id(comp_id)
-                    if component:
+                    if component and component.id not in nodes:
                         nodes[component.id] = self._create_node(component, spec.provider)
         
         return nodes
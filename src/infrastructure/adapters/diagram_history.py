@@ -0,0 +1,47 @@
+"""Bounded store of rendered specifications by diagram id"""
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from src.domain.value_objects.diagram_specification import DiagramSpecification
+
+
+class DiagramHistory:
+    """
+    LRU store of the specifications behind recently rendered diagrams
+
+    Lets a later request refer to a diagram by id and send only what
+    changed, instead of the whole specification.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Initialize history
+
+        Args:
+            max_entries: Maximum number of specifications kept
+        """
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, DiagramSpecification]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, diagram_id: str) -> Optional[DiagramSpecification]:
+        """Look up the specification of a diagram"""
+        with self._lock:
+            spec = self._entries.get(diagram_id)
+            if spec is not None:
+                self._entries.move_to_end(diagram_id)
+            return spec
+
+    def put(self, diagram_id: str, spec: DiagramSpecification) -> None:
+        """Record a specification, evicting the least recently used one if full"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[diagram_id] = spec
+            self._entries.move_to_end(diagram_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
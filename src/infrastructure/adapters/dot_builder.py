@@ -0,0 +1,325 @@
+"""Diagram builder that emits DOT source directly"""
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from diagrams import Cluster, Diagram, Edge
+from graphviz.quoting import attr_list, quote
+
+from src.domain.services.node_resolver import NodeResolver
+from src.domain.services.stage_timer import STAGE_GRAPHVIZ, current_timer
+from src.domain.value_objects.diagram_specification import DiagramSpecification, Component
+from src.infrastructure.adapters.diagram_builder import DiagramBuilder
+from src.infrastructure.adapters.graphviz_renderer import GraphvizRenderer
+from src.infrastructure.adapters.incremental_layout import extend_layout
+from src.infrastructure.adapters.layout_cache import LayoutCache
+
+
+class DotBuilder(DiagramBuilder):
+    """
+    Builds diagrams by writing DOT source straight from the specification
+
+    Produces the same graph as DiagramBuilder (same default attributes,
+    node icons, cluster styling and edge attributes) in one linear pass,
+    without creating Diagram, Cluster, Node or Edge objects. Node names are
+    derived from component ids, so the output is deterministic.
+
+    Layouts are cached by graph topology: a spec that only changes labels,
+    colors or edge styles is rendered from the pinned positions of the
+    previous layout instead of running the dot layout again. A spec built as
+    an edit of a previous one starts from the previous layout, so the parts
+    of the diagram that did not change keep their positions.
+    """
+
+    # Background of top-level clusters (diagrams picks it by nesting depth)
+    CLUSTER_BGCOLOR = "#E5F5FD"
+
+    def __init__(
+        self,
+        node_resolver: NodeResolver,
+        output_dir: Path,
+        renderer: Optional[GraphvizRenderer] = None,
+        layout_cache: Optional[LayoutCache] = None,
+        output_size: Optional[Tuple[int, int]] = None
+    ):
+        """
+        Initialize DOT builder
+
+        Args:
+            node_resolver: Service to resolve node types
+            output_dir: Directory for output files
+            renderer: Graphviz backend. If None, uses the configured default.
+            layout_cache: Cache of layouts by topology. If None, one is sized
+                         from DIAGRAM_LAYOUT_CACHE_SIZE (0 disables it).
+            output_size: Maximum image width and height in pixels, see DiagramBuilder
+        """
+        super().__init__(node_resolver, output_dir, renderer, output_size)
+        if layout_cache is None:
+            layout_cache = LayoutCache(
+                max_entries=int(os.getenv("DIAGRAM_LAYOUT_CACHE_SIZE", "64"))
+            )
+        self.layout_cache = layout_cache
+
+    def build(
+        self,
+        spec: DiagramSpecification,
+        previous: Optional[DiagramSpecification] = None,
+        digest: Optional[str] = None
+    ) -> str:
+        """
+        Build diagram from specification
+
+        Args:
+            spec: Diagram specification
+            previous: Specification this one was edited from, whose layout
+                     is extended instead of laying out the graph from scratch
+            digest: Render cache key of spec with these settings, if already
+                   known; computed otherwise
+
+        Returns:
+            Path to generated PNG file. Other output formats of the spec are
+            written next to it, from the same layout.
+        """
+        output_path = self.output_dir / self._generate_filename(spec, digest)
+
+        for fmt, output in self._render(spec, previous).items():
+            with open(f"{output_path}.{fmt}", 'wb') as f:
+                f.write(output)
+
+        return f"{output_path}.png"
+
+    def to_dot(self, spec: DiagramSpecification, layout: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Generate DOT source for a specification
+
+        Args:
+            spec: Diagram specification
+            layout: Optional layout from compute_layout whose positions are
+                   written into the source, for rendering with the nop2 engine
+
+        Returns:
+            DOT source text
+        """
+        return self._emit(spec, layout)[0]
+
+    def topology_key(self, spec: DiagramSpecification) -> str:
+        """
+        Get the hash of everything in a spec that affects the layout
+
+        Args:
+            spec: Diagram specification
+
+        Returns:
+            Layout cache key
+        """
+        return LayoutCache.make_key(self._emit(spec)[1])
+
+    def compute_layout(self, spec: DiagramSpecification) -> Dict[str, Any]:
+        """
+        Run the dot layout and extract positions
+
+        Args:
+            spec: Diagram specification
+
+        Returns:
+            Layout with graph/cluster boxes, node positions and edge splines
+        """
+        # Icons don't change the geometry of fixed-size nodes; leave them out
+        source = self._emit(spec, include_images=False)[0]
+        with current_timer().stage(STAGE_GRAPHVIZ):
+            output = self.renderer.render(source, 'json')
+        return self._parse_layout(output)
+
+    def extend_layout(
+        self,
+        spec: DiagramSpecification,
+        previous: DiagramSpecification
+    ) -> Dict[str, Any]:
+        """
+        Lay out an edited spec starting from the layout of the previous one
+
+        Components that were already in the previous spec keep their
+        positions; only new components are placed.
+
+        Args:
+            spec: Edited diagram specification
+            previous: Specification it was edited from
+
+        Returns:
+            Layout in the format of compute_layout
+        """
+        previous_topology = self._emit(previous, include_images=False)[1]
+        previous_key = LayoutCache.make_key(previous_topology)
+        previous_layout = self.layout_cache.get(previous_key)
+        if previous_layout is None:
+            previous_layout = self.compute_layout(previous)
+            self.layout_cache.put(previous_key, previous_layout)
+
+        topology = self._emit(spec, include_images=False)[1]
+        return extend_layout(previous_layout, previous_topology, topology)
+
+    def _render(
+        self,
+        spec: DiagramSpecification,
+        previous: Optional[DiagramSpecification] = None
+    ) -> Dict[str, bytes]:
+        """Render a spec to its output formats, reusing a cached or previous layout"""
+        formats = list(spec.output_formats)
+        # An edit is still laid out from the previous layout with caching off
+        if self.layout_cache.max_entries <= 0 and previous is None:
+            return self._render_formats(self.to_dot(spec), formats)
+
+        key = self.topology_key(spec)
+        layout = self.layout_cache.get(key)
+        if layout is None:
+            if previous is not None:
+                layout = self.extend_layout(spec, previous)
+            else:
+                layout = self.compute_layout(spec)
+            self.layout_cache.put(key, layout)
+
+        return self._render_formats(self.to_dot(spec, layout), formats, 'nop2')
+
+    def _render_formats(self, source: str, formats: List[str], engine: str = 'dot') -> Dict[str, bytes]:
+        """Run graphviz on DOT source, timed as the request's graphviz stage"""
+        timer = current_timer()
+        with timer.stage(STAGE_GRAPHVIZ):
+            outputs = self.renderer.render_many(source, formats, engine)
+        timer.add_bytes(STAGE_GRAPHVIZ, sum(len(output) for output in outputs.values()))
+        return outputs
+
+    def _emit(
+        self,
+        spec: DiagramSpecification,
+        layout: Optional[Dict[str, Any]] = None,
+        include_images: bool = True
+    ) -> Tuple[str, List[Any]]:
+        """
+        Generate DOT source and the topology description in one pass
+
+        Returns:
+            Tuple of DOT source and a JSON-serializable topology list
+        """
+        graph_attr = {
+            **Diagram._default_graph_attrs,
+            "label": spec.title,
+            "rankdir": spec.get_direction(),
+            "splines": "ortho",
+            **self.graph_attr,
+        }
+        if layout:
+            graph_attr.update(layout["graph"])
+
+        lines = [
+            f"digraph {quote(spec.title)} {{",
+            f"\tgraph{attr_list(kwargs=graph_attr)}",
+            f"\tnode{attr_list(kwargs=Diagram._default_node_attrs)}",
+            f"\tedge{attr_list(kwargs=Diagram._default_edge_attrs)}",
+        ]
+        topology: List[Any] = [spec.title, spec.get_direction()]
+        node_names: Dict[str, str] = {}
+
+        def add_node(component: Component, indent: str) -> None:
+            # Component ids are unique (see SpecificationValidator), so the id
+            # names the node; a component listed again is drawn only once
+            name = component.id
+            if name in node_names:
+                return
+            node_names[component.id] = name
+            attrs = self._node_attrs(component, spec.provider, include_images)
+            topology.append(["node", name, attrs.get("height"), attrs.get("shape")])
+            if layout and name in layout["nodes"]:
+                attrs["pos"] = f"{layout['nodes'][name]}!"
+            lines.append(f"{indent}{quote(name)}{attr_list(component.get_label(), kwargs=attrs)}")
+
+        # Unclustered nodes
+        for component in spec.get_unclustered_components():
+            add_node(component, "\t")
+
+        # Clustered nodes
+        for cluster in spec.clusters:
+            cluster_name = "cluster_" + cluster.name
+            cluster_attr = {
+                **Cluster._default_graph_attrs,
+                "label": cluster.name,
+                "rankdir": "LR",
+                "bgcolor": self.CLUSTER_BGCOLOR,
+            }
+            if layout:
+                cluster_attr.update(layout["clusters"].get(cluster_name, {}))
+            lines.append(f"\tsubgraph {quote(cluster_name)} {{")
+            lines.append(f"\t\tgraph{attr_list(kwargs=cluster_attr)}")
+            topology.append(["cluster", cluster_name])
+            for comp_id in cluster.component_ids:
+                component = spec.get_component_by_id(comp_id)
+                if component:
+                    add_node(component, "\t\t")
+            lines.append("\t}")
+
+        # Connections
+        edge_index = 0
+        for connection in spec.connections:
+            source = node_names.get(connection.from_id)
+            target = node_names.get(connection.to_id)
+            if source and target:
+                edge_attrs = self._edge_attrs(connection)
+                label = edge_attrs.pop("label", None)
+                if layout and edge_index < len(layout["edges"]):
+                    edge_attrs.update(layout["edges"][edge_index])
+                lines.append(
+                    f"\t{quote(source)} -> {quote(target)}{attr_list(label, kwargs=edge_attrs)}"
+                )
+                topology.append(["edge", source, target, label is not None])
+                edge_index += 1
+
+        lines.append("}")
+        return "\n".join(lines) + "\n", topology
+
+    def _node_attrs(
+        self,
+        component: Component,
+        default_provider: str,
+        include_images: bool = True
+    ) -> Dict[str, Any]:
+        """Build the attributes of one node, as diagrams.Node would"""
+        provider = component.component_provider or default_provider
+        node_class = self.node_resolver.resolve_node(provider, component.category, component.type)
+
+        attrs: Dict[str, Any] = {}
+        if getattr(node_class, "_icon", None):
+            padding = 0.4 * component.get_label().count("\n")
+            attrs = {
+                "shape": "none",
+                "height": str(node_class._height + padding),
+            }
+            if include_images:
+                attrs["image"] = node_class._load_icon(node_class)
+
+        return attrs
+
+    def _edge_attrs(self, connection) -> Dict[str, str]:
+        """Build the edge attributes diagrams.Edge would produce"""
+        attrs = dict(Edge._default_edge_attrs)
+        attrs.update(self._build_edge_kwargs(connection))
+        attrs["dir"] = "forward"
+        return attrs
+
+    @staticmethod
+    def _parse_layout(layout_json: bytes) -> Dict[str, Any]:
+        """Extract positions from graphviz JSON output"""
+        data = json.loads(layout_json)
+        layout: Dict[str, Any] = {
+            "graph": {k: data[k] for k in ("bb", "lp") if k in data},
+            "clusters": {},
+            "nodes": {},
+            "edges": [],
+        }
+        for obj in data.get("objects", []):
+            if "pos" in obj:
+                layout["nodes"][obj["name"]] = obj["pos"]
+            elif "bb" in obj:
+                layout["clusters"][obj["name"]] = {k: obj[k] for k in ("bb", "lp") if k in obj}
+        for edge in sorted(data.get("edges", []), key=lambda e: e["_gvid"]):
+            layout["edges"].append({k: edge[k] for k in ("pos", "lp") if k in edge})
+        return layout
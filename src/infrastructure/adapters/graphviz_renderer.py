@@ -0,0 +1,114 @@
+"""Graphviz rendering backends: in-process library or dot subprocess"""
+import os
+import sys
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+import graphviz
+
+try:
+    import pygraphviz
+    PYGRAPHVIZ_AVAILABLE = True
+except ImportError:
+    PYGRAPHVIZ_AVAILABLE = False
+
+
+class GraphvizRenderer(ABC):
+    """Lays out and renders DOT source, returning the output bytes"""
+
+    @abstractmethod
+    def render(self, source: str, fmt: str = "png", engine: str = "dot") -> bytes:
+        """
+        Render DOT source
+
+        Args:
+            source: DOT source text
+            fmt: Output format (png, svg, pdf, dot, json, ...)
+            engine: Layout engine (dot, neato, fdp, ...), or "nop2" to keep
+                   the node and edge positions already in the source
+
+        Returns:
+            Rendered output
+        """
+        pass
+
+    def render_many(self, source: str, formats: List[str], engine: str = "dot") -> Dict[str, bytes]:
+        """
+        Render DOT source to several formats from a single layout
+
+        Args:
+            source: DOT source text
+            formats: Output formats
+            engine: Layout engine, see render
+
+        Returns:
+            Rendered output by format
+        """
+        if len(formats) == 1 or engine == "nop2":
+            return {fmt: self.render(source, fmt, engine) for fmt in formats}
+
+        # Lay out once; the laid-out DOT output carries every position
+        laid_out = self.render(source, "dot", engine)
+        return {
+            fmt: laid_out if fmt == "dot" else self.render(laid_out.decode("utf-8"), fmt, "nop2")
+            for fmt in formats
+        }
+
+
+class SubprocessGraphvizRenderer(GraphvizRenderer):
+    """Runs the graphviz command line tools, one process per render"""
+
+    def render(self, source: str, fmt: str = "png", engine: str = "dot") -> bytes:
+        """Render DOT source with a graphviz subprocess"""
+        if engine == "nop2":
+            return graphviz.pipe("neato", fmt, source.encode("utf-8"), neato_no_op=2, quiet=True)
+        return graphviz.pipe(engine, fmt, source.encode("utf-8"), quiet=True)
+
+
+class LibraryGraphvizRenderer(GraphvizRenderer):
+    """
+    Calls libgvc in-process through pygraphviz
+
+    Avoids the process spawn and temporary file of the command line tools.
+    libgvc is not thread-safe; callers must serialize renders, as the
+    in-process render engine does.
+    """
+
+    def render(self, source: str, fmt: str = "png", engine: str = "dot") -> bytes:
+        """Render DOT source with libgvc"""
+        graph = pygraphviz.AGraph(string=source)
+        return graph.draw(format=fmt, prog=engine)
+
+    def render_many(self, source: str, formats: List[str], engine: str = "dot") -> Dict[str, bytes]:
+        """Lay out DOT source once with libgvc and draw every format from it"""
+        graph = pygraphviz.AGraph(string=source)
+        graph.layout(prog=engine)
+        return {fmt: graph.draw(format=fmt) for fmt in formats}
+
+
+def create_graphviz_renderer(backend: Optional[str] = None) -> GraphvizRenderer:
+    """
+    Create the configured graphviz renderer
+
+    Args:
+        backend: "auto" (library when pygraphviz is installed, else subprocess),
+                "library" or "subprocess". If None, read from the
+                DIAGRAM_GRAPHVIZ_BACKEND environment variable (default "auto").
+
+    Returns:
+        Graphviz renderer
+    """
+    backend = backend or os.getenv("DIAGRAM_GRAPHVIZ_BACKEND", "auto")
+    if backend not in ("auto", "library", "subprocess"):
+        raise ValueError(f"Unknown graphviz backend: {backend}")
+
+    if backend == "subprocess":
+        return SubprocessGraphvizRenderer()
+
+    if PYGRAPHVIZ_AVAILABLE:
+        return LibraryGraphvizRenderer()
+
+    if backend == "library":
+        print("⚠️  pygraphviz is not installed, rendering with the dot command instead",
+              file=sys.stderr)
+    return SubprocessGraphvizRenderer()
@@ -1,34 +1,97 @@
 """Image optimization adapter"""
 import base64
+import os
+import time
 from pathlib import Path
-from PIL import Image
+from typing import Tuple
 import io
 
+from src.domain.value_objects.lazy_image import EncodedImage
+
 
 class ImageOptimizer:
     """Optimizes and encodes diagram images"""
     
-    def __init__(self, max_width: int = 1000, max_height: int = 800):
+    # PNG encoder settings per compression effort
+    EFFORT_LEVELS = {
+        "fast": {"compress_level": 1},
+        "balanced": {"compress_level": 6},
+        "max": {"compress_level": 9, "optimize": True},
+    }
+    
+    # Colors kept by palette mode; diagrams are mostly flat colors and icons
+    PALETTE_COLORS = 256
+    
+    def __init__(
+        self,
+        max_width: int = 1000,
+        max_height: int = 800,
+        mode: str = "rgb",
+        effort: str = "max"
+    ):
         """
         Initialize optimizer
         
         Args:
             max_width: Maximum image width
             max_height: Maximum image height
+            mode: "rgb" for a full color PNG, or "palette" to quantize to a
+                 256 color palette (much smaller and faster to encode)
+            effort: PNG compression effort: "fast", "balanced" or "max"
         """
+        if mode not in ("rgb", "palette"):
+            raise ValueError(f"Unknown image mode: {mode}")
+        if effort not in self.EFFORT_LEVELS:
+            raise ValueError(f"Unknown compression effort: {effort}")
+        
         self.max_width = max_width
         self.max_height = max_height
+        self.mode = mode
+        self.effort = effort
     
-    def optimize_and_encode(self, image_path: str) -> str:
+    def encode(self, image_path: str) -> EncodedImage:
         """
-        Optimize image and return base64 encoding
+        Optimize image for transfer, measuring the time it takes
         
         Args:
             image_path: Path to image file
         
         Returns:
-            Base64 encoded image string
+            Optimized PNG bytes with encode time, original size and the
+            encoding actually used, which differs from the configured one
+            after a fallback
+        """
+        start = time.perf_counter()
+        data, encoding = self._optimize(image_path)
+        return EncodedImage(
+            data=data,
+            original_bytes=os.path.getsize(image_path),
+            encode_ms=round((time.perf_counter() - start) * 1000, 2),
+            encoding=encoding
+        )
+    
+    def optimize(self, image_path: str) -> bytes:
+        """
+        Optimize image for transfer
+        
+        Args:
+            image_path: Path to image file
+        
+        Returns:
+            Optimized PNG bytes
+        """
+        return self._optimize(image_path)[0]
+    
+    def _optimize(self, image_path: str) -> Tuple[bytes, str]:
         """
+        Optimize image, falling back to RGB if quantizing fails and to the
+        original file if the image cannot be processed
+        
+        Returns:
+            Image bytes and their encoding: "png-<mode>-<effort>" or "original"
+        """
+        from PIL import Image
+        
         try:
             with Image.open(image_path) as img:
                 # Convert to RGB if necessary
@@ -39,15 +102,41 @@ class ImageOptimizer:
                 if img.width > self.max_width or img.height > self.max_height:
                     img.thumbnail((self.max_width, self.max_height), Image.Resampling.LANCZOS)
                 
+                # Fast octree quantization without dithering keeps flat colors exact
+                mode = "rgb"
+                if self.mode == "palette":
+                    try:
+                        img = img.quantize(
+                            self.PALETTE_COLORS,
+                            method=Image.Quantize.FASTOCTREE,
+                            dither=Image.Dither.NONE
+                        )
+                        mode = "palette"
+                    except Exception:
+                        # Keep the RGB image; the encoding says so
+                        pass
+                
                 # Save optimized
                 buffer = io.BytesIO()
-                img.save(buffer, format='PNG', optimize=True, compress_level=9)
-                return base64.b64encode(buffer.getvalue()).decode('utf-8')
+                img.save(buffer, format='PNG', **self.EFFORT_LEVELS[self.effort])
+                return buffer.getvalue(), f"png-{mode}-{self.effort}"
         
         except Exception as e:
             # Fallback: read original file
             with open(image_path, 'rb') as f:
-                return base64.b64encode(f.read()).decode('utf-8')
+                return f.read(), "original"
+    
+    def optimize_and_encode(self, image_path: str) -> str:
+        """
+        Optimize image and return base64 encoding
+        
+        Args:
+            image_path: Path to image file
+        
+        Returns:
+            Base64 encoded image string
+        """
+        return base64.b64encode(self.optimize(image_path)).decode('utf-8')
     
     def get_image_size_mb(self, base64_data: str) -> float:
         """
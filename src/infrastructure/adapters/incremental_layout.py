@@ -0,0 +1,267 @@
+"""Extend a previous graphviz layout to an edited graph"""
+import itertools
+from typing import Any, Dict, List, Optional, Tuple
+
+from diagrams import Cluster, Diagram
+
+# Graphviz works in points; sizes in the DOT source are in inches
+POINTS_PER_INCH = 72.0
+# Space graphviz leaves between a cluster's box and its nodes
+CLUSTER_MARGIN = 8.0
+
+Box = Tuple[float, float, float, float]
+
+# Unit vector of the rank direction, in graphviz coordinates (y grows upwards)
+_RANK_VECTORS = {"LR": (1.0, 0.0), "RL": (-1.0, 0.0), "TB": (0.0, -1.0), "BT": (0.0, 1.0)}
+
+
+def extend_layout(
+    previous_layout: Dict[str, Any],
+    previous_topology: List[Any],
+    topology: List[Any]
+) -> Dict[str, Any]:
+    """
+    Build a layout for an edited graph that keeps the previous positions
+
+    Nodes that were already laid out stay where they were. New nodes are
+    placed one rank after (or before) their connected neighbours, or next
+    to the other members of their cluster, and slid sideways until they
+    overlap nothing. Edge routes are kept unless a new node is in their way;
+    the remaining edges are left for the nop2 engine to route. Cluster
+    boxes are recomputed for clusters whose members changed.
+
+    Args:
+        previous_layout: Layout of the previous graph, as from DotBuilder.compute_layout
+        previous_topology: Topology of the previous graph
+        topology: Topology of the edited graph
+
+    Returns:
+        Layout in the same format, to render with the nop2 engine
+    """
+    direction = topology[1]
+    nodes, clusters, edges = _parse_topology(topology)
+    _, previous_clusters, previous_edges = _parse_topology(previous_topology)
+
+    positions = {
+        name: _parse_point(previous_layout["nodes"][name])
+        for name in nodes if name in previous_layout["nodes"]
+    }
+    new_nodes = [name for name in nodes if name not in positions]
+    membership = {name: cluster for cluster, members in clusters.items() for name in members}
+    previous_boxes = {
+        name: _parse_box(attrs["bb"])
+        for name, attrs in previous_layout["clusters"].items() if "bb" in attrs
+    }
+
+    for name in new_nodes:
+        positions[name] = _place_node(
+            name, direction, nodes, positions, edges,
+            clusters.get(membership.get(name), []),
+            [box for cluster, box in previous_boxes.items() if cluster != membership.get(name)]
+        )
+
+    new_boxes = [_node_box(positions[name], nodes[name]) for name in new_nodes]
+
+    return {
+        # Graph box and title position are recomputed by the nop2 engine
+        "graph": {},
+        "clusters": {
+            cluster: _cluster_attrs(
+                cluster, members, nodes, positions,
+                previous_layout["clusters"].get(cluster),
+                unchanged=previous_clusters.get(cluster) == members
+            )
+            for cluster, members in clusters.items() if members
+        },
+        "nodes": {name: _format_point(positions[name]) for name in nodes},
+        "edges": _reuse_edges(edges, previous_edges, previous_layout["edges"], new_boxes),
+    }
+
+
+def _parse_topology(
+    topology: List[Any]
+) -> Tuple[Dict[str, Tuple[float, float]], Dict[str, List[str]], List[Tuple[str, str]]]:
+    """Split a DotBuilder topology into node sizes, cluster members and edges"""
+    default_width = float(Diagram._default_node_attrs["width"])
+    default_height = float(Diagram._default_node_attrs["height"])
+
+    nodes: Dict[str, Tuple[float, float]] = {}
+    clusters: Dict[str, List[str]] = {}
+    edges: List[Tuple[str, str]] = []
+    current_cluster: Optional[str] = None
+    for entry in topology[2:]:
+        kind = entry[0]
+        if kind == "cluster":
+            current_cluster = entry[1]
+            clusters[current_cluster] = []
+        elif kind == "node":
+            height = float(entry[2]) if entry[2] else default_height
+            nodes[entry[1]] = (default_width * POINTS_PER_INCH, height * POINTS_PER_INCH)
+            if current_cluster is not None:
+                clusters[current_cluster].append(entry[1])
+        elif kind == "edge":
+            edges.append((entry[1], entry[2]))
+    return nodes, clusters, edges
+
+
+def _place_node(
+    name: str,
+    direction: str,
+    nodes: Dict[str, Tuple[float, float]],
+    positions: Dict[str, Tuple[float, float]],
+    edges: List[Tuple[str, str]],
+    cluster_members: List[str],
+    obstacles: List[Box]
+) -> Tuple[float, float]:
+    """Find a free position for a new node near what it is attached to"""
+    rank_x, rank_y = _RANK_VECTORS.get(direction, _RANK_VECTORS["TB"])
+    cross_x, cross_y = abs(rank_y), abs(rank_x)
+    width, height = nodes[name]
+    nodesep = float(Diagram._default_graph_attrs["nodesep"]) * POINTS_PER_INCH
+    ranksep = float(Diagram._default_graph_attrs["ranksep"]) * POINTS_PER_INCH
+    rank_step = (width if rank_x else height) + ranksep
+    cross_step = (height if rank_x else width) + nodesep
+
+    predecessors = [positions[s] for s, t in edges if t == name and s in positions]
+    successors = [positions[t] for s, t in edges if s == name and t in positions]
+    mates = [positions[m] for m in cluster_members if m in positions]
+
+    if predecessors:
+        x, y = _mean(predecessors)
+        x, y = x + rank_x * rank_step, y + rank_y * rank_step
+    elif successors:
+        x, y = _mean(successors)
+        x, y = x - rank_x * rank_step, y - rank_y * rank_step
+    elif mates:
+        x, y = _mean(mates)
+    elif positions:
+        # Nothing to attach to: start a new rank after the whole graph
+        points = list(positions.values())
+        far = max(p[0] * rank_x + p[1] * rank_y for p in points)
+        x, y = _mean(points)
+        x = x * cross_x + rank_x * (far + rank_step)
+        y = y * cross_y + rank_y * (far + rank_step)
+    else:
+        x, y = width / 2, height / 2
+
+    if mates and (predecessors or successors):
+        # Keep the rank of the neighbours, but line up with the cluster
+        mate_x, mate_y = _mean(mates)
+        x, y = x * abs(rank_x) + mate_x * cross_x, y * abs(rank_y) + mate_y * cross_y
+
+    placed_boxes = [_node_box(positions[other], nodes[other]) for other in positions]
+    for i in itertools.count():
+        # 0, +1, -1, +2, -2, ... steps across the rank
+        offset = (i + 1) // 2 * (1 if i % 2 else -1) * cross_step
+        candidate = (x + cross_x * offset, y + cross_y * offset)
+        box = _node_box(candidate, (width, height))
+        if (not any(_overlaps(box, other, nodesep) for other in placed_boxes) and
+                not any(_overlaps(box, other, CLUSTER_MARGIN) for other in obstacles)):
+            return candidate
+
+
+def _cluster_attrs(
+    cluster: str,
+    members: List[str],
+    nodes: Dict[str, Tuple[float, float]],
+    positions: Dict[str, Tuple[float, float]],
+    previous: Optional[Dict[str, str]],
+    unchanged: bool
+) -> Dict[str, str]:
+    """Get the box and label position of a cluster"""
+    if unchanged and previous and "bb" in previous:
+        return dict(previous)
+
+    fontsize = float(Cluster._default_graph_attrs["fontsize"])
+    boxes = [_node_box(positions[name], nodes[name]) for name in members]
+    left = min(b[0] for b in boxes) - CLUSTER_MARGIN
+    bottom = min(b[1] for b in boxes) - CLUSTER_MARGIN
+    right = max(b[2] for b in boxes) + CLUSTER_MARGIN
+    top = max(b[3] for b in boxes) + CLUSTER_MARGIN
+
+    # Keep the label where it was relative to the top left corner
+    label_x, label_y = 0.35 * fontsize * len(cluster[len("cluster_"):]), 0.9 * fontsize
+    label_height = 1.9 * fontsize
+    if previous and "bb" in previous and "lp" in previous:
+        old_left, _, _, old_top = _parse_box(previous["bb"])
+        old_label = _parse_point(previous["lp"])
+        label_x, label_y = old_label[0] - old_left, old_top - old_label[1]
+        label_height = max(label_height, 2 * label_y)
+    top += label_height
+
+    return {
+        "bb": ",".join(_format_number(v) for v in (left, bottom, right, top)),
+        "lp": _format_point((left + label_x, top - label_y)),
+    }
+
+
+def _reuse_edges(
+    edges: List[Tuple[str, str]],
+    previous_edges: List[Tuple[str, str]],
+    previous_routes: List[Dict[str, str]],
+    new_boxes: List[Box]
+) -> List[Dict[str, str]]:
+    """Keep the previous route of each edge unless a new node is in its way"""
+    routes: Dict[Tuple[str, str], List[Dict[str, str]]] = {}
+    for edge, route in zip(previous_edges, previous_routes):
+        routes.setdefault(edge, []).append(route)
+
+    result = []
+    for edge in edges:
+        candidates = routes.get(edge)
+        route = candidates.pop(0) if candidates else {}
+        if route and any(_overlaps(_route_box(route), box, 0) for box in new_boxes):
+            route = {}
+        result.append(route)
+    return result
+
+
+def _route_box(route: Dict[str, str]) -> Box:
+    """Get the bounding box of an edge route and its label"""
+    points = [
+        _parse_point(p.split(",", 1)[1] if p[:2] in ("e,", "s,") else p)
+        for p in route.get("pos", "").split()
+    ]
+    if "lp" in route:
+        points.append(_parse_point(route["lp"]))
+    xs, ys = [p[0] for p in points], [p[1] for p in points]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _node_box(center: Tuple[float, float], size: Tuple[float, float]) -> Box:
+    """Get the box of a node centered at a point"""
+    return (center[0] - size[0] / 2, center[1] - size[1] / 2,
+            center[0] + size[0] / 2, center[1] + size[1] / 2)
+
+
+def _overlaps(a: Box, b: Box, gap: float) -> bool:
+    """Check whether two boxes are closer than gap"""
+    return (a[0] < b[2] + gap and b[0] < a[2] + gap and
+            a[1] < b[3] + gap and b[1] < a[3] + gap)
+
+
+def _mean(points: List[Tuple[float, float]]) -> Tuple[float, float]:
+    """Get the centroid of some points"""
+    return (sum(p[0] for p in points) / len(points), sum(p[1] for p in points) / len(points))
+
+
+def _parse_point(value: str) -> Tuple[float, float]:
+    """Parse a graphviz "x,y" point, ignoring a trailing pin marker"""
+    x, y = value.rstrip("!").split(",")[:2]
+    return float(x), float(y)
+
+
+def _parse_box(value: str) -> Box:
+    """Parse a graphviz "llx,lly,urx,ury" box"""
+    llx, lly, urx, ury = (float(v) for v in value.split(","))
+    return llx, lly, urx, ury
+
+
+def _format_point(point: Tuple[float, float]) -> str:
+    """Format a point as graphviz expects it"""
+    return f"{_format_number(point[0])},{_format_number(point[1])}"
+
+
+def _format_number(value: float) -> str:
+    """Format a coordinate with at most two decimals"""
+    return f"{value:.2f}".rstrip("0").rstrip(".")
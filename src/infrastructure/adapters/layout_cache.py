@@ -0,0 +1,86 @@
+"""Cache of computed graphviz layouts keyed by graph topology"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+class LayoutCache:
+    """
+    LRU cache of graph layouts (node positions, edge splines, cluster boxes)
+
+    Keys are hashes of the graph topology, so edits that only restyle a
+    diagram (labels, colors, edge styles) find the layout of the previous
+    render and can skip the layout step.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        """
+        Initialize cache
+
+        Args:
+            max_entries: Maximum number of cached layouts
+        """
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(topology: List[Any]) -> str:
+        """
+        Build the cache key for a topology description
+
+        Args:
+            topology: JSON-serializable description of the graph structure
+
+        Returns:
+            Hex SHA-256 digest of the topology
+        """
+        canonical = json.dumps(topology, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a layout, counting the hit or miss"""
+        with self._lock:
+            layout = self._entries.get(key)
+            if layout is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return layout
+
+    def put(self, key: str, layout: Dict[str, Any]) -> None:
+        """Store a layout, evicting the least recently used one if full"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = layout
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove all layouts and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
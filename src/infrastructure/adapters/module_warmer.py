@@ -0,0 +1,135 @@
+"""Background pre-import of diagrams provider modules"""
+import json
+import os
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from src.infrastructure.adapters.node_class_loader import NodeClassLoader
+
+# Modules warmed up when nothing is configured, as "provider.category"
+DEFAULT_WARMUP_MODULES = (
+    "aws.compute", "aws.database", "aws.network", "aws.storage", "aws.integration",
+    "aws.security", "azure.compute", "azure.database", "azure.network", "azure.storage",
+    "gcp.compute", "gcp.database", "gcp.network", "gcp.storage", "k8s.compute",
+    "k8s.network", "onprem.database", "onprem.network", "generic.compute"
+)
+
+
+def is_warmup_enabled() -> bool:
+    """Whether background warm-up is on, from DIAGRAM_WARMUP (default: on)"""
+    return os.getenv('DIAGRAM_WARMUP', 'on').lower() not in ('off', '0', 'false')
+
+
+class ModuleWarmer:
+    """
+    Imports provider category modules in a background thread
+
+    The set of modules is the configured list plus the modules used most in
+    earlier runs. Usage is learned from the node loader's lookup counts and
+    saved to a JSON file, so the next start warms up what this deployment
+    actually draws.
+    """
+
+    def __init__(
+        self,
+        node_loader: NodeClassLoader,
+        modules: Optional[Iterable[str]] = None,
+        usage_path: Optional[Path] = None,
+        learned_limit: int = 20
+    ):
+        """
+        Initialize warmer
+
+        Args:
+            node_loader: Loader whose imports are warmed up and timed
+            modules: Modules to import as "provider.category" (default: DEFAULT_WARMUP_MODULES)
+            usage_path: JSON file with learned module usage, None to not learn
+            learned_limit: Most used modules from earlier runs to add
+        """
+        self.node_loader = node_loader
+        self.modules = list(DEFAULT_WARMUP_MODULES if modules is None else modules)
+        self.usage_path = Path(usage_path) if usage_path else None
+        self.learned_limit = learned_limit
+        self.imported: List[str] = []
+        self.failed: List[str] = []
+        self.elapsed_ms: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def get_modules(self) -> List[str]:
+        """Modules to warm up: configured ones, then the most used learned ones"""
+        learned = [
+            module for module, _ in self._read_usage().most_common(self.learned_limit)
+        ] if self.learned_limit > 0 else []
+        return list(dict.fromkeys(self.modules + learned))
+
+    def start(self) -> None:
+        """Start importing in a daemon thread; does nothing if already started"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self.run, name="diagram-module-warmup", daemon=True)
+        self._thread.start()
+
+    def run(self) -> None:
+        """Import every module, in the calling thread"""
+        start = time.perf_counter()
+        for module in self.get_modules():
+            provider, _, category = module.partition(".")
+            try:
+                self.node_loader.import_module(provider, category)
+                self.imported.append(module)
+            except ImportError:
+                self.failed.append(module)
+        self.elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the warm-up to finish, returning whether it has"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.elapsed_ms is not None
+
+    def save_usage(self) -> None:
+        """
+        Add this run's module usage to the usage file
+
+        Saved counts are taken from the loader, so saving again only adds
+        the lookups made since.
+        """
+        if self.usage_path is None or not self.node_loader.module_usage:
+            return
+        usage = self._read_usage()
+        usage.update(self.node_loader.take_module_usage())
+        try:
+            self.usage_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.usage_path.with_name(f"{self.usage_path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(dict(usage.most_common())), encoding='utf-8')
+            os.replace(tmp_path, self.usage_path)
+        except OSError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Get warm-up progress and the import time of every module imported so far"""
+        if self._thread is None:
+            state = 'idle'
+        elif self.elapsed_ms is None:
+            state = 'running'
+        else:
+            state = 'done'
+        return {
+            'state': state,
+            'imported': len(self.imported),
+            'failed': list(self.failed),
+            'elapsed_ms': self.elapsed_ms,
+            'import_timings_ms': dict(self.node_loader.import_timings)
+        }
+
+    def _read_usage(self) -> Counter:
+        """Read learned module usage, empty if there is none"""
+        if self.usage_path is None:
+            return Counter()
+        try:
+            return Counter(json.loads(self.usage_path.read_text(encoding='utf-8')))
+        except (OSError, ValueError):
+            return Counter()
@@ -0,0 +1,168 @@
+"""Lookup of node types by synonym or class alias"""
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.infrastructure.adapters.node_search_index import normalize
+
+# Class aliases file written next to a catalog, see CatalogGenerator
+ALIASES_FILE_NAME = "diagrams_aliases.json"
+SYNONYMS_FILE_NAME = "node_synonyms.json"
+
+# Synonym scope that applies to every provider, after the provider's own
+ANY_PROVIDER = "*"
+
+# Words users put in front of a service name, tried without them as well
+PROVIDER_PREFIXES = {
+    'aws': ('amazonwebservices', 'amazon', 'aws'),
+    'azure': ('microsoftazure', 'microsoft', 'azure'),
+    'gcp': ('googlecloudplatform', 'googlecloud', 'google', 'gcp'),
+    'k8s': ('kubernetes', 'k8s'),
+}
+
+# (provider, category, name) of a node class
+Target = Tuple[str, str, str]
+
+
+class NodeAliasIndex:
+    """
+    Map of normalized names to node classes, per provider
+
+    Built from three sources, later ones taking precedence: the catalog's
+    own class names, the module-level class aliases of the diagrams package
+    (ELB for ElasticLoadBalancing) and a curated synonym table ("load
+    balancer", "S3 bucket", "postgres"). Keys are normalized like the search
+    index, so case, spaces and punctuation do not matter.
+    """
+
+    def __init__(
+        self,
+        data: Dict[str, Dict[str, Any]],
+        diagrams_aliases: Dict[str, Dict[str, Dict[str, str]]],
+        synonyms: Dict[str, Dict[str, str]]
+    ):
+        """
+        Build index
+
+        Args:
+            data: Node names by provider and category
+            diagrams_aliases: Class alias to class name, by provider and category
+            synonyms: Phrase to "category/Name" by provider, or to
+                     "provider/category/Name" in the ANY_PROVIDER scope.
+                     Entries pointing at nodes missing from data are ignored.
+        """
+        self._maps: Dict[str, Dict[str, Target]] = {}
+        known = set()
+        for provider, categories in data.items():
+            names = self._maps.setdefault(provider, {})
+            for category, nodes in (categories or {}).items():
+                for name in nodes or []:
+                    known.add((provider, category, name))
+                    names.setdefault(normalize(name), (provider, category, name))
+
+        for provider, categories in diagrams_aliases.items():
+            for category, aliases in categories.items():
+                for alias, name in aliases.items():
+                    if (provider, category, name) in known:
+                        self._maps.setdefault(provider, {})[normalize(alias)] = (provider, category, name)
+
+        for scope, entries in synonyms.items():
+            for phrase, location in entries.items():
+                parts = location.split("/")
+                target = tuple(parts) if scope == ANY_PROVIDER else (scope, *parts)
+                if len(target) == 3 and target in known:
+                    self._maps.setdefault(scope, {})[normalize(phrase)] = target
+
+    def lookup(self, provider: str, name: str) -> Optional[Target]:
+        """
+        Find the node class a name stands for
+
+        The name is tried as given, without a leading provider name ("AWS
+        Lambda"), and in singular form, first among the provider's names and
+        then among the synonyms that apply to every provider.
+
+        Args:
+            provider: Provider the name was used with
+            name: Synonym, alias or class name
+
+        Returns:
+            (provider, category, name) of the node class, or None
+        """
+        keys = self._candidate_keys(provider, normalize(name))
+        for scope in (provider, ANY_PROVIDER):
+            names = self._maps.get(scope)
+            if not names:
+                continue
+            for key in keys:
+                target = names.get(key)
+                if target is not None:
+                    return target
+        return None
+
+    @staticmethod
+    def _candidate_keys(provider: str, key: str) -> List[str]:
+        """Normalized forms of a name to look up, most literal first"""
+        keys = [key] if key else []
+        for prefix in PROVIDER_PREFIXES.get(provider, ()):
+            if key.startswith(prefix) and len(key) > len(prefix):
+                keys.append(key[len(prefix):])
+                break
+        keys += [k[:-1] for k in keys if len(k) > 3 and k.endswith("s")]
+        return keys
+
+    def __len__(self) -> int:
+        return sum(len(names) for names in self._maps.values())
+
+    def to_state(self) -> Dict[str, Dict[str, Target]]:
+        """Get the index as plain dicts and tuples, see from_state"""
+        return self._maps
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Dict[str, Target]]) -> 'NodeAliasIndex':
+        """Restore an index from to_state() without building it again"""
+        index = cls.__new__(cls)
+        index._maps = state
+        return index
+
+
+def load_alias_index(json_path: Path, data: Dict[str, Dict[str, Any]]) -> NodeAliasIndex:
+    """
+    Build the alias index for a catalog
+
+    Class aliases are read from the file written next to the catalog, or the
+    bundled one if there is none; synonyms always come from the bundled table.
+
+    Args:
+        json_path: Catalog JSON file
+        data: Node names by provider and category, as loaded from it
+
+    Returns:
+        Alias index
+    """
+    aliases_path, synonyms_path = get_alias_sources(json_path)
+    return NodeAliasIndex(data, _read_json(aliases_path), _read_json(synonyms_path))
+
+
+def get_alias_sources(json_path: Path) -> Tuple[Path, Path]:
+    """
+    Files the alias index of a catalog is built from
+
+    Args:
+        json_path: Catalog JSON file
+
+    Returns:
+        Class aliases file and synonyms file
+    """
+    bundled_dir = Path(__file__).parent.parent / "external"
+    aliases_path = Path(json_path).parent / ALIASES_FILE_NAME
+    if not aliases_path.exists():
+        aliases_path = bundled_dir / ALIASES_FILE_NAME
+    return aliases_path, bundled_dir / SYNONYMS_FILE_NAME
+
+
+def _read_json(path: Path) -> Dict[str, Any]:
+    """Read a JSON table, empty if it is missing or invalid"""
+    try:
+        return json.loads(Path(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
@@ -1,15 +1,48 @@
 """Node class loader for dynamic imports"""
 import importlib
-from typing import Any, Optional
-from diagrams.generic import Generic
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
 
 
 class NodeClassLoader:
     """Loads diagram node classes dynamically"""
     
     def __init__(self):
-        """Initialize with cache"""
-        self._cache = {}
+        """Initialize loader"""
+        # Milliseconds each provider module took to import, by "provider.category"
+        self.import_timings: Dict[str, float] = {}
+        # Node class lookups per "provider.category", to learn which modules to warm up
+        self.module_usage: Counter = Counter()
+        self._lock = threading.Lock()
+    
+    def import_module(self, provider: str, category: str) -> Any:
+        """
+        Import a provider category module, timing the first import
+        
+        Args:
+            provider: Cloud provider
+            category: Node category
+        
+        Returns:
+            The diagrams.<provider>.<category> module
+        
+        Raises:
+            ImportError: If the module does not exist
+        """
+        module_name = f"diagrams.{provider}.{category}"
+        first_import = module_name not in sys.modules
+        
+        # import_module also waits for a module another thread is still importing
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        if first_import:
+            elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+            with self._lock:
+                self.import_timings.setdefault(f"{provider}.{category}", elapsed_ms)
+        return module
     
     def load_node_class(self, provider: str, category: str, node_type: str) -> Optional[Any]:
         """
@@ -23,22 +56,16 @@ class NodeClassLoader:
         Returns:
             Node class if found, None otherwise
         """
-        cache_key = f"{provider}_{category}_{node_type}"
-        
-        # Check cache first
-        if cache_key in self._cache:
-            return self._cache[cache_key]
-        
         try:
-            # Import module dynamically
-            module_name = f"diagrams.{provider}.{category}"
-            module = importlib.import_module(module_name)
+            # Import module dynamically; modules stay in sys.modules, so
+            # repeated loads are a dictionary lookup. Results are cached by
+            # NodeResolver, together with failed lookups
+            module = self.import_module(provider, category)
             
-            # Get class from module
+            # Get class from module; only modules that provide a class count as used
             if hasattr(module, node_type):
-                node_class = getattr(module, node_type)
-                self._cache[cache_key] = node_class
-                return node_class
+                self.record_usage(provider, category)
+                return getattr(module, node_type)
             
         except (ImportError, AttributeError) as e:
             # Node class not found
@@ -47,6 +74,21 @@ class NodeClassLoader:
         return None
     
     def clear_cache(self):
-        """Clear the class cache"""
-        self._cache.clear()
+        """
+        Clear the class cache
+        
+        Kept for compatibility: classes are no longer cached here but by
+        NodeResolver, see NodeResolver.clear_cache, so there is nothing to clear.
+        """
+    
+    def record_usage(self, provider: str, category: str) -> None:
+        """Count a node class lookup in a provider category module"""
+        with self._lock:
+            self.module_usage[f"{provider}.{category}"] += 1
+    
+    def take_module_usage(self) -> Counter:
+        """Get the lookups counted so far and start counting again from zero"""
+        with self._lock:
+            usage, self.module_usage = self.module_usage, Counter()
+        return usage
 
@@ -0,0 +1,241 @@
+"""Inverted index over the node catalog for fast name searches"""
+import heapq
+import re
+from array import array
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Longest character n-gram stored in the index; queries of any length are
+# answered by intersecting the postings of their n-grams of this size
+MAX_GRAM = 3
+
+# Ranking of a match, best first
+SCORE_EXACT = 100         # normalized name equals the query
+SCORE_PREFIX = 80         # name starts with the query
+SCORE_TOKEN = 60          # a CamelCase word of the name equals the query
+SCORE_TOKEN_PREFIX = 50   # a CamelCase word of the name starts with the query
+SCORE_SUBSTRING = 40      # query appears anywhere in the name
+SCORE_WORDS = 20          # every word of a multi-word query appears in the name
+
+_TOKEN_PATTERN = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+')
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def normalize(text: str) -> str:
+    """Lowercase text and drop everything but letters and digits"""
+    return _NON_ALNUM.sub('', text.lower())
+
+
+def split_words(name: str) -> List[str]:
+    """
+    Split a node name into lowercase words
+
+    CamelCase, acronyms and digit runs are separate words, so
+    "ElasticLoadBalancing" gives elastic, load, balancing and "RDSInstance"
+    gives rds, instance.
+    """
+    return [token.lower() for token in _TOKEN_PATTERN.findall(name)]
+
+
+def _grams(text: str) -> Set[str]:
+    """All character n-grams of text, from single characters up to MAX_GRAM"""
+    return {
+        text[start:start + size]
+        for size in range(1, MAX_GRAM + 1)
+        for start in range(len(text) - size + 1)
+    }
+
+
+def _compact(postings: Dict[str, List[int]]) -> Dict[str, array]:
+    """Turn posting lists into integer arrays"""
+    return {key: array('I', ids) for key, ids in postings.items()}
+
+
+def _to_bytes(postings: Dict[str, array]) -> Dict[str, bytes]:
+    """Raw bytes of each posting array, for serialization"""
+    return {key: ids.tobytes() for key, ids in postings.items()}
+
+
+def _from_bytes(postings: Dict[str, bytes]) -> Dict[str, array]:
+    """Posting arrays from their raw bytes"""
+    result = {}
+    for key, raw in postings.items():
+        ids = array('I')
+        ids.frombytes(raw)
+        result[key] = ids
+    return result
+
+
+class NodeSearchIndex:
+    """
+    Inverted index of node names
+
+    Built once from the provider catalog. Every node entry (a name in a
+    provider category) is indexed by the character n-grams of its normalized
+    name and by the words of its CamelCase name, so a search only looks at
+    entries sharing all n-grams of the query instead of scanning the whole
+    catalog.
+    """
+
+    def __init__(self, data: Dict[str, Dict[str, List[str]]]):
+        """
+        Build the index
+
+        Args:
+            data: Node names by provider and category, as in diagrams_structure.json
+        """
+        # Entries are (name, provider, category), identified by position
+        self._entries: List[Tuple[str, str, str]] = []
+        self._normalized: List[str] = []
+        # CamelCase words of each name, space separated and space delimited
+        self._words: List[str] = []
+        grams: Dict[str, List[int]] = {}
+        names: Dict[str, List[int]] = {}
+        providers: Dict[str, List[int]] = {}
+
+        for provider, categories in data.items():
+            provider_ids = providers.setdefault(provider, [])
+            for category, nodes in categories.items():
+                for name in nodes:
+                    entry_id = len(self._entries)
+                    normalized = normalize(name)
+                    self._entries.append((name, provider, category))
+                    self._normalized.append(normalized)
+                    self._words.append(f" {' '.join(split_words(name))} ")
+                    provider_ids.append(entry_id)
+                    names.setdefault(normalized, []).append(entry_id)
+                    for gram in _grams(normalized):
+                        grams.setdefault(gram, []).append(entry_id)
+
+        # Postings are kept as compact integer arrays, which are also cheap to
+        # serialize (see compiled_catalog)
+        self._grams = _compact(grams)
+        self._names = _compact(names)
+        self._providers = _compact(providers)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def to_state(self) -> Dict[str, Any]:
+        """Get the index as plain lists, dicts and bytes, see from_state"""
+        return {
+            'entries': self._entries,
+            'normalized': self._normalized,
+            'words': self._words,
+            'grams': _to_bytes(self._grams),
+            'names': _to_bytes(self._names),
+            'providers': _to_bytes(self._providers),
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'NodeSearchIndex':
+        """Restore an index from to_state() without building it again"""
+        index = cls.__new__(cls)
+        index._entries = state['entries']
+        index._normalized = state['normalized']
+        index._words = state['words']
+        index._grams = _from_bytes(state['grams'])
+        index._names = _from_bytes(state['names'])
+        index._providers = _from_bytes(state['providers'])
+        return index
+
+    def locate(self, name: str, provider: Optional[str] = None) -> List[Tuple[str, str, str]]:
+        """
+        Find every provider category listing a node name
+
+        Args:
+            name: Node name, case and punctuation insensitive
+            provider: Only return locations in this provider
+
+        Returns:
+            (name, provider, category) tuples, in catalog order
+        """
+        return [
+            self._entries[entry_id]
+            for entry_id in self._names.get(normalize(name), ())
+            if provider is None or self._entries[entry_id][1] == provider
+        ]
+
+    def search(
+        self,
+        query: str,
+        provider: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Tuple[str, str, str]]:
+        """
+        Find nodes whose name contains the query
+
+        A query with several words ("load balancer") also matches names that
+        contain every word, in any order.
+
+        Args:
+            query: Text to search for, case and punctuation insensitive
+            provider: Only return nodes of this provider
+            limit: Maximum number of results, None for all
+
+        Returns:
+            (name, provider, category) tuples, best match first
+        """
+        normalized = normalize(query)
+        words = [w for w in (normalize(w) for w in query.split()) if w]
+        if not normalized:
+            # No letters or digits to look up ("" or "_"): match the raw text
+            return self._scan(query.lower(), provider, limit)
+        if len(words) < 2:
+            words = [normalized]
+
+        scope = self._providers.get(provider, ()) if provider else None
+        candidates: Optional[Iterable[int]] = scope
+        for word in words:
+            candidates = self._candidates(word, candidates)
+            if not candidates:
+                return []
+
+        ranked = []
+        for entry_id in candidates:
+            score = self._score(entry_id, normalized, words)
+            if score:
+                ranked.append((-score, len(self._normalized[entry_id]), entry_id))
+        if limit is not None:
+            ranked = heapq.nsmallest(limit, ranked)
+        else:
+            ranked.sort()
+        return [self._entries[entry_id] for _, _, entry_id in ranked]
+
+    def _scan(self, text: str, provider: Optional[str], limit: Optional[int]) -> List[Tuple[str, str, str]]:
+        """Entries whose lowercase name contains text, in catalog order"""
+        scope = self._providers.get(provider, ()) if provider else range(len(self._entries))
+        matches = (self._entries[entry_id] for entry_id in scope if text in self._entries[entry_id][0].lower())
+        return list(islice(matches, limit))
+
+    def _candidates(self, word: str, within: Optional[Iterable[int]]) -> Set[int]:
+        """Entries sharing every n-gram of a word, optionally within a subset"""
+        if len(word) <= MAX_GRAM:
+            postings = [self._grams.get(word, ())]
+        else:
+            postings = [
+                self._grams.get(word[i:i + MAX_GRAM], ())
+                for i in range(len(word) - MAX_GRAM + 1)
+            ]
+        if within is not None:
+            postings.insert(0, within)
+        postings.sort(key=len)
+        return set(postings[0]).intersection(*postings[1:])
+
+    def _score(self, entry_id: int, normalized: str, words: List[str]) -> int:
+        """Rank an entry against the query, 0 if it does not match"""
+        name = self._normalized[entry_id]
+        if name == normalized:
+            return SCORE_EXACT
+        if name.startswith(normalized):
+            return SCORE_PREFIX
+        if f" {normalized} " in self._words[entry_id]:
+            return SCORE_TOKEN
+        if f" {normalized}" in self._words[entry_id]:
+            return SCORE_TOKEN_PREFIX
+        if normalized in name:
+            return SCORE_SUBSTRING
+        # n-grams only narrow down candidates; confirm every word really occurs
+        if len(words) > 1 and all(word in name for word in words):
+            return SCORE_WORDS
+        return 0
@@ -1,35 +1,73 @@
 """Provider repository implementation"""
-import json
+import os
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Optional
 
 from src.domain.ports.provider_repository_port import ProviderRepositoryPort
+from src.infrastructure.adapters.compiled_catalog import (
+    CompiledCatalog,
+    get_default_compiled_path,
+    load_catalog
+)
+from src.domain.services.node_matcher import MatchIndexes
+
+
+def get_default_json_path() -> Path:
+    """Location of the bundled diagrams_structure.json"""
+    project_root = Path(__file__).parent.parent.parent.parent
+    return project_root / "src" / "infrastructure" / "external" / "diagrams_structure.json"
+
+
+def get_catalog_json_path() -> Path:
+    """
+    Catalog to load by default
+    
+    With DIAGRAM_CATALOG_SOURCE=installed the catalog is generated from the
+    installed diagrams package (on first start and after upgrades); otherwise,
+    or if generation fails, the bundled snapshot is used.
+    """
+    if os.getenv('DIAGRAM_CATALOG_SOURCE', 'bundled').lower() == 'installed':
+        from src.infrastructure.adapters.catalog_generator import CatalogGenerator
+        
+        try:
+            return CatalogGenerator().ensure_catalog()
+        except Exception as e:
+            print(f"Error generating provider catalog, using the bundled one: {e}")
+    return get_default_json_path()
 
 
 class ProviderRepository(ProviderRepositoryPort):
     """Repository for provider data from JSON file"""
     
-    def __init__(self, json_path: Path = None):
+    def __init__(self, json_path: Path = None, compiled_path: Path = None):
         """
         Initialize repository
         
         Args:
-            json_path: Path to diagrams_structure.json. If None, uses default location.
+            json_path: Path to diagrams_structure.json. If None, uses the bundled one
+                      or the generated one, see get_catalog_json_path.
+            compiled_path: Precompiled catalog to load from and keep up to date.
+                          If None, the default one is used for the default JSON
+                          and none for a custom JSON.
         """
         if json_path is None:
-            project_root = Path(__file__).parent.parent.parent.parent
-            json_path = project_root / "src" / "infrastructure" / "external" / "diagrams_structure.json"
+            json_path = get_catalog_json_path()
+            if compiled_path is None:
+                compiled_path = get_default_compiled_path()
         
-        self._data = self._load_data(json_path)
+        catalog = self._load_catalog(json_path, compiled_path)
+        self._data = catalog.data
+        self._search_index = catalog.search_index
+        self._match_indexes = catalog.match_indexes
+        self._alias_index = catalog.alias_index
     
-    def _load_data(self, json_path: Path) -> Dict[str, Any]:
-        """Load provider data from JSON"""
+    def _load_catalog(self, json_path: Path, compiled_path: Optional[Path]) -> CompiledCatalog:
+        """Load provider data and indexes, shared with other repositories of this process"""
         try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return load_catalog(json_path, compiled_path)
         except Exception as e:
             print(f"Error loading provider data: {e}")
-            return {}
+            return CompiledCatalog.empty()
     
     def get_all_providers(self) -> List[str]:
         """Get all available providers"""
@@ -49,24 +87,68 @@ class ProviderRepository(ProviderRepositoryPort):
                 category in self._data[provider] and
                 node_type in self._data[provider][category])
     
-    def search_nodes(self, query: str, provider: str = None) -> List[Dict[str, str]]:
-        """Search for nodes by query"""
-        results = []
-        query_lower = query.lower()
+    def find_node(self, node_type: str, provider: str = None) -> List[Dict[str, str]]:
+        """
+        Find every category listing a node type, in any provider
         
-        for prov_name, categories in self._data.items():
-            if provider and prov_name != provider:
-                continue
-            
-            for cat_name, nodes in categories.items():
-                for node_name in nodes:
-                    if query_lower in node_name.lower():
-                        results.append({
-                            'name': node_name,
-                            'provider': prov_name,
-                            'category': cat_name,
-                            'description': f'Node {node_name} from {prov_name.upper()}'
-                        })
+        Args:
+            node_type: Node name, case and punctuation insensitive
+            provider: Only look in this provider
         
-        return results
-
+        Returns:
+            Locations with the catalog spelling of the name, provider and category
+        """
+        return [
+            {'name': node_name, 'provider': prov_name, 'category': cat_name}
+            for node_name, prov_name, cat_name in self._search_index.locate(node_type, provider)
+        ]
+    
+    def find_alias(self, provider: str, name: str) -> Optional[Dict[str, str]]:
+        """
+        Find the node class a synonym or class alias stands for
+        
+        Args:
+            provider: Provider the name was used with
+            name: Synonym ("load balancer", "S3 bucket"), diagrams class alias
+                  (ELB) or class name with a provider prefix ("AWS Lambda")
+        
+        Returns:
+            Catalog spelling of the name, provider and category, or None
+        """
+        target = self._alias_index.lookup(provider, name)
+        if target is None:
+            return None
+        prov_name, cat_name, node_name = target
+        return {'name': node_name, 'provider': prov_name, 'category': cat_name}
+    
+    def get_match_indexes(self) -> Optional[MatchIndexes]:
+        """Fuzzy matching indexes compiled with the catalog"""
+        return self._match_indexes
+    
+    def search_nodes(
+        self,
+        query: str,
+        provider: str = None,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, str]]:
+        """
+        Search for nodes by query
+        
+        Args:
+            query: Text the node name must contain, case insensitive. Several
+                   words match names containing all of them.
+            provider: Only search this provider
+            limit: Maximum number of results, None for all
+        
+        Returns:
+            Matching nodes, best match first (exact name, prefix, word, substring)
+        """
+        return [
+            {
+                'name': node_name,
+                'provider': prov_name,
+                'category': cat_name,
+                'description': f'Node {node_name} from {prov_name.upper()}'
+            }
+            for node_name, prov_name, cat_name in self._search_index.search(query, provider, limit)
+        ]
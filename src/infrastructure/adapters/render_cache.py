@@ -0,0 +1,153 @@
+"""Content-addressed cache for rendered diagrams"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.domain.value_objects.diagram_specification import DiagramSpecification
+from src.domain.value_objects.diagram_result import DiagramResult
+
+
+class RenderCache:
+    """
+    LRU cache of successful diagram results keyed by a canonical spec hash
+
+    Entries are evicted least-recently-used first once either the entry
+    count or the total size of the cached image payloads exceeds its bound.
+    Lazily optimized images are counted at the size of their file, which
+    bounds what they hold once optimized.
+    """
+
+    def __init__(self, max_entries: int = 128, max_size_mb: float = 64.0):
+        """
+        Initialize cache
+
+        Args:
+            max_entries: Maximum number of cached results
+            max_size_mb: Maximum total size of cached image payloads
+        """
+        self.max_entries = max_entries
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self._entries: 'OrderedDict[str, DiagramResult]' = OrderedDict()
+        self._entry_sizes: Dict[str, int] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(spec: DiagramSpecification, render_settings: Dict[str, Any]) -> str:
+        """
+        Build the cache key for a specification
+
+        Args:
+            spec: Parsed diagram specification
+            render_settings: Settings that affect the rendered output
+
+        Returns:
+            Hex SHA-256 digest of the canonical JSON form of spec and settings
+        """
+        canonical = json.dumps(
+            {'spec': spec.to_dict(), 'settings': render_settings},
+            sort_keys=True,
+            separators=(',', ':'),
+            default=str
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[DiagramResult]:
+        """
+        Look up a cached result
+
+        Entries whose image file has been removed from disk are dropped
+        and counted as misses.
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            Cached result marked as cached, or None
+        """
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None and not Path(result.file_path).exists():
+                self._remove(key)
+                result = None
+
+            if result is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return replace(result, cached=True)
+
+    def put(self, key: str, result: DiagramResult) -> None:
+        """
+        Store a successful result, evicting old entries if needed
+
+        Args:
+            key: Cache key from make_key
+            result: Result to cache; failures are ignored
+        """
+        if self.max_entries <= 0 or not result.success:
+            return
+
+        size = self._entry_size(result)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = result
+            self._entry_sizes[key] = size
+            self._total_bytes += size
+
+            while (len(self._entries) > self.max_entries or
+                   self._total_bytes > self.max_bytes):
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+
+    def clear(self) -> None:
+        """Remove all entries and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self._entry_sizes.clear()
+            self._total_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'size_mb': round(self._total_bytes / 1024 / 1024, 2),
+                'max_size_mb': round(self.max_bytes / 1024 / 1024, 2),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        """Remove an entry; caller must hold the lock"""
+        del self._entries[key]
+        self._total_bytes -= self._entry_sizes.pop(key)
+
+    @staticmethod
+    def _entry_size(result: DiagramResult) -> int:
+        """Approximate memory held by a cached result"""
+        size = len(result.image_base64 or '')
+        if result.image is not None:
+            size += os.path.getsize(result.image.path)
+        return size
@@ -0,0 +1,317 @@
+"""Render engine adapters: in-process and worker process pool"""
+import os
+import sys
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures import wait as wait_for_futures
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from src.domain.ports.render_engine_port import RenderEnginePort
+from src.domain.value_objects.diagram_specification import DiagramSpecification
+
+
+def get_builder_class(builder_type: str = "dot") -> type:
+    """
+    Get the builder class for a builder type
+
+    Args:
+        builder_type: "dot" (DotBuilder) or "diagrams" (DiagramBuilder)
+
+    Returns:
+        Builder class
+    """
+    if builder_type == "dot":
+        from src.infrastructure.adapters.dot_builder import DotBuilder
+        return DotBuilder
+    if builder_type == "diagrams":
+        from src.infrastructure.adapters.diagram_builder import DiagramBuilder
+        return DiagramBuilder
+    raise ValueError(f"Unknown builder type: {builder_type}")
+
+
+def create_diagram_builder(
+    output_dir: Path,
+    builder_type: str = "dot",
+    output_size: Optional[Tuple[int, int]] = None
+) -> Any:
+    """
+    Create a builder with its own repository, loader and resolver
+
+    Used as the default builder factory for worker processes. Must stay a
+    module-level function so it can be pickled to spawned workers.
+
+    Args:
+        output_dir: Directory for output files
+        builder_type: Builder type, see get_builder_class
+        output_size: Maximum image width and height in pixels
+
+    Returns:
+        Builder instance
+    """
+    from src.domain.services.node_resolver import NodeResolver
+    from src.infrastructure.adapters.node_class_loader import NodeClassLoader
+    from src.infrastructure.adapters.provider_repository import ProviderRepository
+
+    node_resolver = NodeResolver(
+        NodeClassLoader(),
+        ProviderRepository(),
+        cache_size=int(os.getenv('DIAGRAM_RESOLUTION_CACHE_SIZE', '1024'))
+    )
+    return get_builder_class(builder_type)(node_resolver, output_dir, output_size=output_size)
+
+
+class InProcessRenderEngine(RenderEnginePort):
+    """
+    Renders in the calling process
+
+    The diagrams library keeps the current Diagram/Cluster in global context
+    state, so renders are serialized with a lock.
+    """
+
+    def __init__(self, builder: Any):
+        """
+        Initialize engine
+
+        Args:
+            builder: Builder exposing build(spec[, previous][, digest]) and get_render_settings()
+        """
+        self.builder = builder
+        self._lock = threading.Lock()
+
+    def render(
+        self,
+        spec: DiagramSpecification,
+        previous: Optional[DiagramSpecification] = None,
+        digest: Optional[str] = None
+    ) -> str:
+        """Render a specification in this process"""
+        with self._lock:
+            return _build(self.builder, spec, previous, digest)
+
+    def get_render_settings(self) -> Dict[str, Any]:
+        """Get the builder's render settings"""
+        return self.builder.get_render_settings()
+
+
+def _build(
+    builder: Any,
+    spec: DiagramSpecification,
+    previous: Optional[DiagramSpecification],
+    digest: Optional[str]
+) -> str:
+    """Call builder.build with only the arguments given, so builders taking just a spec keep working"""
+    kwargs: Dict[str, Any] = {}
+    if previous is not None:
+        kwargs['previous'] = previous
+    if digest is not None:
+        kwargs['digest'] = digest
+    return builder.build(spec, **kwargs)
+
+
+# Builder owned by the current worker process, created by _init_worker
+_worker_builder = None
+
+
+def _init_worker(builder_factory: Callable[[Path], Any], output_dir: str) -> None:
+    """Build the worker's builder once, importing diagrams and node classes up front"""
+    global _worker_builder
+    _worker_builder = builder_factory(Path(output_dir))
+
+
+def _render_in_worker(
+    spec: DiagramSpecification,
+    previous: Optional[DiagramSpecification] = None,
+    digest: Optional[str] = None
+) -> str:
+    """Render a specification with the worker's builder"""
+    return _build(_worker_builder, spec, previous, digest)
+
+
+def _get_worker_settings() -> Dict[str, Any]:
+    """Get the render settings of the worker's builder"""
+    return _worker_builder.get_render_settings()
+
+
+class ProcessPoolRenderEngine(RenderEnginePort):
+    """
+    Renders in a pool of warm worker processes
+
+    Each worker builds its own DiagramBuilder once, so diagrams and the
+    provider catalog stay loaded between jobs, and several diagrams can
+    render in parallel. Workers are replaced after a number of jobs to
+    bound memory growth, and a worker crash only fails the job it was
+    running: the pool is rebuilt and the engine keeps serving requests.
+    A job that times out does not stop the other jobs of its pool: new
+    jobs go to a fresh pool, and the old one is killed once the rest of
+    its jobs have finished.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        max_workers: Optional[int] = None,
+        max_jobs_per_worker: Optional[int] = 100,
+        timeout: Optional[float] = 120.0,
+        builder_factory: Callable[[Path], Any] = create_diagram_builder,
+        mp_context: Optional[str] = "spawn"
+    ):
+        """
+        Initialize engine; worker processes start on first use
+
+        Args:
+            output_dir: Directory for output files
+            max_workers: Number of worker processes (default: CPU count)
+            max_jobs_per_worker: Jobs before a worker is replaced (None: never)
+            timeout: Seconds to wait for a single render (None: no limit)
+            builder_factory: Module-level function creating a builder in a worker
+            mp_context: multiprocessing start method
+        """
+        self.output_dir = Path(output_dir)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.timeout = timeout
+        self.builder_factory = builder_factory
+        self.mp_context = mp_context
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._jobs_in_pool = 0
+        # Unfinished jobs of every live pool, including pools being retired
+        self._in_flight: Dict[ProcessPoolExecutor, Set[Future]] = {}
+        self._render_settings: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def render(
+        self,
+        spec: DiagramSpecification,
+        previous: Optional[DiagramSpecification] = None,
+        digest: Optional[str] = None
+    ) -> str:
+        """
+        Render a specification in a worker process
+
+        Raises:
+            RuntimeError: If the worker crashed or timed out
+        """
+        return self._run(_render_in_worker, spec, previous, digest)
+
+    def get_render_settings(self) -> Dict[str, Any]:
+        """Get the render settings of the workers' builder"""
+        if self._render_settings is None:
+            self._render_settings = self._run(_get_worker_settings)
+        return self._render_settings
+
+    def shutdown(self) -> None:
+        """Stop all worker processes"""
+        with self._lock:
+            retiring = [executor for executor in self._in_flight if executor is not self._executor]
+        for executor in retiring:
+            self._terminate_executor(executor)
+        with self._lock:
+            self._discard_executor(wait=True)
+
+    def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Submit a job to the pool and wait for its result"""
+        executor = self._get_executor()
+        try:
+            future = self._submit(executor, func, *args)
+            return future.result(timeout=self.timeout)
+        except BrokenProcessPool as e:
+            self._reset_executor(executor)
+            raise RuntimeError(f"Render worker crashed: {e}") from e
+        except FutureTimeoutError as e:
+            self._retire_executor(executor, future)
+            raise RuntimeError(f"Render timed out after {self.timeout}s") from e
+
+    def _submit(self, executor: ProcessPoolExecutor, func: Callable[..., Any], *args: Any) -> Future:
+        """Submit a job, keeping track of it until it finishes"""
+        future = executor.submit(func, *args)
+        with self._lock:
+            self._in_flight.setdefault(executor, set()).add(future)
+        future.add_done_callback(self._forget_job)
+        return future
+
+    def _forget_job(self, future: Future) -> None:
+        """Stop tracking a finished job"""
+        with self._lock:
+            for jobs in self._in_flight.values():
+                jobs.discard(future)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Get the current pool, creating or recycling it as needed"""
+        with self._lock:
+            if (self._executor is not None and self._recycles_whole_pool() and
+                    self._jobs_in_pool >= self.max_jobs_per_worker * self.max_workers):
+                self._discard_executor(wait=False)
+
+            if self._executor is None:
+                self._executor = self._create_executor()
+                self._jobs_in_pool = 0
+
+            self._jobs_in_pool += 1
+            return self._executor
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        """Start a new pool of workers"""
+        kwargs: Dict[str, Any] = {
+            'max_workers': self.max_workers,
+            'initializer': _init_worker,
+            'initargs': (self.builder_factory, str(self.output_dir)),
+        }
+        if self.mp_context:
+            kwargs['mp_context'] = multiprocessing.get_context(self.mp_context)
+        if self.max_jobs_per_worker and not self._recycles_whole_pool():
+            kwargs['max_tasks_per_child'] = self.max_jobs_per_worker
+        return ProcessPoolExecutor(**kwargs)
+
+    def _recycles_whole_pool(self) -> bool:
+        """Whether recycling must replace the whole pool (no per-worker limit before 3.11)"""
+        return bool(self.max_jobs_per_worker) and sys.version_info < (3, 11)
+
+    def _reset_executor(self, executor: ProcessPoolExecutor) -> None:
+        """Drop a broken pool so the next job starts a fresh one"""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._discard_executor(wait=False, cancel=True)
+
+    def _retire_executor(self, executor: ProcessPoolExecutor, hung: Future) -> None:
+        """
+        Stop using a pool with a hung worker and kill it in the background
+
+        ProcessPoolExecutor cannot stop a single worker, so the pool's other
+        jobs are given the usual time limit to finish before all of its
+        workers, the hung one included, are terminated.
+        """
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+            others = self._in_flight.get(executor, set()) - {hung}
+        threading.Thread(
+            target=self._close_retired_executor,
+            args=(executor, others),
+            name="render-pool-retire",
+            daemon=True
+        ).start()
+
+    def _close_retired_executor(self, executor: ProcessPoolExecutor, jobs: Set[Future]) -> None:
+        """Wait for a retired pool's remaining jobs, then kill the pool"""
+        wait_for_futures(jobs, timeout=self.timeout)
+        self._terminate_executor(executor)
+
+    def _terminate_executor(self, executor: ProcessPoolExecutor) -> None:
+        """Kill every worker of a pool; a hung worker never returns on its own"""
+        for process in list((getattr(executor, '_processes', None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._in_flight.pop(executor, None)
+
+    def _discard_executor(self, wait: bool, cancel: bool = False) -> None:
+        """Shut down the current pool; caller must hold the lock"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=cancel)
+            self._in_flight.pop(self._executor, None)
+            self._executor = None
@@ -0,0 +1,185 @@
+"""Rolling latency histograms of the render pipeline"""
+import os
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from src.domain.services.stage_timer import NULL_TIMER, StageTimer
+
+# Histogram bucket upper bounds, in milliseconds
+BUCKETS_MS: Tuple[float, ...] = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class StageHistogram:
+    """
+    Latency distribution of one stage
+
+    Bucket counts and the sum are cumulative since start, as Prometheus
+    expects; percentiles are taken over the last window observations only,
+    so they follow the current load.
+    """
+
+    def __init__(self, window: int = 512):
+        """
+        Initialize histogram
+
+        Args:
+            window: Recent observations kept for percentiles
+        """
+        self.bucket_counts = [0] * len(BUCKETS_MS)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.bytes_total = 0
+        self.recent: Deque[float] = deque(maxlen=max(1, window))
+
+    def observe(self, ms: float, size: int = 0) -> None:
+        """Add one observation"""
+        for index, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.bucket_counts[index] += 1
+                break
+        self.count += 1
+        self.sum_ms += ms
+        self.bytes_total += size
+        self.recent.append(ms)
+
+    def summary(self) -> Dict[str, Any]:
+        """Get count, mean, recent percentiles and bytes produced"""
+        recent = sorted(self.recent)
+        return {
+            'count': self.count,
+            'avg_ms': round(self.sum_ms / self.count, 3) if self.count else 0.0,
+            'p50_ms': round(_percentile(recent, 0.50), 3),
+            'p95_ms': round(_percentile(recent, 0.95), 3),
+            'p99_ms': round(_percentile(recent, 0.99), 3),
+            'max_ms': round(recent[-1], 3) if recent else 0.0,
+            'bytes_total': self.bytes_total
+        }
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted values, 0 if there are none"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class RenderMetrics:
+    """
+    Collects the stage timings of every request
+
+    When disabled, start_request() hands out the shared no-op timer and
+    record() returns at once, so instrumented code costs a few attribute
+    lookups per stage. When a metrics file is set, it is rewritten in
+    Prometheus text format after every request.
+    """
+
+    def __init__(self, enabled: bool = False, window: int = 512, metrics_path: Optional[Path] = None):
+        """
+        Initialize metrics
+
+        Args:
+            enabled: Whether requests are timed
+            window: Recent observations per stage kept for percentiles
+            metrics_path: Prometheus text file to keep up to date, if any
+        """
+        self.enabled = enabled
+        self.window = window
+        self.metrics_path = Path(metrics_path) if metrics_path else None
+        self.requests = 0
+        self._histograms: Dict[str, StageHistogram] = {}
+        self._lock = threading.Lock()
+
+    def start_request(self) -> StageTimer:
+        """Get a timer for a new request, the no-op timer when disabled"""
+        return StageTimer() if self.enabled else NULL_TIMER
+
+    def record(self, timer: StageTimer) -> None:
+        """
+        Add a finished request's timings to the histograms
+
+        Args:
+            timer: Timer returned by start_request
+        """
+        if not timer.enabled:
+            return
+        with self._lock:
+            self.requests += 1
+            self._observe('total', timer.elapsed_ms())
+            for name, ms in timer.stages_ms.items():
+                self._observe(name, ms, timer.bytes.get(name, 0))
+        if self.metrics_path is not None:
+            self.write_prometheus(self.metrics_path)
+
+    def _observe(self, name: str, ms: float, size: int = 0) -> None:
+        """Add an observation to a stage's histogram; caller must hold the lock"""
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = StageHistogram(self.window)
+        histogram.observe(ms, size)
+
+    def summary(self) -> Dict[str, Any]:
+        """Get per-stage counts, mean and recent percentiles"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'requests': self.requests,
+                'stages': {name: h.summary() for name, h in self._histograms.items()}
+            }
+
+    def to_prometheus(self) -> str:
+        """Render the histograms in Prometheus text exposition format"""
+        lines = [
+            "# HELP diagram_requests_total Diagram requests timed.",
+            "# TYPE diagram_requests_total counter",
+        ]
+        with self._lock:
+            lines.append(f"diagram_requests_total {self.requests}")
+            lines += [
+                "# HELP diagram_stage_duration_seconds Time spent in each render pipeline stage.",
+                "# TYPE diagram_stage_duration_seconds histogram",
+            ]
+            for name, histogram in self._histograms.items():
+                cumulative = 0
+                for bound, count in zip(BUCKETS_MS, histogram.bucket_counts):
+                    cumulative += count
+                    lines.append(
+                        f'diagram_stage_duration_seconds_bucket{{stage="{name}",le="{bound / 1000:g}"}} {cumulative}'
+                    )
+                lines.append(f'diagram_stage_duration_seconds_bucket{{stage="{name}",le="+Inf"}} {histogram.count}')
+                lines.append(f'diagram_stage_duration_seconds_sum{{stage="{name}"}} {histogram.sum_ms / 1000:.6f}')
+                lines.append(f'diagram_stage_duration_seconds_count{{stage="{name}"}} {histogram.count}')
+            lines += [
+                "# HELP diagram_stage_bytes_total Bytes produced by each render pipeline stage.",
+                "# TYPE diagram_stage_bytes_total counter",
+            ]
+            for name, histogram in self._histograms.items():
+                if histogram.bytes_total:
+                    lines.append(f'diagram_stage_bytes_total{{stage="{name}"}} {histogram.bytes_total}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path) -> None:
+        """Write the metrics file atomically, for a textfile collector to pick up"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(self.to_prometheus(), encoding='utf-8')
+        os.replace(tmp_path, path)
+
+
+def create_render_metrics() -> RenderMetrics:
+    """
+    Create metrics configured by environment variables
+
+    DIAGRAM_METRICS=on turns timing on; setting DIAGRAM_METRICS_FILE also
+    does, and keeps that file up to date. DIAGRAM_METRICS_WINDOW sets how
+    many recent requests percentiles are taken over (default 512).
+    """
+    metrics_path = os.getenv('DIAGRAM_METRICS_FILE')
+    enabled = bool(metrics_path) or os.getenv('DIAGRAM_METRICS', 'off').lower() in ('on', '1', 'true')
+    return RenderMetrics(
+        enabled=enabled,
+        window=int(os.getenv('DIAGRAM_METRICS_WINDOW', '512')),
+        metrics_path=Path(metrics_path) if metrics_path else None
+    )
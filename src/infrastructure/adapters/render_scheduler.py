@@ -0,0 +1,170 @@
+"""Admission control and ordering of renders"""
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+from src.domain.value_objects.diagram_specification import DiagramSpecification
+
+# Relative layout cost of each part of a spec; dot's layout time grows with
+# edges and nested clusters faster than with plain nodes
+COMPONENT_COST = 1
+CONNECTION_COST = 2
+CLUSTER_COST = 4
+
+
+def estimate_render_cost(spec: DiagramSpecification) -> int:
+    """
+    Estimate how expensive a specification is to render
+
+    Args:
+        spec: Specification to render
+
+    Returns:
+        Weighted count of components, connections and clusters
+    """
+    return (
+        COMPONENT_COST * len(spec.components)
+        + CONNECTION_COST * len(spec.connections)
+        + CLUSTER_COST * len(spec.clusters)
+    )
+
+
+def get_scheduler_limits() -> Tuple[int, int]:
+    """
+    Render concurrency and queue size configured by environment variables
+
+    DIAGRAM_RENDER_CONCURRENCY renders run at once (default: one per render
+    worker, DIAGRAM_RENDER_WORKERS, or one in-process) and up to
+    DIAGRAM_RENDER_QUEUE_SIZE more wait (default 16).
+    """
+    max_concurrent = int(os.getenv(
+        'DIAGRAM_RENDER_CONCURRENCY', os.getenv('DIAGRAM_RENDER_WORKERS', '1')
+    ))
+    max_queued = int(os.getenv('DIAGRAM_RENDER_QUEUE_SIZE', '16'))
+    return max(1, max_concurrent), max(0, max_queued)
+
+
+def create_render_scheduler() -> 'RenderScheduler':
+    """Create a scheduler with the limits from get_scheduler_limits"""
+    max_concurrent, max_queued = get_scheduler_limits()
+    return RenderScheduler(max_concurrent=max_concurrent, max_queued=max_queued)
+
+
+class RenderQueueFullError(RuntimeError):
+    """Raised when a render is refused because the queue is full"""
+
+    def __init__(self, queued: int, running: int):
+        super().__init__(
+            f"Server busy: {running} render(s) running and {queued} queued, try again shortly"
+        )
+        self.queued = queued
+        self.running = running
+
+
+class RenderScheduler:
+    """
+    Bounds concurrent renders and orders waiting ones cheapest first
+
+    At most max_concurrent renders run at once. Further renders wait in a
+    queue of at most max_queued entries, and are started by estimated cost,
+    then by arrival, so a small diagram does not wait behind a burst of
+    large ones. A render arriving at a full queue is refused at once with
+    RenderQueueFullError instead of piling up.
+    """
+
+    def __init__(self, max_concurrent: int = 1, max_queued: int = 16):
+        """
+        Initialize scheduler
+
+        Args:
+            max_concurrent: Renders allowed to run at once
+            max_queued: Renders allowed to wait; 0 refuses any render that
+                       cannot start immediately
+        """
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queued = max(0, max_queued)
+        self._queue: List[List[Any]] = []
+        self._sequence = itertools.count()
+        self._running = 0
+        self._condition = threading.Condition()
+        self.admitted = 0
+        self.rejected = 0
+        self.queued_total = 0
+        self.peak_queued = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @contextmanager
+    def slot(self, cost: int) -> Iterator[float]:
+        """
+        Hold a render slot for the duration of a with block
+
+        Args:
+            cost: Estimated cost of the render, see estimate_render_cost
+
+        Yields:
+            Seconds spent waiting for the slot
+
+        Raises:
+            RenderQueueFullError: If the render can neither start nor wait
+        """
+        waited = self._acquire(cost)
+        try:
+            yield waited
+        finally:
+            self._release()
+
+    def _acquire(self, cost: int) -> float:
+        """Take a slot, waiting in the queue if none is free; returns the wait"""
+        with self._condition:
+            if self._running < self.max_concurrent and not self._queue:
+                self._running += 1
+                self.admitted += 1
+                return 0.0
+
+            if len(self._queue) >= self.max_queued:
+                self.rejected += 1
+                raise RenderQueueFullError(len(self._queue), self._running)
+
+            start = time.perf_counter()
+            ticket = [cost, next(self._sequence)]
+            heapq.heappush(self._queue, ticket)
+            self.queued_total += 1
+            self.peak_queued = max(self.peak_queued, len(self._queue))
+            while self._running >= self.max_concurrent or self._queue[0] is not ticket:
+                self._condition.wait()
+            heapq.heappop(self._queue)
+            self._running += 1
+            self.admitted += 1
+
+            waited = time.perf_counter() - start
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            # Another slot may still be free for the next ticket in line
+            self._condition.notify_all()
+            return waited
+
+    def _release(self) -> None:
+        """Free a slot and wake the waiting renders"""
+        with self._condition:
+            self._running -= 1
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get running and queued renders, admissions, rejections and queue wait times"""
+        with self._condition:
+            return {
+                'running': self._running,
+                'queued': len(self._queue),
+                'max_concurrent': self.max_concurrent,
+                'max_queued': self.max_queued,
+                'peak_queued': self.peak_queued,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'wait_ms_avg': round(self.total_wait * 1000 / self.queued_total, 2) if self.queued_total else 0.0,
+                'wait_ms_max': round(self.max_wait * 1000, 2)
+            }
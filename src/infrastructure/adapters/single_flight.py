@@ -0,0 +1,79 @@
+"""Coalescing of identical concurrent calls"""
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+class _Call:
+    """A call in progress that later callers with the same key wait for"""
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Runs a call once for all concurrent callers that use the same key
+
+    The first caller for a key runs the function; callers that arrive while
+    it is running wait and receive its result, or its exception. Once the
+    call returns the key is released, so results are not kept: pair this
+    with a cache that the function fills before returning.
+    """
+
+    def __init__(self):
+        """Initialize with no calls in progress"""
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key: str, func: Callable[[], T]) -> Tuple[T, bool]:
+        """
+        Run func, or wait for the call already running for key
+
+        Args:
+            key: Identity of the call, e.g. a canonical spec hash
+            func: Function to run if no call for key is in progress
+
+        Returns:
+            func's result, and whether it came from another caller's call
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> Dict[str, Any]:
+        """Get calls run, calls that joined one in progress, and calls in progress"""
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'executed': self.executed,
+                'shared': self.shared
+            }
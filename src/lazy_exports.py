@@ -0,0 +1,29 @@
+"""Attributes of a package imported on first access"""
+import sys
+from importlib import import_module
+from typing import Any, Callable, Dict, Tuple
+
+
+def make_lazy_getattr(module_name: str, exports: Dict[str, Tuple[str, str]]) -> Callable[[str], Any]:
+    """
+    Build a module __getattr__ that imports exported names on first access
+
+    Each value is stored in the module once imported, so later accesses do
+    not go through __getattr__ again.
+
+    Args:
+        module_name: Package the function is installed in, its __name__
+        exports: Module (relative to the package) and attribute of each exported name
+
+    Returns:
+        Function to assign to the package's __getattr__
+    """
+    def __getattr__(name: str) -> Any:
+        if name not in exports:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        relative_module, attribute = exports[name]
+        value = getattr(import_module(relative_module, module_name), attribute)
+        setattr(sys.modules[module_name], name, value)
+        return value
+
+    return __getattr__
@@ -0,0 +1,15 @@
+"""Shared test configuration"""
+import pytest
+
+
+@pytest.fixture(scope="session")
+def catalog_cache_dir(tmp_path_factory):
+    """Cache directory shared by the whole test session"""
+    return tmp_path_factory.mktemp("catalog-cache")
+
+
+@pytest.fixture(autouse=True)
+def isolated_catalog_cache(catalog_cache_dir, monkeypatch):
+    """Keep compiled catalogs and generated files out of the user cache directory"""
+    monkeypatch.setenv("DIAGRAM_CATALOG_PATH", str(catalog_cache_dir / "catalog.bin"))
+    monkeypatch.setenv("DIAGRAM_CATALOG_DIR", str(catalog_cache_dir))
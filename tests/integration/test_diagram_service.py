@@ -1,10 +1,20 @@
 """Integration tests for DiagramService"""
 import pytest
+import asyncio
+import json
 import tempfile
+import threading
+import time
 from pathlib import Path
+from unittest.mock import Mock
+
+from PIL import Image
 
 from src.application.services.diagram_service import DiagramService
+from src.application.mcp.tools.registry import ToolRegistry
 from src.infrastructure.adapters.filesystem_storage import FilesystemDiagramStorage
+from src.infrastructure.adapters.render_metrics import RenderMetrics
+from src.infrastructure.adapters.render_scheduler import RenderScheduler
 from tests.fixtures.diagram_specs import (
     SIMPLE_AWS_SPEC,
     MULTICLOUD_SPEC,
@@ -39,6 +49,72 @@ class TestDiagramServiceIntegration:
         assert result['image_base64'] is not None
         assert result['image_size_mb'] > 0
     
+    def test_renders_at_target_size(self, temp_storage, monkeypatch):
+        """Test the rendered file already fits the output size, so it is not resized"""
+        monkeypatch.setenv('DIAGRAM_MAX_WIDTH', '400')
+        monkeypatch.setenv('DIAGRAM_MAX_HEIGHT', '300')
+        service = DiagramService(storage=temp_storage)
+        
+        result = service.create_diagram_from_spec(CLUSTERED_SPEC)
+        
+        with Image.open(result['file_path']) as img:
+            assert img.width <= 400 and img.height <= 300
+            assert max(img.width / 400, img.height / 300) > 0.95
+    
+    def test_multiple_output_formats(self, service):
+        """Test every requested format is written and returned"""
+        result = service.create_diagram_from_spec({**CLUSTERED_SPEC, 'output_formats': ['svg', 'pdf', 'dot']})
+        
+        assert result['success'] is True
+        assert set(result['output_files']) == {'png', 'svg', 'pdf', 'dot'}
+        assert result['output_files']['png'] == result['file_path']
+        for path in result['output_files'].values():
+            assert Path(path).exists()
+        assert Path(result['output_files']['pdf']).read_bytes().startswith(b'%PDF')
+    
+    def test_wrong_category_is_corrected(self, service):
+        """Test a node under the wrong category is found and the fix reported"""
+        spec = {
+            "title": "Misplaced",
+            "provider": "aws",
+            "components": [
+                {"id": "web", "type": "EC2", "category": "compute"},
+                {"id": "db", "type": "RDS", "category": "compute"}
+            ],
+            "connections": [{"from": "web", "to": "db"}]
+        }
+        result = service.create_diagram_from_spec(spec)
+        
+        assert result['success'] is True
+        assert result['corrections'] == [{
+            'component_id': 'db',
+            'from': 'aws/compute/RDS',
+            'to': 'aws/database/RDS',
+            'match': 'relocated'
+        }]
+        assert service.create_diagram_from_spec(SIMPLE_AWS_SPEC)['corrections'] is None
+    
+    def test_common_names_are_mapped(self, service):
+        """Test synonyms and class aliases render as the catalog node they stand for"""
+        spec = {
+            "title": "Common Names",
+            "provider": "aws",
+            "components": [
+                {"id": "lb", "type": "Load Balancer", "category": "network"},
+                {"id": "files", "type": "S3 bucket", "category": "storage"},
+                {"id": "cdn", "type": "CF", "category": "network"}
+            ],
+            "connections": [{"from": "cdn", "to": "lb"}]
+        }
+        result = service.create_diagram_from_spec(spec)
+        
+        assert result['success'] is True
+        assert {c['component_id']: (c['to'], c['match']) for c in result['corrections']} == {
+            'lb': ('aws/network/ElasticLoadBalancing', 'alias'),
+            'files': ('aws/storage/SimpleStorageServiceS3Bucket', 'alias'),
+            'cdn': ('aws/network/CloudFront', 'alias')
+        }
+    
     def test_create_multicloud_diagram(self, service):
         """Test creating a multi-cloud diagram"""
         result = service.create_diagram_from_spec(MULTICLOUD_SPEC)
@@ -66,6 +142,62 @@ class TestDiagramServiceIntegration:
         assert "Simple_AWS_Architecture" in file_path.name
         assert file_path.name[-19:-4].replace('_', '').isdigit()  # timestamp
     
+    def test_same_title_in_same_second_keeps_both_files(self, service, monkeypatch):
+        """Test an edit rendered in the same second does not overwrite a cached file"""
+        from datetime import datetime
+        from src.infrastructure.adapters import diagram_builder
+        
+        class FrozenDatetime:
+            @staticmethod
+            def now():
+                return datetime(2024, 1, 1, 12, 0, 0)
+        
+        monkeypatch.setattr(diagram_builder, 'datetime', FrozenDatetime)
+        
+        first = service.create_diagram_from_spec(CLUSTERED_SPEC, image_format='path')
+        first_png = Path(first['file_path']).read_bytes()
+        edited = service.update_diagram(
+            first['diagram_id'], {"remove_components": ["db2", "web2"]}, image_format='path'
+        )
+        again = service.create_diagram_from_spec(CLUSTERED_SPEC, image_format='path')
+        
+        assert edited['file_path'] != first['file_path']
+        assert again['cached'] is True
+        assert again['file_path'] == first['file_path']
+        assert Path(again['file_path']).read_bytes() == first_png
+    
+    def test_relabeled_spec_reuses_layout(self, service):
+        """Test the default builder draws a label-only edit from the cached layout"""
+        service.create_diagram_from_spec(SIMPLE_AWS_SPEC)
+        relabeled = json.loads(json.dumps(SIMPLE_AWS_SPEC))
+        relabeled['components'][0]['label'] = "Frontend"
+        relabeled['connections'][0]['color'] = "red"
+        
+        result = service.create_diagram_from_spec(relabeled)
+        
+        assert result['success'] is True
+        assert service.diagram_builder.layout_cache.stats()['hits'] == 1
+    
+    def test_shutdown_saves_module_usage_once(self, temp_storage, tmp_path, monkeypatch):
+        """Test shutdown saves the learned module usage and drops the exit hook"""
+        from src.application.services import diagram_service
+        exit_hooks = Mock()
+        monkeypatch.setattr(diagram_service, 'atexit', exit_hooks)
+        monkeypatch.setenv('DIAGRAM_WARMUP_MODULES', '')
+        monkeypatch.setenv('DIAGRAM_WARMUP_LEARNED', '0')
+        service = DiagramService(storage=temp_storage)
+        service.module_warmer.usage_path = tmp_path / "usage.json"
+        
+        service.start_warmup()
+        service.create_diagram_from_spec(SIMPLE_AWS_SPEC, image_format='path')
+        service.shutdown()
+        
+        save_usage = service.module_warmer.save_usage
+        exit_hooks.register.assert_called_once_with(save_usage)
+        exit_hooks.unregister.assert_called_once_with(save_usage)
+        assert set(json.loads((tmp_path / "usage.json").read_text())) == {"aws.compute", "aws.database"}
+        assert not service.node_loader.module_usage
+    
     def test_error_handling_invalid_spec(self, service):
         """Test error handling with invalid spec"""
         invalid_spec = {"invalid": "spec"}
@@ -187,4 +319,276 @@ class TestDiagramServiceIntegration:
         result = service.create_diagram_from_spec(spec)
         # Should succeed with generic fallback
         assert result['success'] is True
+        assert [i['code'] for i in result['issues']] == ['unknown_node_type']
+        assert result['issues'][0]['severity'] == 'warning'
+    
+    def test_invalid_spec_is_rejected_before_rendering(self, service, temp_storage):
+        """Test structural errors are all reported and nothing is rendered"""
+        spec = {
+            "title": "Broken Spec",
+            "provider": "aws",
+            "components": [
+                {"id": "web", "type": "EC2", "category": "compute"},
+                {"id": "web", "type": "RDS", "category": "database"}
+            ],
+            "connections": [{"from": "web", "to": "db"}],
+            "clusters": [{"name": "App", "components": ["web", "cache"]}]
+        }
+        
+        result = service.create_diagram_from_spec(spec)
+        
+        assert result['success'] is False
+        assert [i['location'] for i in result['issues']] == [
+            'components[1].id', 'connections[0].to', 'clusters[0].components[1]'
+        ]
+        assert not list(temp_storage.get_output_directory().iterdir())
+    
+    def test_component_in_several_clusters_is_drawn_once(self, service):
+        """Test a component listed in two clusters renders in the first with a warning"""
+        spec = json.loads(json.dumps(SIMPLE_AWS_SPEC))
+        spec['clusters'] = [
+            {"name": "Front", "components": ["web1"]},
+            {"name": "Back", "components": ["db1", "web1"]}
+        ]
+        spec['output_formats'] = ['dot']
+        
+        result = service.create_diagram_from_spec(spec)
+        
+        assert result['success'] is True
+        assert [(i['code'], i['severity']) for i in result['issues']] == [
+            ('component_in_several_clusters', 'warning')
+        ]
+        source = Path(result['output_files']['dot']).read_text()
+        declarations = [line for line in source.splitlines() if line.split()[:1] == ['web1'] and '->' not in line]
+        assert len(declarations) == 1
+
 
+
+class TestDiagramServiceRenderCache:
+    """Tests for render result caching, with graphviz stubbed out"""
+    
+    @pytest.fixture
+    def service(self, tmp_path):
+        """Create a service whose builder writes a placeholder PNG"""
+        service = DiagramService(storage=FilesystemDiagramStorage(custom_path=str(tmp_path)))
+        
+        def fake_build(spec):
+            path = tmp_path / f"{spec.title.replace(' ', '_')}.png"
+            Image.new('RGB', (40, 30), 'white').save(path)
+            return str(path)
+        
+        service.diagram_builder.build = Mock(side_effect=fake_build)
+        return service
+    
+    def test_identical_spec_is_served_from_cache(self, service):
+        """Test a resubmitted spec does not render again"""
+        first = service.create_diagram_from_spec(SIMPLE_AWS_SPEC)
+        second = service.create_diagram_from_spec(dict(SIMPLE_AWS_SPEC))
+        
+        assert first['cached'] is False
+        assert second['cached'] is True
+        assert second['file_path'] == first['file_path']
+        assert second['image_base64'] == first['image_base64']
+        assert service.diagram_builder.build.call_count == 1
+        assert service.get_render_cache_stats()['hits'] == 1
+    
+    def test_path_only_skips_image_optimization(self, service):
+        """Test the image is not optimized when only the path is requested"""
+        service.image_optimizer.encode = Mock(wraps=service.image_optimizer.encode)
+        
+        result = service.create_diagram_from_spec(SIMPLE_AWS_SPEC, image_format='path')
+        
+        assert result['success'] is True
+        assert result['image_base64'] is None
+        service.image_optimizer.encode.assert_not_called()
+        
+        cached = service.create_diagram_from_spec(SIMPLE_AWS_SPEC, image_format='bytes')
+        assert cached['cached'] is True
+        assert cached['image_bytes'].startswith(b'\x89PNG')
+        service.image_optimizer.encode.assert_called_once()
+    
+    def test_unknown_image_format(self, service):
+        """Test an unknown image format fails before rendering"""
+        result = service.create_diagram_from_spec(SIMPLE_AWS_SPEC, image_format='jpeg')
+        
+        assert result['success'] is False
+        assert 'Unknown image format' in result['error']
+        service.diagram_builder.build.assert_not_called()
+    
+    def test_concurrent_identical_specs_render_once(self, service):
+        """Test a retried call made during a render joins it"""
+        started, release = threading.Event(), threading.Event()
+        build = service.diagram_builder.build.side_effect
+        
+        def slow_build(spec):
+            started.set()
+            release.wait(5)
+            return build(spec)
+        
+        service.diagram_builder.build.side_effect = slow_build
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                service.create_diagram_from_spec(SIMPLE_AWS_SPEC, image_format='path')
+            ))
+            for _ in range(2)
+        ]
+        threads[0].start()
+        started.wait(5)
+        threads[1].start()
+        while service.get_in_flight_stats()['shared'] < 1:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        
+        assert service.diagram_builder.build.call_count == 1
+        assert sorted(r['shared'] for r in results) == [False, True]
+        assert results[0]['file_path'] == results[1]['file_path']
+    
+    def test_busy_render_is_refused(self, service):
+        """Test a render is refused with a busy result when no slot or queue space is left"""
+        service.render_scheduler = RenderScheduler(max_concurrent=1, max_queued=0)
+        
+        with service.render_scheduler.slot(1):
+            result = service.create_diagram_from_spec(SIMPLE_AWS_SPEC)
+        
+        assert result['success'] is False
+        assert result['busy'] is True
+        assert 'Server busy' in result['error']
+        service.diagram_builder.build.assert_not_called()
+        assert service.get_render_queue_stats()['rejected'] == 1
+        
+        assert service.create_diagram_from_spec(SIMPLE_AWS_SPEC)['success'] is True
+    
+    def test_stage_timings(self, service):
+        """Test each stage of a request is timed when metrics are on"""
+        assert service.create_diagram_from_spec(SIMPLE_AWS_SPEC)['timings'] is None
+        
+        service.render_metrics = RenderMetrics(enabled=True)
+        result = service.create_diagram_from_spec({**SIMPLE_AWS_SPEC, 'layout': 'vertical'})
+        
+        stages = result['timings']['stages_ms']
+        assert set(stages) >= {'parse', 'validate', 'resolve', 'queue_wait', 'render', 'optimize', 'base64'}
+        assert result['timings']['bytes']['base64'] == len(result['image_base64'])
+        assert service.get_render_metrics()['stages']['render']['count'] == 1
+    
+    def test_changed_spec_renders_again(self, service):
+        """Test any spec change produces a new render"""
+        service.create_diagram_from_spec(SIMPLE_AWS_SPEC)
+        service.create_diagram_from_spec({**SIMPLE_AWS_SPEC, 'layout': 'vertical'})
+        
+        assert service.diagram_builder.build.call_count == 2
+
+
+class TestDiagramServiceUpdate:
+    """Tests for incremental re-rendering, with graphviz stubbed out"""
+    
+    @pytest.fixture
+    def service(self, tmp_path):
+        """Create a service whose builder records the previous spec it gets"""
+        service = DiagramService(storage=FilesystemDiagramStorage(custom_path=str(tmp_path)))
+        
+        def fake_build(spec, previous=None):
+            path = tmp_path / f"{len(spec.components)}_{len(spec.connections)}.png"
+            Image.new('RGB', (40, 30), 'white').save(path)
+            return str(path)
+        
+        service.diagram_builder.build = Mock(side_effect=fake_build)
+        return service
+    
+    def test_update_applies_changes_to_stored_spec(self, service):
+        """Test an update re-renders the previous spec plus the delta"""
+        first = service.create_diagram_from_spec(CLUSTERED_SPEC)
+        updated = service.update_diagram(first['diagram_id'], {
+            'add_components': [{'id': 'cache', 'type': 'ElastiCache', 'category': 'database'}],
+            'add_connections': [{'from': 'web1', 'to': 'cache'}],
+            'remove_components': ['db2']
+        })
+        
+        assert updated['success'] is True
+        assert updated['components_count'] == 5
+        assert updated['connections_count'] == 5
+        assert updated['diagram_id'] != first['diagram_id']
+        
+        spec, previous = service.diagram_builder.build.call_args.args
+        original_ids = [c['id'] for c in CLUSTERED_SPEC['components']]
+        assert [c.id for c in previous.components] == original_ids
+        assert [c.id for c in spec.components] == [i for i in original_ids if i != 'db2'] + ['cache']
+    
+    def test_updates_can_be_chained(self, service):
+        """Test the ID returned by an update can be updated again"""
+        first = service.create_diagram_from_spec(SIMPLE_AWS_SPEC)
+        second = service.update_diagram(first['diagram_id'], {'remove_connections': [{'from': 'web1', 'to': 'db1'}]})
+        third = service.update_diagram(second['diagram_id'], {'remove_components': ['db1']})
+        
+        assert third['success'] is True
+        assert third['components_count'] == 1
+        assert third['connections_count'] == 0
+    
+    def test_unknown_diagram_id(self, service):
+        """Test updating a diagram that was never rendered fails cleanly"""
+        result = service.update_diagram('0123456789abcdef', {'remove_components': ['web1']})
+        
+        assert result['success'] is False
+        assert 'Unknown diagram ID' in result['error']
+        service.diagram_builder.build.assert_not_called()
+
+
+class TestToolRenderAdmission:
+    """Tests for render admission through the async MCP tools, with graphviz stubbed out"""
+    
+    @staticmethod
+    def _spec(title, size):
+        """Spec with a chain of size components"""
+        return json.dumps({
+            "title": title,
+            "provider": "aws",
+            "components": [
+                {"id": f"n{i}", "type": "EC2", "category": "compute"} for i in range(size)
+            ],
+            "connections": [{"from": f"n{i}", "to": f"n{i + 1}"} for i in range(size - 1)]
+        })
+    
+    def test_burst_is_ordered_by_cost_and_overflow_refused(self, tmp_path, monkeypatch):
+        """Test queued tool calls reach the scheduler: cheapest first, full queue refused"""
+        monkeypatch.delenv('DIAGRAM_TOOL_THREADS', raising=False)
+        monkeypatch.setenv('DIAGRAM_RENDER_CONCURRENCY', '1')
+        monkeypatch.setenv('DIAGRAM_RENDER_QUEUE_SIZE', '5')
+        service = DiagramService(storage=FilesystemDiagramStorage(custom_path=str(tmp_path)))
+        release = threading.Event()
+        built = []
+        
+        def fake_build(spec):
+            if not built:
+                release.wait(5)
+            built.append(spec.title)
+            path = tmp_path / f"{spec.title}.png"
+            Image.new('RGB', (40, 30), 'white').save(path)
+            return str(path)
+        
+        service.diagram_builder.build = Mock(side_effect=fake_build)
+        create = ToolRegistry(service).get_tool_methods()['create_diagram_from_json']
+        
+        async def wait_for(key, value):
+            async def poll():
+                while service.get_render_queue_stats()[key] < value:
+                    await asyncio.sleep(0.001)
+            await asyncio.wait_for(poll(), 5)
+        
+        async def main():
+            tasks = [asyncio.ensure_future(create(self._spec("big0", 8)))]
+            await wait_for('running', 1)
+            for title, size in (("big1", 8), ("big2", 8), ("big3", 8), ("big4", 8), ("small", 1)):
+                tasks.append(asyncio.ensure_future(create(self._spec(title, size))))
+            await wait_for('queued', 5)
+            refused = await create(self._spec("big5", 8))
+            release.set()
+            return refused, await asyncio.gather(*tasks)
+        
+        refused, responses = asyncio.run(main())
+        
+        assert "Server busy" in refused
+        assert all(r.startswith("✅") for r in responses)
+        assert built == ["big0", "small", "big1", "big2", "big3", "big4"]
+        assert service.get_render_queue_stats()['rejected'] == 1
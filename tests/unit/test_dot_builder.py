@@ -0,0 +1,280 @@
+"""Tests for DotBuilder"""
+import json
+import re
+import pytest
+from pathlib import Path
+
+from src.domain.services.node_resolver import NodeResolver
+from src.domain.value_objects.diagram_specification import DiagramSpecification
+from src.domain.value_objects.specification_delta import SpecificationDelta
+from src.infrastructure.adapters.diagram_builder import DiagramBuilder
+from src.infrastructure.adapters.dot_builder import DotBuilder
+from src.infrastructure.adapters import graphviz_renderer
+from src.infrastructure.adapters.graphviz_renderer import GraphvizRenderer
+from src.infrastructure.adapters.layout_cache import LayoutCache
+from src.infrastructure.adapters.node_class_loader import NodeClassLoader
+from src.infrastructure.adapters.provider_repository import ProviderRepository
+from tests.fixtures.diagram_specs import SIMPLE_AWS_SPEC, MULTICLOUD_SPEC, CLUSTERED_SPEC
+
+
+class CapturingRenderer(GraphvizRenderer):
+    """Records the DOT source instead of running graphviz"""
+
+    def __init__(self):
+        self.sources = []
+
+    def render(self, source, fmt="png", engine="dot"):
+        self.sources.append(source)
+        if fmt == "json":
+            return json.dumps(self._fake_layout(source)).encode()
+        return b"image"
+
+    @staticmethod
+    def _fake_layout(source):
+        """Place every node on a diagonal and route edges straight"""
+        names = re.findall(r'^\t+"?([^" \t]+)"? \[label', source, re.M)
+        edges = re.findall(r'^\t"?([^" ]+)"? -> "?([^" ]+)"? \[', source, re.M)
+        return {
+            "bb": "0,0,500,500",
+            "objects": [{"_gvid": i, "name": n, "pos": f"{i * 10},{i * 10}"} for i, n in enumerate(names)],
+            "edges": [{"_gvid": i, "pos": f"e,{i},{i} {i},{i}"} for i in range(len(edges))]
+        }
+
+
+def diagrams_dot_source(resolver: NodeResolver, output_dir, spec: DiagramSpecification) -> str:
+    """Get the DOT source DiagramBuilder produces"""
+    renderer = CapturingRenderer()
+    DiagramBuilder(resolver, output_dir, renderer=renderer).build(spec)
+    return renderer.sources[0]
+
+
+class TestDotBuilder:
+    """Tests for DotBuilder"""
+
+    @pytest.fixture
+    def resolver(self):
+        return NodeResolver(NodeClassLoader(), ProviderRepository())
+
+    @pytest.mark.parametrize("spec_dict", [SIMPLE_AWS_SPEC, MULTICLOUD_SPEC, CLUSTERED_SPEC])
+    def test_matches_diagrams_output(self, resolver, tmp_path, spec_dict):
+        """Test the DOT source equals the diagrams library's, up to node names"""
+        spec = DiagramSpecification.from_dict(spec_dict)
+        expected = diagrams_dot_source(resolver, tmp_path, spec)
+        actual = DotBuilder(resolver, tmp_path).to_dot(spec)
+
+        # diagrams names nodes with random UUIDs; map them to our names in order
+        random_ids = re.findall(r'^\t+"?([0-9a-f]{32})"? \[label', expected, re.M)
+        names = re.findall(r'^\t+"?([^" ]+)"? \[label', actual, re.M)
+        assert len(random_ids) == len(names)
+        for random_id, name in zip(random_ids, names):
+            expected = expected.replace(f'"{random_id}"', name).replace(random_id, name)
+
+        assert actual == expected
+
+    def test_deterministic_output(self, resolver, tmp_path):
+        """Test the same spec always yields the same source"""
+        spec = DiagramSpecification.from_dict(CLUSTERED_SPEC)
+        builder = DotBuilder(resolver, tmp_path)
+
+        assert builder.to_dot(spec) == builder.to_dot(spec)
+
+    def test_build_writes_rendered_image(self, resolver, tmp_path):
+        """Test build renders the generated source to a PNG file"""
+        renderer = CapturingRenderer()
+        builder = DotBuilder(resolver, tmp_path, renderer=renderer, layout_cache=LayoutCache(0))
+        spec = DiagramSpecification.from_dict(SIMPLE_AWS_SPEC)
+
+        path = builder.build(spec)
+
+        assert path.endswith(".png")
+        assert open(path, "rb").read() == b"image"
+        assert renderer.sources == [builder.to_dot(spec)]
+
+    def test_output_size_bounds_drawing(self, resolver, tmp_path):
+        """Test the output size becomes the graphviz size at the configured dpi"""
+        builder = DotBuilder(resolver, tmp_path, output_size=(1000, 800))
+        source = builder.to_dot(DiagramSpecification.from_dict(SIMPLE_AWS_SPEC))
+
+        assert 'size="6.6667,5.3333"' in source
+        assert builder.get_render_settings()["graph_attr"]["size"] == "6.6667,5.3333"
+
+    def test_build_writes_all_formats_from_one_layout(self, resolver, tmp_path):
+        """Test extra output formats are drawn from the same cached layout"""
+        renderer = CapturingRenderer()
+        builder = DotBuilder(resolver, tmp_path, renderer=renderer, layout_cache=LayoutCache())
+        spec = DiagramSpecification.from_dict(dict(SIMPLE_AWS_SPEC, output_formats=["svg", "dot"]))
+
+        path = builder.build(spec)
+
+        # one layout pass, then one pinned render per format
+        assert len(renderer.sources) == 4
+        for fmt in ("png", "svg", "dot"):
+            assert (tmp_path / Path(path).with_suffix(f".{fmt}").name).exists()
+
+    def test_skips_unknown_connection_endpoints(self, resolver, tmp_path):
+        """Test connections to missing components are dropped like DiagramBuilder does"""
+        spec = DiagramSpecification.from_dict({
+            "title": "Dangling",
+            "components": [{"id": "a", "type": "EC2", "category": "compute"}],
+            "connections": [{"from": "a", "to": "missing"}]
+        })
+
+        assert "->" not in DotBuilder(resolver, tmp_path).to_dot(spec)
+
+    def test_component_listed_twice_is_drawn_once(self, resolver, tmp_path):
+        """Test a repeated cluster member is emitted in its first listing only"""
+        spec = DiagramSpecification.from_dict({
+            "title": "Repeated",
+            "components": [{"id": "a", "type": "EC2", "category": "compute"}],
+            "clusters": [{"name": "One", "components": ["a", "a"]}, {"name": "Two", "components": ["a"]}]
+        })
+
+        source = DotBuilder(resolver, tmp_path).to_dot(spec)
+
+        assert len(re.findall(r"^\t+a \[", source, re.M)) == 1
+        assert source.index("\ta [") < source.index("cluster_Two")
+
+
+class TestDotBuilderLayoutCache:
+    """Tests for layout reuse across restyle-only edits"""
+
+    @pytest.fixture
+    def resolver(self):
+        return NodeResolver(NodeClassLoader(), ProviderRepository())
+
+    @pytest.fixture
+    def restyled_spec(self):
+        spec = json.loads(json.dumps(CLUSTERED_SPEC))
+        spec["components"][0]["label"] = "Renamed"
+        spec["connections"][0].update({"color": "red", "style": "dotted"})
+        spec["connections"][4]["label"] = "async replication"
+        return spec
+
+    def test_restyle_keeps_topology(self, resolver, tmp_path, restyled_spec):
+        """Test labels, colors and styles do not change the topology key"""
+        builder = DotBuilder(resolver, tmp_path)
+        original = DiagramSpecification.from_dict(CLUSTERED_SPEC)
+
+        assert builder.topology_key(original) == builder.topology_key(
+            DiagramSpecification.from_dict(restyled_spec)
+        )
+
+    def test_structural_edit_changes_topology(self, resolver, tmp_path):
+        """Test adding a connection changes the topology key"""
+        builder = DotBuilder(resolver, tmp_path)
+        original = DiagramSpecification.from_dict(CLUSTERED_SPEC)
+        edited = dict(CLUSTERED_SPEC, connections=CLUSTERED_SPEC["connections"] + [{"from": "lb", "to": "db2"}])
+
+        assert builder.topology_key(original) != builder.topology_key(
+            DiagramSpecification.from_dict(edited)
+        )
+
+    def test_restyle_reuses_layout(self, resolver, tmp_path, restyled_spec):
+        """Test a restyled spec renders from pinned positions without a new layout"""
+        renderer = CapturingRenderer()
+        builder = DotBuilder(resolver, tmp_path, renderer=renderer, layout_cache=LayoutCache())
+
+        builder.build(DiagramSpecification.from_dict(CLUSTERED_SPEC))
+        builder.build(DiagramSpecification.from_dict(restyled_spec))
+
+        # one layout pass for the first render, then pinned renders only
+        assert len(renderer.sources) == 3
+        assert builder.layout_cache.stats()["hits"] == 1
+        pinned = renderer.sources[-1]
+        assert 'web1 [label=Renamed' in pinned
+        assert 'pos="10,10!"' in pinned
+        assert 'color=red' in pinned and 'pos="e,0,0 0,0"' in pinned
+
+    @pytest.mark.skipif(not graphviz_renderer.PYGRAPHVIZ_AVAILABLE, reason="pygraphviz not installed")
+    def test_pinned_render_with_graphviz(self, resolver, tmp_path, restyled_spec):
+        """Test pinned layouts render to PNG with the real graphviz library"""
+        builder = DotBuilder(resolver, tmp_path, layout_cache=LayoutCache())
+        spec = DiagramSpecification.from_dict(CLUSTERED_SPEC)
+        layout = builder.compute_layout(spec)
+
+        assert set(layout["nodes"]) == {"lb", "web1", "web2", "db1", "db2"}
+        assert set(layout["clusters"]) == {"cluster_Web Tier", "cluster_Database Tier"}
+        assert len(layout["edges"]) == 5
+
+        image = builder.renderer.render(builder.to_dot(spec, layout), "png", "nop2")
+        assert image.startswith(b"\x89PNG")
+
+
+class TestDotBuilderIncrementalLayout:
+    """Tests for laying out an edited spec from the previous layout"""
+
+    @pytest.fixture
+    def resolver(self):
+        return NodeResolver(NodeClassLoader(), ProviderRepository())
+
+    @pytest.fixture
+    def edited_spec(self):
+        spec = DiagramSpecification.from_dict(CLUSTERED_SPEC)
+        return SpecificationDelta.from_dict({
+            "add_components": [
+                {"id": "cache", "type": "ElastiCache", "category": "database", "cluster": "Database Tier"},
+                {"id": "queue", "type": "SQS", "category": "integration"}
+            ],
+            "add_connections": [{"from": "web1", "to": "cache"}, {"from": "web2", "to": "queue"}],
+            "remove_components": ["db2"]
+        }).apply_to(spec)
+
+    def test_edit_keeps_existing_positions(self, resolver, tmp_path, edited_spec):
+        """Test an edit is rendered from the previous positions without a new layout pass"""
+        renderer = CapturingRenderer()
+        builder = DotBuilder(resolver, tmp_path, renderer=renderer, layout_cache=LayoutCache())
+        original = DiagramSpecification.from_dict(CLUSTERED_SPEC)
+
+        builder.build(original)
+        builder.build(edited_spec, previous=original)
+
+        # layout + render for the original, then a pinned render only
+        assert len(renderer.sources) == 3
+        pinned = renderer.sources[-1]
+        for i, name in enumerate(["lb", "web1", "web2", "db1"]):
+            assert re.search(rf'^\t+{name} \[.*pos="{i * 10},{i * 10}!"', pinned, re.M)
+        assert re.search(r'^\t+cache \[.*pos="[-\d.]+,[-\d.]+!"', pinned, re.M)
+        assert "db2" not in pinned
+
+    def test_edit_keeps_positions_without_layout_cache(self, resolver, tmp_path, edited_spec):
+        """Test an edit is laid out from the previous layout even with caching off"""
+        renderer = CapturingRenderer()
+        builder = DotBuilder(resolver, tmp_path, renderer=renderer, layout_cache=LayoutCache(0))
+        original = DiagramSpecification.from_dict(CLUSTERED_SPEC)
+
+        builder.build(original)
+        builder.build(edited_spec, previous=original)
+
+        # plain render of the original, then its layout and a pinned render
+        assert len(renderer.sources) == 3
+        assert re.search(r'^\t+web1 \[.*pos="10,10!"', renderer.sources[-1], re.M)
+
+    def test_new_nodes_do_not_overlap(self, resolver, tmp_path, edited_spec):
+        """Test placed nodes keep graphviz's node separation from existing ones"""
+        builder = DotBuilder(resolver, tmp_path, renderer=CapturingRenderer(), layout_cache=LayoutCache())
+        original = DiagramSpecification.from_dict(CLUSTERED_SPEC)
+
+        layout = builder.extend_layout(edited_spec, original)
+        points = {name: tuple(map(float, pos.split(","))) for name, pos in layout["nodes"].items()}
+
+        assert set(points) == {"lb", "web1", "web2", "db1", "cache", "queue"}
+        for new in ("cache", "queue"):
+            for name, point in points.items():
+                if name != new:
+                    assert (abs(point[0] - points[new][0]) >= 100.8 or
+                            abs(point[1] - points[new][1]) >= 100.8)
+
+    @pytest.mark.skipif(not graphviz_renderer.PYGRAPHVIZ_AVAILABLE, reason="pygraphviz not installed")
+    def test_extended_layout_renders_with_graphviz(self, resolver, tmp_path, edited_spec):
+        """Test an extended layout renders with the real graphviz library"""
+        builder = DotBuilder(resolver, tmp_path, layout_cache=LayoutCache())
+        original = DiagramSpecification.from_dict(CLUSTERED_SPEC)
+        before = builder.compute_layout(original)
+
+        layout = builder.extend_layout(edited_spec, original)
+
+        for name in ("lb", "web1", "web2", "db1"):
+            assert layout["nodes"][name] == before["nodes"][name]
+        assert "cluster_Database Tier" in layout["clusters"]
+        image = builder.renderer.render(builder.to_dot(edited_spec, layout), "png", "nop2")
+        assert image.startswith(b"\x89PNG")
@@ -1,13 +1,39 @@
 """Tests for infrastructure adapters"""
 import pytest
 from pathlib import Path
+import io
+import marshal
+import pickle
+import sys
 import tempfile
 import json
+import threading
+import time
 
+from src.domain.services.node_matcher import NodeMatcher
 from src.infrastructure.adapters.provider_repository import ProviderRepository
 from src.infrastructure.adapters.node_class_loader import NodeClassLoader
+from src.infrastructure.adapters.module_warmer import ModuleWarmer
 from src.infrastructure.adapters.image_optimizer import ImageOptimizer
 from src.infrastructure.adapters.filesystem_storage import FilesystemDiagramStorage
+from src.infrastructure.adapters.render_cache import RenderCache
+from src.infrastructure.adapters.single_flight import SingleFlight
+from src.infrastructure.adapters.render_scheduler import (
+    RenderQueueFullError,
+    RenderScheduler,
+    estimate_render_cost
+)
+from src.infrastructure.adapters import catalog_generator, compiled_catalog, graphviz_renderer
+from src.infrastructure.adapters.catalog_generator import CatalogGenerator
+from src.infrastructure.adapters.node_alias_index import NodeAliasIndex
+from src.infrastructure.adapters.graphviz_renderer import (
+    LibraryGraphvizRenderer,
+    SubprocessGraphvizRenderer,
+    create_graphviz_renderer
+)
+from src.domain.value_objects.diagram_specification import DiagramSpecification
+from src.domain.value_objects.diagram_result import DiagramResult
+from tests.fixtures.diagram_specs import SIMPLE_AWS_SPEC, CLUSTERED_SPEC
 
 
 class TestProviderRepository:
@@ -80,6 +106,257 @@ class TestProviderRepository:
         results = repo.search_nodes("database", provider="azure")
         
         assert all(r['provider'] == "azure" for r in results)
+    
+    def test_search_nodes_ranked_and_limited(self, temp_json):
+        """Test exact and prefix matches come first and the limit is applied"""
+        repo = ProviderRepository(temp_json)
+        results = repo.search_nodes("d")
+        
+        # Name prefix, then word prefix (shorter names first), then anywhere
+        assert [r['name'] for r in results] == ["DynamoDB", "CosmosDB", "SQLDatabases", "RDS", "Lambda"]
+        assert [r['name'] for r in repo.search_nodes("d", limit=2)] == ["DynamoDB", "CosmosDB"]
+        assert repo.search_nodes("rds")[0]['name'] == "RDS"
+    
+    def test_search_nodes_matches_all_words(self, temp_json):
+        """Test multi-word queries match names containing every word"""
+        repo = ProviderRepository(temp_json)
+        
+        assert [r['name'] for r in repo.search_nodes("databases sql")] == ["SQLDatabases"]
+        assert [r['name'] for r in repo.search_nodes("Cosmos-DB")] == ["CosmosDB"]
+        assert repo.search_nodes("sql", provider="aws") == []
+    
+    def test_search_nodes_without_letters_scans_names(self, tmp_path):
+        """Test an empty query lists every node and punctuation matches names containing it"""
+        json_path = tmp_path / "catalog.json"
+        json_path.write_text(json.dumps({
+            "onprem": {"gis": ["Pg_Tileserv", "Geoserver"]},
+            "aws": {"compute": ["EC2"]}
+        }))
+        repo = ProviderRepository(json_path, tmp_path / "catalog.bin")
+        
+        assert [r['name'] for r in repo.search_nodes("")] == ["Pg_Tileserv", "Geoserver", "EC2"]
+        assert [r['name'] for r in repo.search_nodes("", provider="aws")] == ["EC2"]
+        assert [r['name'] for r in repo.search_nodes("", limit=1)] == ["Pg_Tileserv"]
+        assert [r['name'] for r in repo.search_nodes("_")] == ["Pg_Tileserv"]
+        assert repo.search_nodes("-") == []
+    
+    def test_find_node(self, temp_json):
+        """Test locating a node name in every provider category"""
+        repo = ProviderRepository(temp_json)
+        
+        assert repo.find_node("dynamodb") == [
+            {'name': 'DynamoDB', 'provider': 'aws', 'category': 'database'}
+        ]
+        assert repo.find_node("EC2", provider="azure") == []
+        assert repo.find_node("Unknown") == []
+
+
+class TestNodeAliasIndex:
+    """Tests for synonym and class alias lookup"""
+    
+    @pytest.fixture
+    def index(self):
+        """Create index over a small catalog"""
+        data = {
+            "aws": {"network": ["ElasticLoadBalancing", "CloudFront"], "compute": ["Lambda"]},
+            "onprem": {"queue": ["Kafka"]}
+        }
+        aliases = {"aws": {"network": {"ELB": "ElasticLoadBalancing", "CF": "CloudFront"}}}
+        synonyms = {
+            "aws": {"load balancer": "network/ElasticLoadBalancing", "cdn": "network/Missing"},
+            "*": {"kafka": "onprem/queue/Kafka"}
+        }
+        return NodeAliasIndex(data, aliases, synonyms)
+    
+    def test_lookup_synonyms_and_aliases(self, index):
+        """Test synonyms and class aliases ignore case, spaces and punctuation"""
+        assert index.lookup("aws", "Load-Balancer") == ("aws", "network", "ElasticLoadBalancing")
+        assert index.lookup("aws", "elb") == ("aws", "network", "ElasticLoadBalancing")
+        assert index.lookup("aws", "AWS Lambda") == ("aws", "compute", "Lambda")
+        assert index.lookup("aws", "load balancers") == ("aws", "network", "ElasticLoadBalancing")
+    
+    def test_lookup_any_provider_scope(self, index):
+        """Test provider-independent synonyms apply after the provider's own"""
+        assert index.lookup("azure", "Kafka") == ("onprem", "queue", "Kafka")
+        assert index.lookup("aws", "cdn") is None
+        assert index.lookup("aws", "nothing") is None
+    
+    def test_bundled_synonyms_point_at_catalog_nodes(self):
+        """Test every curated synonym and bundled class alias resolves"""
+        external = Path(__file__).parent.parent.parent / "src" / "infrastructure" / "external"
+        data = json.loads((external / "diagrams_structure.json").read_text())
+        synonyms = json.loads((external / "node_synonyms.json").read_text())
+        index = NodeAliasIndex(data, {}, synonyms)
+        
+        for scope, entries in synonyms.items():
+            for phrase, location in entries.items():
+                expected = tuple(location.split("/")) if scope == "*" else (scope, *location.split("/"))
+                assert index.lookup(scope if scope != "*" else "none", phrase) == expected, phrase
+    
+    def test_repository_find_alias(self):
+        """Test the repository resolves bundled synonyms and class aliases"""
+        repo = ProviderRepository()
+        
+        assert repo.find_alias("k8s", "k8s pod") == {'name': 'Pod', 'provider': 'k8s', 'category': 'compute'}
+        assert repo.find_alias("aws", "ELB")['name'] == "ElasticLoadBalancing"
+        assert repo.find_alias("aws", "Postgres")['name'] == "RDS"
+        assert repo.find_alias("aws", "Nonexistent") is None
+
+
+class _TouchOnLoad:
+    """Object whose pickle creates a file when loaded"""
+    
+    def __init__(self, path):
+        self.path = path
+    
+    def __reduce__(self):
+        return (Path.touch, (Path(self.path),))
+
+
+class TestCompiledCatalog:
+    """Tests for the precompiled provider catalog"""
+    
+    @pytest.fixture
+    def catalog_files(self, tmp_path):
+        """Create a catalog JSON file and a compiled catalog path"""
+        json_path = tmp_path / "catalog.json"
+        json_path.write_text(json.dumps({"aws": {"compute": ["EC2", "Lambda"]}}))
+        compiled_catalog._catalogs.clear()
+        yield json_path, tmp_path / "catalog.bin"
+        compiled_catalog._catalogs.clear()
+    
+    def test_compiled_on_first_load_and_reused(self, catalog_files):
+        """Test the compiled file is written once and then loaded instead of the JSON"""
+        json_path, compiled_path = catalog_files
+        repo = ProviderRepository(json_path, compiled_path)
+        
+        assert compiled_path.exists()
+        assert ProviderRepository(json_path, compiled_path)._data is repo._data
+        
+        compiled_catalog._catalogs.clear()
+        mtime = compiled_path.stat().st_mtime_ns
+        reloaded = ProviderRepository(json_path, compiled_path)
+        
+        assert compiled_path.stat().st_mtime_ns == mtime
+        assert reloaded.get_category_nodes("aws", "compute") == ["EC2", "Lambda"]
+        assert reloaded.search_nodes("lam")[0]['name'] == "Lambda"
+        assert reloaded.find_alias("aws", "Postgres") is None
+        assert reloaded.find_alias("aws", "serverless function")['name'] == "Lambda"
+        assert "aws" in reloaded.get_match_indexes().providers
+        assert NodeMatcher(reloaded).match_provider("aws", "Lambada")[0][:2] == ("Lambda", "compute")
+    
+    def test_changed_aliases_invalidate_compiled_file(self, catalog_files):
+        """Test class aliases written next to the catalog are picked up"""
+        json_path, compiled_path = catalog_files
+        ProviderRepository(json_path, compiled_path)
+        
+        compiled_catalog._catalogs.clear()
+        (json_path.parent / "diagrams_aliases.json").write_text(
+            json.dumps({"aws": {"compute": {"Function": "Lambda"}}})
+        )
+        
+        assert ProviderRepository(json_path, compiled_path).find_alias("aws", "Function")['name'] == "Lambda"
+    
+    def test_stale_compiled_file_is_rebuilt(self, catalog_files, monkeypatch):
+        """Test a changed catalog or diagrams version invalidates the compiled file"""
+        json_path, compiled_path = catalog_files
+        ProviderRepository(json_path, compiled_path)
+        
+        compiled_catalog._catalogs.clear()
+        json_path.write_text(json.dumps({"aws": {"compute": ["EC2", "ECS"]}}))
+        assert ProviderRepository(json_path, compiled_path).get_category_nodes("aws", "compute") == ["EC2", "ECS"]
+        
+        compiled_catalog._catalogs.clear()
+        monkeypatch.setattr(compiled_catalog, "get_diagrams_version", lambda: "0.0.0")
+        ProviderRepository(json_path, compiled_path)
+        expected = compiled_catalog.get_expected_header(json_path, json_path.read_bytes())
+        assert expected['diagrams_version'] == "0.0.0"
+        assert compiled_catalog.CompiledCatalog.read(compiled_path, expected) is not None
+    
+    def test_damaged_compiled_file_is_ignored(self, catalog_files):
+        """Test a damaged compiled file falls back to the JSON"""
+        json_path, compiled_path = catalog_files
+        compiled_path.write_bytes(compiled_catalog.MAGIC + b"garbage")
+        
+        repo = ProviderRepository(json_path, compiled_path)
+        
+        assert repo.node_exists("aws", "compute", "EC2") is True
+    
+    @staticmethod
+    def _replace_payload(compiled_path, payload):
+        """Keep the header of a compiled file and replace its payload"""
+        content = compiled_path.read_bytes()
+        start = len(compiled_catalog.MAGIC) + compiled_catalog._HEADER_LENGTH.size
+        (header_length,) = compiled_catalog._HEADER_LENGTH.unpack(content[len(compiled_catalog.MAGIC):start])
+        compiled_path.write_bytes(content[:start + header_length] + payload)
+        compiled_catalog._catalogs.clear()
+        return content[:start + header_length] + payload
+    
+    def test_compiled_file_from_older_code_is_rebuilt(self, catalog_files):
+        """Test a payload shaped by older code falls back to the JSON"""
+        json_path, compiled_path = catalog_files
+        ProviderRepository(json_path, compiled_path)
+        stale = self._replace_payload(compiled_path, marshal.dumps({'data': {}, 'search_index': []}))
+        
+        repo = ProviderRepository(json_path, compiled_path)
+        
+        assert repo.node_exists("aws", "compute", "EC2") is True
+        assert compiled_path.read_bytes() != stale
+    
+    def test_pickled_payload_is_not_executed(self, catalog_files, tmp_path):
+        """Test a payload crafted to run code on load is only treated as damaged"""
+        json_path, compiled_path = catalog_files
+        ProviderRepository(json_path, compiled_path)
+        marker = tmp_path / "executed"
+        self._replace_payload(compiled_path, pickle.dumps(_TouchOnLoad(str(marker))))
+        
+        repo = ProviderRepository(json_path, compiled_path)
+        
+        assert not marker.exists()
+        assert repo.node_exists("aws", "compute", "EC2") is True
+
+
+class TestCatalogGenerator:
+    """Tests for catalog generation from the installed diagrams package"""
+    
+    def test_generate_lists_classes_and_aliases(self, tmp_path):
+        """Test generated catalog has node classes, then their aliases"""
+        generator = CatalogGenerator(tmp_path)
+        stats = generator.generate()
+        catalog = json.loads(generator.catalog_path.read_text())
+        
+        assert stats['modules_scanned'] > 0 and stats['modules_reused'] == 0
+        assert "EC2" in catalog["aws"]["compute"]
+        database = catalog["aws"]["database"]
+        assert database.index("ElastiCache") > database.index("Elasticache")
+        assert "base" not in catalog
+        assert ProviderRepository(generator.catalog_path).node_exists("aws", "database", "ElastiCache")
+        aliases = json.loads(generator.aliases_path.read_text())
+        assert aliases["aws"]["database"]["ElastiCache"] == "Elasticache"
+    
+    def test_generate_is_incremental(self, tmp_path):
+        """Test unchanged modules are reused from the manifest"""
+        generator = CatalogGenerator(tmp_path)
+        first = generator.generate()
+        second = generator.generate()
+        
+        assert second['modules_scanned'] == 0
+        assert second['modules_reused'] == first['modules_scanned']
+        assert second['nodes'] == first['nodes']
+    
+    def test_ensure_catalog_cached_by_version(self, tmp_path, monkeypatch):
+        """Test the catalog is only regenerated when the diagrams version changes"""
+        generator = CatalogGenerator(tmp_path)
+        generator.ensure_catalog()
+        
+        calls = []
+        monkeypatch.setattr(generator, "generate", lambda: calls.append(1))
+        generator.ensure_catalog()
+        assert calls == []
+        
+        monkeypatch.setattr(catalog_generator, "get_diagrams_version", lambda: "0.0.0")
+        generator.ensure_catalog()
+        assert calls == [1]
 
 
 class TestNodeClassLoader:
@@ -103,25 +380,73 @@ class TestNodeClassLoader:
         assert node_class is None
     
     def test_caching(self):
-        """Test that loader caches results"""
+        """Test that loading a class again returns the same class"""
         loader = NodeClassLoader()
         
         # Load same class twice
         class1 = loader.load_node_class("aws", "compute", "EC2")
         class2 = loader.load_node_class("aws", "compute", "EC2")
         
-        # Should be same object (cached)
+        # Same object because the module stays in sys.modules, not a loader cache
         assert class1 is class2
     
     def test_clear_cache(self):
-        """Test clearing the cache"""
+        """Test clearing the cache keeps classes loadable"""
         loader = NodeClassLoader()
         
-        loader.load_node_class("aws", "compute", "EC2")
-        assert len(loader._cache) > 0
-        
+        class1 = loader.load_node_class("aws", "compute", "EC2")
         loader.clear_cache()
-        assert len(loader._cache) == 0
+        
+        assert loader.load_node_class("aws", "compute", "EC2") is class1
+
+
+class TestModuleWarmer:
+    """Tests for background module warm-up"""
+    
+    def test_warmup_imports_and_times_modules(self, monkeypatch):
+        """Test configured modules are imported in the background and timed"""
+        monkeypatch.delitem(sys.modules, "diagrams.outscale.network", raising=False)
+        loader = NodeClassLoader()
+        warmer = ModuleWarmer(loader, modules=["outscale.network", "aws.compute", "nope.nothing"])
+        
+        assert warmer.stats()['state'] == 'idle'
+        warmer.start()
+        assert warmer.wait(timeout=30) is True
+        
+        stats = warmer.stats()
+        assert stats['state'] == 'done'
+        assert stats['imported'] == 2
+        assert stats['failed'] == ["nope.nothing"]
+        assert stats['import_timings_ms']["outscale.network"] >= 0
+    
+    def test_usage_is_learned(self, tmp_path):
+        """Test the most used modules of earlier runs are added to the warm-up"""
+        usage_path = tmp_path / "usage.json"
+        loader = NodeClassLoader()
+        loader.load_node_class("aws", "database", "RDS")
+        loader.load_node_class("aws", "database", "Aurora")
+        loader.load_node_class("gcp", "compute", "GCE")
+        loader.load_node_class("nope", "nothing", "Missing")
+        loader.load_node_class("aws", "compute", "Missing")
+        ModuleWarmer(loader, modules=[], usage_path=usage_path).save_usage()
+        
+        warmer = ModuleWarmer(NodeClassLoader(), modules=["k8s.compute"], usage_path=usage_path, learned_limit=1)
+        
+        assert warmer.get_modules() == ["k8s.compute", "aws.database"]
+        assert json.loads(usage_path.read_text()) == {"aws.database": 2, "gcp.compute": 1}
+    
+    def test_usage_is_saved_once(self, tmp_path):
+        """Test saving again, as shutdown and exit both do, does not count a lookup twice"""
+        usage_path = tmp_path / "usage.json"
+        loader = NodeClassLoader()
+        warmer = ModuleWarmer(loader, modules=[], usage_path=usage_path)
+        loader.load_node_class("aws", "database", "RDS")
+        warmer.save_usage()
+        warmer.save_usage()
+        loader.load_node_class("aws", "database", "RDS")
+        warmer.save_usage()
+        
+        assert json.loads(usage_path.read_text()) == {"aws.database": 2}
 
 
 class TestImageOptimizer:
@@ -144,6 +469,68 @@ class TestImageOptimizer:
         
         assert optimizer.max_width == 500
         assert optimizer.max_height == 400
+    
+    @pytest.fixture
+    def diagram_png(self, tmp_path):
+        """Create a flat-color image like a rendered diagram"""
+        from PIL import Image, ImageDraw
+        
+        img = Image.new('RGB', (1200, 900), 'white')
+        draw = ImageDraw.Draw(img)
+        for i in range(12):
+            draw.rectangle((40 + i * 90, 100, 110 + i * 90, 170), fill=(20 * i, 90, 200))
+            draw.line((75 + i * 90, 170, 75 + i * 90, 600), fill='gray', width=2)
+        path = tmp_path / "diagram.png"
+        img.save(path, compress_level=0)
+        return str(path)
+    
+    def test_palette_mode(self, diagram_png):
+        """Test palette mode produces a smaller, palette-based PNG"""
+        from PIL import Image
+        
+        rgb = ImageOptimizer().encode(diagram_png)
+        palette = ImageOptimizer(mode="palette").encode(diagram_png)
+        
+        assert Image.open(io.BytesIO(palette.data)).mode == "P"
+        assert Image.open(io.BytesIO(palette.data)).size == (1000, 750)
+        assert len(palette.data) < len(rgb.data)
+        assert palette.encoding == "png-palette-max"
+    
+    def test_encode_reports_stats(self, diagram_png):
+        """Test encoding reports its time and the saving over the original file"""
+        stats = ImageOptimizer(mode="palette", effort="balanced").encode(diagram_png).get_stats()
+        
+        assert stats['original_bytes'] == Path(diagram_png).stat().st_size
+        assert stats['encoded_bytes'] < stats['original_bytes']
+        assert stats['savings_percent'] > 0
+        assert stats['encode_ms'] >= 0
+    
+    def test_fallbacks_report_encoding_used(self, diagram_png, tmp_path, monkeypatch):
+        """Test stats name the encoding actually used when palette mode or decoding fails"""
+        from PIL import Image
+        
+        def fail_quantize(*args, **kwargs):
+            raise ValueError("quantize failed")
+        
+        monkeypatch.setattr(Image.Image, "quantize", fail_quantize)
+        encoded = ImageOptimizer(mode="palette", effort="fast").encode(diagram_png)
+        
+        assert Image.open(io.BytesIO(encoded.data)).mode == "RGB"
+        assert encoded.get_stats()['encoding'] == "png-rgb-fast"
+        
+        broken = tmp_path / "broken.png"
+        broken.write_bytes(b"not an image")
+        encoded = ImageOptimizer(mode="palette").encode(str(broken))
+        
+        assert encoded.data == b"not an image"
+        assert encoded.encoding == "original"
+    
+    def test_invalid_settings(self):
+        """Test unknown modes and efforts are rejected"""
+        with pytest.raises(ValueError):
+            ImageOptimizer(mode="jpeg")
+        with pytest.raises(ValueError):
+            ImageOptimizer(effort="extreme")
 
 
 class TestFilesystemDiagramStorage:
@@ -174,3 +561,238 @@ class TestFilesystemDiagramStorage:
             assert diagram_path.name == "test.png"
             assert str(diagram_path.parent) == tmpdir
 
+
+
+class TestRenderCache:
+    """Tests for RenderCache"""
+    
+    @pytest.fixture
+    def image_file(self, tmp_path):
+        """Create a file standing in for a rendered diagram"""
+        path = tmp_path / "diagram.png"
+        path.write_bytes(b"png")
+        return str(path)
+    
+    def _result(self, file_path, payload="data"):
+        return DiagramResult.success_result(
+            title="Test",
+            file_path=file_path,
+            image_base64=payload,
+            image_size_mb=0.1,
+            components_count=2,
+            connections_count=1,
+            provider="aws"
+        )
+    
+    def test_key_is_canonical(self):
+        """Test that equal specs hash equally regardless of dict ordering"""
+        spec1 = DiagramSpecification.from_dict(SIMPLE_AWS_SPEC)
+        spec2 = DiagramSpecification.from_dict(dict(reversed(list(SIMPLE_AWS_SPEC.items()))))
+        settings = {"dpi": "150"}
+        
+        assert RenderCache.make_key(spec1, settings) == RenderCache.make_key(spec2, settings)
+        assert RenderCache.make_key(spec1, settings) != RenderCache.make_key(spec1, {"dpi": "300"})
+    
+    def test_hit_and_miss_counters(self, image_file):
+        """Test hit/miss accounting"""
+        cache = RenderCache()
+        
+        assert cache.get("key") is None
+        cache.put("key", self._result(image_file))
+        cached = cache.get("key")
+        
+        assert cached is not None
+        assert cached.cached is True
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+    
+    def test_lru_eviction_by_entries(self, image_file):
+        """Test least recently used entry is evicted first"""
+        cache = RenderCache(max_entries=2)
+        cache.put("a", self._result(image_file))
+        cache.put("b", self._result(image_file))
+        cache.get("a")
+        cache.put("c", self._result(image_file))
+        
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+    
+    def test_eviction_by_size(self, image_file):
+        """Test total payload size is bounded"""
+        cache = RenderCache(max_size_mb=1)
+        payload = "A" * (600 * 1024)
+        cache.put("a", self._result(image_file, payload))
+        cache.put("b", self._result(image_file, payload))
+        
+        assert len(cache) == 1
+        assert cache.get("b") is not None
+    
+    def test_missing_file_is_a_miss(self, image_file):
+        """Test entries whose file was deleted are dropped"""
+        cache = RenderCache()
+        cache.put("key", self._result(image_file))
+        Path(image_file).unlink()
+        
+        assert cache.get("key") is None
+        assert len(cache) == 0
+    
+    def test_failures_not_cached(self):
+        """Test failed results are never stored"""
+        cache = RenderCache()
+        cache.put("key", DiagramResult.failure_result("boom"))
+        
+        assert len(cache) == 0
+
+
+class TestSingleFlight:
+    """Tests for SingleFlight"""
+    
+    def test_concurrent_callers_share_one_call(self):
+        """Test callers arriving while a call runs get its result"""
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls, results = [], []
+        
+        def render():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "diagram.png"
+        
+        leader = threading.Thread(target=lambda: results.append(flight.do("key", render)))
+        leader.start()
+        started.wait(5)
+        followers = [
+            threading.Thread(target=lambda: results.append(flight.do("key", render)))
+            for _ in range(3)
+        ]
+        for thread in followers:
+            thread.start()
+        while flight.stats()['shared'] < 3:
+            time.sleep(0.001)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+        
+        assert len(calls) == 1
+        assert sorted(results) == [("diagram.png", False)] + [("diagram.png", True)] * 3
+        assert flight.stats() == {'in_flight': 0, 'executed': 1, 'shared': 3}
+    
+    def test_key_is_released_after_call(self):
+        """Test sequential calls run again, and errors reach the caller"""
+        flight = SingleFlight()
+        
+        assert flight.do("key", lambda: 1) == (1, False)
+        assert flight.do("key", lambda: 2) == (2, False)
+        with pytest.raises(ValueError):
+            flight.do("key", lambda: int("x"))
+        assert flight.stats()['in_flight'] == 0
+
+
+class TestRenderScheduler:
+    """Tests for RenderScheduler"""
+    
+    def test_cost_grows_with_spec_size(self):
+        """Test larger specs are estimated to cost more"""
+        small = DiagramSpecification.from_dict(SIMPLE_AWS_SPEC)
+        large = DiagramSpecification.from_dict(CLUSTERED_SPEC)
+        
+        assert estimate_render_cost(small) == len(small.components) + 2 * len(small.connections)
+        assert estimate_render_cost(large) > estimate_render_cost(small)
+    
+    def test_full_queue_is_refused_at_once(self):
+        """Test a render that can neither start nor wait is rejected"""
+        scheduler = RenderScheduler(max_concurrent=1, max_queued=0)
+        
+        with scheduler.slot(5):
+            with pytest.raises(RenderQueueFullError, match="Server busy"):
+                with scheduler.slot(1):
+                    pass
+        
+        with scheduler.slot(1) as waited:
+            assert waited == 0.0
+        stats = scheduler.stats()
+        assert (stats['admitted'], stats['rejected'], stats['running']) == (2, 1, 0)
+    
+    def test_cheapest_waiting_render_starts_first(self):
+        """Test queued renders start by cost, not arrival"""
+        scheduler = RenderScheduler(max_concurrent=1, max_queued=8)
+        order = []
+        
+        def render(cost):
+            with scheduler.slot(cost):
+                order.append(cost)
+        
+        threads = []
+        with scheduler.slot(100):
+            for cost in (30, 10, 20):
+                thread = threading.Thread(target=render, args=(cost,))
+                thread.start()
+                threads.append(thread)
+                while scheduler.stats()['queued'] < len(threads):
+                    time.sleep(0.001)
+        for thread in threads:
+            thread.join(5)
+        
+        assert order == [10, 20, 30]
+        stats = scheduler.stats()
+        assert stats['peak_queued'] == 3
+        assert stats['queued'] == 0 and stats['wait_ms_max'] > 0
+
+
+class TestGraphvizRenderer:
+    """Tests for graphviz renderer selection"""
+    
+    def test_subprocess_backend(self):
+        """Test the subprocess backend can be forced"""
+        assert isinstance(create_graphviz_renderer("subprocess"), SubprocessGraphvizRenderer)
+    
+    def test_falls_back_without_pygraphviz(self, monkeypatch):
+        """Test library backend falls back to subprocess when pygraphviz is missing"""
+        monkeypatch.setattr(graphviz_renderer, "PYGRAPHVIZ_AVAILABLE", False)
+        
+        assert isinstance(create_graphviz_renderer("library"), SubprocessGraphvizRenderer)
+        assert isinstance(create_graphviz_renderer("auto"), SubprocessGraphvizRenderer)
+    
+    def test_backend_from_environment(self, monkeypatch):
+        """Test the backend is read from DIAGRAM_GRAPHVIZ_BACKEND"""
+        monkeypatch.setenv("DIAGRAM_GRAPHVIZ_BACKEND", "subprocess")
+        
+        assert isinstance(create_graphviz_renderer(), SubprocessGraphvizRenderer)
+    
+    def test_unknown_backend(self):
+        """Test unknown backends are rejected"""
+        with pytest.raises(ValueError):
+            create_graphviz_renderer("magic")
+    
+    @pytest.mark.skipif(not graphviz_renderer.PYGRAPHVIZ_AVAILABLE, reason="pygraphviz not installed")
+    def test_library_renders_in_memory(self):
+        """Test the library backend returns PNG bytes"""
+        image = LibraryGraphvizRenderer().render("digraph { a -> b }", "png")
+        
+        assert image.startswith(b"\x89PNG")
+    
+    def test_render_many_lays_out_once(self, monkeypatch):
+        """Test several formats are drawn from one laid-out graph"""
+        calls = []
+        
+        def fake_render(self, source, fmt="png", engine="dot"):
+            calls.append((fmt, engine))
+            return b"laid out" if fmt == "dot" else fmt.encode()
+        
+        monkeypatch.setattr(SubprocessGraphvizRenderer, "render", fake_render)
+        outputs = SubprocessGraphvizRenderer().render_many("digraph { a -> b }", ["png", "svg", "dot"])
+        
+        assert outputs == {"png": b"png", "svg": b"svg", "dot": b"laid out"}
+        assert calls == [("dot", "dot"), ("png", "nop2"), ("svg", "nop2")]
+    
+    @pytest.mark.skipif(not graphviz_renderer.PYGRAPHVIZ_AVAILABLE, reason="pygraphviz not installed")
+    def test_library_renders_many_formats(self):
+        """Test the library backend draws every format from one layout"""
+        outputs = LibraryGraphvizRenderer().render_many("digraph { a -> b }", ["png", "svg", "pdf", "dot"])
+        
+        assert outputs["png"].startswith(b"\x89PNG")
+        assert b"<svg" in outputs["svg"]
+        assert outputs["pdf"].startswith(b"%PDF")
+        assert b"pos=" in outputs["dot"]
@@ -0,0 +1,111 @@
+"""Tests for the lazily built diagram service and the server's deferred imports"""
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import Mock
+
+import pytest
+
+from src.application.services.lazy_diagram_service import LazyDiagramService
+
+project_root = Path(__file__).parent.parent.parent
+
+
+class TestLazyDiagramService:
+    """Test building the service on first use"""
+
+    def test_built_on_first_attribute_access(self):
+        """Test the factory only runs when the service is first used"""
+        factory = Mock(return_value=Mock(get_available_providers=Mock(return_value=["aws"])))
+        service = LazyDiagramService(factory)
+
+        assert not service.loaded
+        factory.assert_not_called()
+
+        assert service.get_available_providers() == ["aws"]
+        assert service.get_available_providers() == ["aws"]
+        factory.assert_called_once()
+        assert service.loaded
+        assert service.load_ms is not None
+
+    def test_built_once_under_concurrent_access(self):
+        """Test concurrent first calls share one service"""
+        def slow_factory():
+            time.sleep(0.05)
+            return Mock()
+
+        factory = Mock(side_effect=slow_factory)
+        service = LazyDiagramService(factory)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(service.get())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        factory.assert_called_once()
+        assert all(result is results[0] for result in results)
+
+    def test_special_names_do_not_build(self):
+        """Test introspection of the stand-in leaves the service unbuilt"""
+        factory = Mock()
+        service = LazyDiagramService(factory)
+
+        assert not hasattr(service, '__wrapped__')
+        service.shutdown()
+        factory.assert_not_called()
+
+    def test_start_warmup_builds_in_background(self, monkeypatch):
+        """Test the warm-up builds the service and starts its module warm-up"""
+        monkeypatch.delenv('DIAGRAM_WARMUP', raising=False)
+        real_service = Mock()
+        service = LazyDiagramService(lambda: real_service)
+
+        service.start_warmup()
+
+        assert service.wait(timeout=5)
+        real_service.start_warmup.assert_called_once()
+
+    def test_start_warmup_disabled(self, monkeypatch):
+        """Test DIAGRAM_WARMUP=off leaves building to the first tool call"""
+        monkeypatch.setenv('DIAGRAM_WARMUP', 'off')
+        factory = Mock()
+        service = LazyDiagramService(factory)
+
+        service.start_warmup()
+
+        assert not service.wait(timeout=1)
+        factory.assert_not_called()
+
+
+class TestDeferredImports:
+    """Test importing the server stays free of rendering dependencies"""
+
+    @pytest.mark.parametrize("module", ["src", "src.application.mcp.server_modular"])
+    def test_import_does_not_load_rendering_dependencies(self, module):
+        """Test diagrams, PIL and the diagram service are not imported with the server"""
+        pytest.importorskip("mcp")
+        code = (
+            f"import sys; import {module}; "
+            "print(','.join(m for m in ('diagrams', 'PIL', 'src.application.services.diagram_service') "
+            "if m in sys.modules))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=project_root, check=True, capture_output=True, text=True
+        ).stdout
+
+        assert output.strip() == ""
+
+    def test_lazy_export_is_imported_once_and_cached(self):
+        """Test a package export resolves on first access and is then a plain attribute"""
+        import src.application.services as services
+        from src.application.services.lazy_diagram_service import LazyDiagramService as expected
+
+        services.__dict__.pop("LazyDiagramService", None)
+
+        assert services.LazyDiagramService is expected
+        assert services.__dict__["LazyDiagramService"] is expected
+        with pytest.raises(AttributeError, match="has no attribute 'Missing'"):
+            services.Missing
@@ -3,6 +3,8 @@ import pytest
 from unittest.mock import Mock
 
 from src.domain.services.node_resolver import NodeResolver
+from src.domain.services.node_matcher import NodeMatcher, edit_distance
+from src.domain.value_objects.diagram_specification import DiagramSpecification
 from diagrams.generic import Generic
 
 
@@ -20,6 +22,10 @@ class TestNodeResolver:
         repo = Mock()
         repo.node_exists.return_value = False
         repo.get_category_nodes.return_value = []
+        repo.get_provider_categories.return_value = []
+        repo.find_node.return_value = []
+        repo.find_alias.return_value = None
+        repo.get_match_indexes.return_value = None
         return repo
     
     def test_resolve_exact_match(self, mock_loader, mock_repository):
@@ -88,4 +94,161 @@ class TestNodeResolver:
         
         assert len(suggestions) > 0
         assert any(s.startswith("Lam") for s in suggestions)
+    
+    def test_resolve_from_other_category(self, mock_loader, mock_repository):
+        """Test a much closer node in another category beats a weak local match"""
+        from diagrams.aws.database import ElastiCache
+        
+        nodes = {"compute": ["ElasticBeanstalk", "EC2"], "database": ["ElastiCache", "RDS"]}
+        mock_repository.get_category_nodes.side_effect = lambda provider, category: nodes.get(category, [])
+        mock_repository.get_provider_categories.return_value = list(nodes)
+        mock_loader.load_node_class.return_value = ElastiCache
+        
+        resolver = NodeResolver(mock_loader, mock_repository)
+        result = resolver.resolve_node("aws", "compute", "Elasticache")
+        
+        assert result == ElastiCache
+        mock_loader.load_node_class.assert_called_once_with("aws", "database", "ElastiCache")
+
+    
+    def test_locate_node_in_other_category(self, mock_loader, mock_repository):
+        """Test a known name under the wrong category is relocated"""
+        mock_repository.find_node.return_value = [
+            {'name': 'RDS', 'provider': 'aws', 'category': 'database'}
+        ]
+        
+        resolver = NodeResolver(mock_loader, mock_repository)
+        resolution = resolver.locate_node("aws", "compute", "rds")
+        
+        assert (resolution.provider, resolution.category, resolution.node_type) == ("aws", "database", "RDS")
+        assert resolution.match == "relocated"
+        assert resolution.corrected is True
+    
+    def test_correct_specification(self, mock_loader, mock_repository):
+        """Test misplaced components are rewritten and reported"""
+        mock_repository.node_exists.side_effect = lambda provider, category, node_type: node_type == "EC2"
+        mock_repository.find_node.side_effect = lambda node_type: (
+            [{'name': 'Postgresql', 'provider': 'onprem', 'category': 'database'}]
+            if node_type == "postgresql" else []
+        )
+        spec = DiagramSpecification.from_dict({
+            "title": "Test",
+            "provider": "aws",
+            "components": [
+                {"id": "web", "type": "EC2", "category": "compute"},
+                {"id": "db", "type": "postgresql", "category": "database"}
+            ]
+        })
+        
+        resolver = NodeResolver(mock_loader, mock_repository)
+        corrected, corrections = resolver.correct_specification(spec)
+        
+        assert list(corrections) == ["db"]
+        assert corrections["db"].to_dict()["to"] == "onprem/database/Postgresql"
+        db = corrected.get_component_by_id("db")
+        assert (db.component_provider, db.category, db.type) == ("onprem", "database", "Postgresql")
+        assert corrected.get_component_by_id("web") == spec.get_component_by_id("web")
+    
+    def test_alias_before_fuzzy_match(self, mock_loader, mock_repository):
+        """Test a synonym wins over a similar-looking name"""
+        mock_repository.get_category_nodes.return_value = ["ElasticLoadBalancing", "LocalZones"]
+        mock_repository.find_alias.return_value = {
+            'name': 'ElasticLoadBalancing', 'provider': 'aws', 'category': 'network'
+        }
+        
+        resolver = NodeResolver(mock_loader, mock_repository)
+        resolution = resolver.locate_node("aws", "network", "Load Balancer")
+        
+        assert (resolution.node_type, resolution.match) == ("ElasticLoadBalancing", "alias")
+        assert resolution.corrected is True
+        mock_repository.find_alias.assert_called_once_with("aws", "Load Balancer")
+    
+    def test_failed_lookup_is_cached(self, mock_loader, mock_repository, capsys):
+        """Test an unknown type is searched for and reported only once"""
+        resolver = NodeResolver(mock_loader, mock_repository)
+        
+        for _ in range(3):
+            assert resolver.resolve_node("aws", "compute", "Nothing") is Generic
+        
+        mock_repository.node_exists.assert_called_once()
+        mock_loader.load_node_class.assert_not_called()
+        mock_loader.record_usage.assert_not_called()
+        stats = resolver.get_cache_stats()
+        assert (stats['entries'], stats['negative_entries']) == (1, 1)
+        assert (stats['hits'], stats['misses']) == (2, 1)
+    
+    def test_resolution_is_cached(self, mock_loader, mock_repository, capsys):
+        """Test a corrected type is loaded and reported once, then served from the cache"""
+        from diagrams.aws.compute import Lambda
+        
+        mock_repository.get_category_nodes.return_value = ["Lambda", "EC2"]
+        mock_loader.load_node_class.return_value = Lambda
+        resolver = NodeResolver(mock_loader, mock_repository)
+        
+        assert resolver.locate_node("aws", "compute", "lamb").node_type == "Lambda"
+        assert resolver.resolve_node("aws", "compute", "lamb") is Lambda
+        assert resolver.resolve_node("aws", "compute", "lamb") is Lambda
+        
+        mock_loader.load_node_class.assert_called_once_with("aws", "compute", "Lambda")
+        mock_loader.record_usage.assert_called_once_with("aws", "compute")
+        assert capsys.readouterr().out.count("Using 'Lambda'") == 1
+        assert resolver.get_cache_stats()['hit_rate'] == round(2 / 3, 4)
+    
+    def test_cache_is_bounded(self, mock_loader, mock_repository):
+        """Test the least recently used resolutions are evicted"""
+        mock_repository.node_exists.return_value = True
+        resolver = NodeResolver(mock_loader, mock_repository, cache_size=2)
+        
+        resolver.locate_node("aws", "compute", "EC2")
+        resolver.locate_node("aws", "compute", "Lambda")
+        resolver.locate_node("aws", "compute", "EC2")
+        resolver.locate_node("aws", "compute", "Batch")
+        
+        assert resolver.get_cache_stats()['entries'] == 2
+        mock_repository.node_exists.reset_mock()
+        resolver.locate_node("aws", "compute", "EC2")
+        mock_repository.node_exists.assert_not_called()
+        resolver.locate_node("aws", "compute", "Lambda")
+        mock_repository.node_exists.assert_called_once()
+        
+        resolver.clear_cache()
+        assert resolver.get_cache_stats()['entries'] == 0
+
 
+class TestNodeMatcher:
+    """Tests for NodeMatcher fuzzy matching"""
+    
+    @pytest.fixture
+    def matcher(self):
+        """Create matcher over a small catalog"""
+        nodes = {
+            "database": ["PostgreSQL", "MySQL", "Mongodb", "Cassandra"],
+            "inmemory": ["Redis", "Memcached"]
+        }
+        repo = Mock()
+        repo.get_category_nodes.side_effect = lambda provider, category: nodes.get(category, [])
+        repo.get_provider_categories.return_value = list(nodes)
+        repo.get_match_indexes.return_value = None
+        return NodeMatcher(repo)
+    
+    def test_match_scores_closest_first(self, matcher):
+        """Test candidates are scored and ordered"""
+        matches = matcher.match("onprem", "database", "Postgres")
+        
+        assert matches[0][0] == "PostgreSQL"
+        assert all(a[1] >= b[1] for a, b in zip(matches, matches[1:]))
+        assert matcher.match("onprem", "database", "Mongo-DB")[0] == ("Mongodb", 1.0)
+    
+    def test_match_typos(self, matcher):
+        """Test misspelled names still match"""
+        assert matcher.match("onprem", "database", "Casandra")[0][0] == "Cassandra"
+        assert matcher.match("onprem", "database", "Kafka") == []
+    
+    def test_match_provider(self, matcher):
+        """Test matching across every category of a provider"""
+        assert matcher.match_provider("onprem", "memcache")[0][:2] == ("Memcached", "inmemory")
+    
+    def test_edit_distance(self):
+        """Test edit distance and its early exit"""
+        assert edit_distance("kitten", "sitting") == 3
+        assert edit_distance("kitten", "sitting", max_distance=1) == 2
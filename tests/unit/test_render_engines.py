@@ -0,0 +1,143 @@
+"""Tests for render engine adapters"""
+import os
+import threading
+import time
+import pytest
+from pathlib import Path
+from unittest.mock import Mock
+
+from src.domain.value_objects.diagram_specification import DiagramSpecification
+from src.infrastructure.adapters.render_engines import (
+    InProcessRenderEngine,
+    ProcessPoolRenderEngine
+)
+from tests.fixtures.diagram_specs import SIMPLE_AWS_SPEC
+
+
+class FakeBuilder:
+    """Builder that writes the worker pid instead of rendering"""
+
+    def __init__(self, output_dir: Path):
+        self.output_dir = output_dir
+
+    def build(self, spec):
+        if spec.title == "crash":
+            os._exit(1)
+        if spec.title == "hang":
+            time.sleep(60)
+        if spec.title == "slow":
+            time.sleep(2)
+        path = self.output_dir / f"{spec.title}_{os.getpid()}_{time.time_ns()}.png"
+        path.write_text(str(os.getpid()))
+        return str(path)
+
+    def get_render_settings(self):
+        return {"builder": "FakeBuilder"}
+
+
+def create_fake_builder(output_dir: Path) -> FakeBuilder:
+    return FakeBuilder(output_dir)
+
+
+class TestInProcessRenderEngine:
+    """Tests for InProcessRenderEngine"""
+
+    def test_delegates_to_builder(self):
+        """Test render and settings come from the builder"""
+        builder = Mock()
+        builder.build.return_value = "/tmp/out.png"
+        builder.get_render_settings.return_value = {"dpi": "150"}
+        engine = InProcessRenderEngine(builder)
+        spec = DiagramSpecification.from_dict(SIMPLE_AWS_SPEC)
+
+        assert engine.render(spec) == "/tmp/out.png"
+        assert engine.get_render_settings() == {"dpi": "150"}
+        builder.build.assert_called_once_with(spec)
+
+
+@pytest.mark.slow
+class TestProcessPoolRenderEngine:
+    """Tests for ProcessPoolRenderEngine"""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        engine = ProcessPoolRenderEngine(
+            tmp_path,
+            max_workers=2,
+            max_jobs_per_worker=2,
+            timeout=10,
+            builder_factory=create_fake_builder
+        )
+        yield engine
+        engine.shutdown()
+
+    def _spec(self, title):
+        return DiagramSpecification(title=title)
+
+    def test_renders_in_worker_process(self, engine):
+        """Test jobs run outside the calling process"""
+        path = engine.render(self._spec("ok"))
+
+        assert Path(path).exists()
+        assert int(Path(path).read_text()) != os.getpid()
+        assert engine.get_render_settings() == {"builder": "FakeBuilder"}
+
+    def test_crash_is_isolated(self, engine):
+        """Test a crashing job fails alone and the pool recovers"""
+        with pytest.raises(RuntimeError, match="crashed"):
+            engine.render(self._spec("crash"))
+
+        assert Path(engine.render(self._spec("ok"))).exists()
+
+    def test_timeout_recovers(self, tmp_path):
+        """Test a hung job times out and the pool recovers"""
+        engine = ProcessPoolRenderEngine(
+            tmp_path, max_workers=1, timeout=1, builder_factory=create_fake_builder
+        )
+        try:
+            with pytest.raises(RuntimeError, match="timed out"):
+                engine.render(self._spec("hang"))
+
+            engine.timeout = 10
+            assert Path(engine.render(self._spec("ok"))).exists()
+        finally:
+            engine.shutdown()
+
+    def test_timeout_spares_other_jobs(self, tmp_path):
+        """Test a hung job times out without failing a job running next to it"""
+        engine = ProcessPoolRenderEngine(
+            tmp_path, max_workers=2, timeout=3, builder_factory=create_fake_builder
+        )
+        results = {}
+
+        def render(title):
+            try:
+                results[title] = engine.render(self._spec(title))
+            except RuntimeError as e:
+                results[title] = e
+
+        try:
+            engine.get_render_settings()
+            hang = threading.Thread(target=render, args=("hang",))
+            hang.start()
+            time.sleep(1.5)
+            # Still running when the hung job times out at 3s
+            render("slow")
+            hang.join()
+        finally:
+            engine.shutdown()
+
+        assert "timed out" in str(results["hang"])
+        assert Path(results["slow"]).exists()
+
+    def test_workers_are_recycled(self, tmp_path):
+        """Test a worker is replaced after max_jobs_per_worker jobs"""
+        engine = ProcessPoolRenderEngine(
+            tmp_path, max_workers=1, max_jobs_per_worker=2, builder_factory=create_fake_builder
+        )
+        try:
+            pids = {Path(engine.render(self._spec("ok"))).read_text() for _ in range(4)}
+        finally:
+            engine.shutdown()
+
+        assert len(pids) == 2
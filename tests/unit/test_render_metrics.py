@@ -0,0 +1,102 @@
+"""Tests for stage timing and render metrics"""
+import time
+
+from src.domain.services.stage_timer import NULL_TIMER, StageTimer, current_timer, use_timer
+from src.infrastructure.adapters.render_metrics import RenderMetrics
+
+
+class TestStageTimer:
+    """Tests for StageTimer"""
+    
+    def test_stages_add_up_and_sizes_are_kept(self):
+        """Test repeated stages are summed and bytes recorded"""
+        timer = StageTimer()
+        for _ in range(2):
+            with timer.stage('render'):
+                time.sleep(0.005)
+        timer.add_bytes('render', 100)
+        
+        timings = timer.to_dict()
+        
+        assert timings['stages_ms']['render'] >= 10
+        assert timings['bytes'] == {'render': 100}
+        assert timings['total_ms'] >= timings['stages_ms']['render']
+    
+    def test_current_timer_is_scoped(self):
+        """Test use_timer sets the current timer for its block only"""
+        timer = StageTimer()
+        
+        assert current_timer() is NULL_TIMER
+        with use_timer(timer):
+            assert current_timer() is timer
+        assert current_timer() is NULL_TIMER
+    
+    def test_null_timer_records_nothing(self):
+        """Test the disabled timer ignores everything"""
+        with NULL_TIMER.stage('render'):
+            pass
+        NULL_TIMER.add_bytes('render', 100)
+        
+        assert NULL_TIMER.enabled is False
+        assert NULL_TIMER.to_dict() is None
+
+
+class TestRenderMetrics:
+    """Tests for RenderMetrics"""
+    
+    def _record(self, metrics, render_ms):
+        timer = metrics.start_request()
+        timer.add('render', render_ms / 1000)
+        timer.add_bytes('render', 2048)
+        metrics.record(timer)
+    
+    def test_summary_percentiles(self):
+        """Test per-stage counts and percentiles"""
+        metrics = RenderMetrics(enabled=True)
+        for ms in range(1, 101):
+            self._record(metrics, ms)
+        
+        render = metrics.summary()['stages']['render']
+        
+        assert metrics.summary()['requests'] == 100
+        assert render['count'] == 100
+        assert render['p50_ms'] == 51
+        assert render['p95_ms'] == 96
+        assert render['max_ms'] == 100
+        assert render['bytes_total'] == 204800
+    
+    def test_window_limits_percentiles(self):
+        """Test percentiles only cover recent requests while counts keep growing"""
+        metrics = RenderMetrics(enabled=True, window=10)
+        for ms in [1000] * 10 + [10] * 10:
+            self._record(metrics, ms)
+        
+        render = metrics.summary()['stages']['render']
+        
+        assert render['count'] == 20
+        assert render['max_ms'] == 10
+    
+    def test_prometheus_file(self, tmp_path):
+        """Test the metrics file holds cumulative histogram buckets"""
+        path = tmp_path / "metrics" / "diagram.prom"
+        metrics = RenderMetrics(enabled=True, metrics_path=path)
+        self._record(metrics, 3)
+        self._record(metrics, 300)
+        
+        text = path.read_text()
+        
+        assert "diagram_requests_total 2" in text
+        assert 'diagram_stage_duration_seconds_bucket{stage="render",le="0.005"} 1' in text
+        assert 'diagram_stage_duration_seconds_bucket{stage="render",le="0.5"} 2' in text
+        assert 'diagram_stage_duration_seconds_bucket{stage="render",le="+Inf"} 2' in text
+        assert 'diagram_stage_duration_seconds_count{stage="render"} 2' in text
+        assert 'diagram_stage_bytes_total{stage="render"} 4096' in text
+    
+    def test_disabled_metrics_hand_out_null_timer(self):
+        """Test nothing is collected when metrics are off"""
+        metrics = RenderMetrics(enabled=False)
+        timer = metrics.start_request()
+        metrics.record(timer)
+        
+        assert timer is NULL_TIMER
+        assert metrics.summary() == {'enabled': False, 'requests': 0, 'stages': {}}
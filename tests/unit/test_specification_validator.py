@@ -0,0 +1,132 @@
+"""Tests for SpecificationValidator domain service"""
+import pytest
+from unittest.mock import Mock
+
+from src.domain.services.node_resolver import NodeResolver
+from src.domain.services.specification_validator import SpecificationValidator
+from src.domain.value_objects.diagram_specification import DiagramSpecification
+from src.domain.value_objects.validation_issue import (
+    SEVERITY_ERROR,
+    SEVERITY_WARNING,
+    DUPLICATE_COMPONENT_ID,
+    UNKNOWN_CONNECTION_ENDPOINT,
+    UNKNOWN_CLUSTER_MEMBER,
+    COMPONENT_IN_SEVERAL_CLUSTERS,
+    UNKNOWN_NODE_TYPE
+)
+from src.infrastructure.adapters.node_class_loader import NodeClassLoader
+from src.infrastructure.adapters.provider_repository import ProviderRepository
+
+
+def make_spec(components, connections=(), clusters=()):
+    """Build a specification from plain component, connection and cluster dicts"""
+    return DiagramSpecification.from_dict({
+        "title": "Validation Test",
+        "provider": "aws",
+        "components": list(components),
+        "connections": list(connections),
+        "clusters": list(clusters)
+    })
+
+
+WEB = {"id": "web", "type": "EC2", "category": "compute"}
+DB = {"id": "db", "type": "RDS", "category": "database"}
+
+
+class TestSpecificationValidator:
+    """Tests for SpecificationValidator service"""
+
+    @pytest.fixture
+    def resolver(self):
+        """Resolver that lists every node type except 'Unknown'"""
+        resolver = Mock()
+        resolver.is_listed.side_effect = lambda provider, category, node_type: node_type != "Unknown"
+        return resolver
+
+    def test_valid_spec_has_no_issues(self, resolver):
+        """Test a consistent spec passes"""
+        spec = make_spec(
+            [WEB, DB],
+            [{"from": "web", "to": "db"}],
+            [{"name": "App", "components": ["web", "db"]}]
+        )
+
+        assert SpecificationValidator(resolver).validate(spec) == []
+
+    def test_every_problem_is_reported_at_once(self, resolver):
+        """Test structural problems are all found, with their locations"""
+        spec = make_spec(
+            [WEB, DB, {"id": "web", "type": "S3", "category": "storage"}],
+            [{"from": "web", "to": "cache"}, {"from": "queue", "to": "db"}],
+            [
+                {"name": "Front", "components": ["web", "ghost"]},
+                {"name": "Back", "components": ["db", "web"]}
+            ]
+        )
+
+        issues = SpecificationValidator(resolver).validate(spec)
+
+        assert [(i.code, i.location) for i in issues] == [
+            (DUPLICATE_COMPONENT_ID, "components[2].id"),
+            (UNKNOWN_CONNECTION_ENDPOINT, "connections[0].to"),
+            (UNKNOWN_CONNECTION_ENDPOINT, "connections[1].from"),
+            (UNKNOWN_CLUSTER_MEMBER, "clusters[0].components[1]"),
+            (COMPONENT_IN_SEVERAL_CLUSTERS, "clusters[1].components[1]"),
+        ]
+        assert [i.severity for i in issues] == [SEVERITY_ERROR] * 4 + [SEVERITY_WARNING]
+        assert SpecificationValidator.has_errors(issues)
+
+    def test_component_in_several_clusters_is_a_warning(self, resolver):
+        """Test a component listed in two clusters does not reject the spec"""
+        spec = make_spec(
+            [WEB, DB],
+            clusters=[{"name": "Front", "components": ["web"]}, {"name": "Back", "components": ["db", "web"]}]
+        )
+
+        issues = SpecificationValidator(resolver).validate(spec)
+
+        assert [(i.code, i.severity) for i in issues] == [(COMPONENT_IN_SEVERAL_CLUSTERS, SEVERITY_WARNING)]
+        assert not SpecificationValidator.has_errors(issues)
+
+    def test_unknown_node_type_is_a_warning(self, resolver):
+        """Test unknown types are reported but do not reject the spec"""
+        spec = make_spec([WEB, {"id": "x", "type": "Unknown", "category": "compute"}])
+
+        issues = SpecificationValidator(resolver).validate(spec)
+
+        assert [(i.code, i.severity, i.location) for i in issues] == [
+            (UNKNOWN_NODE_TYPE, SEVERITY_WARNING, "components[1].type")
+        ]
+        assert not SpecificationValidator.has_errors(issues)
+
+    def test_unknown_node_type_is_an_error_when_strict(self, resolver):
+        """Test strict mode rejects unknown types"""
+        spec = make_spec([{"id": "x", "type": "Unknown", "category": "compute"}])
+
+        issues = SpecificationValidator(resolver, strict_node_types=True).validate(spec)
+
+        assert issues[0].to_dict()['severity'] == SEVERITY_ERROR
+        assert SpecificationValidator.has_errors(issues)
+
+    def test_node_types_not_checked_without_resolver(self):
+        """Test the type check is skipped when there is no resolver"""
+        spec = make_spec([{"id": "x", "type": "Unknown", "category": "compute"}])
+
+        assert SpecificationValidator().validate(spec) == []
+
+    def test_misspelled_type_is_not_matched_while_validating(self, capsys):
+        """Test the type check only looks names up: no similarity search, no output"""
+        resolver = NodeResolver(NodeClassLoader(), ProviderRepository())
+        resolver.node_matcher = Mock()
+        spec = make_spec([
+            WEB,
+            {"id": "lb", "type": "ELB", "category": "network"},
+            {"id": "x", "type": "Ec2Instancee", "category": "compute"}
+        ])
+
+        issues = SpecificationValidator(resolver).validate(spec)
+
+        assert [(i.code, i.location) for i in issues] == [(UNKNOWN_NODE_TYPE, "components[2].type")]
+        resolver.node_matcher.match.assert_not_called()
+        resolver.node_matcher.match_provider.assert_not_called()
+        assert capsys.readouterr().out == ""
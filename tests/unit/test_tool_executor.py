@@ -0,0 +1,98 @@
+"""Tests for the executor of async MCP tools"""
+import asyncio
+import json
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from src.application.mcp.tools.diagram_tool import DiagramTool
+from src.application.mcp.tools.tool_executor import HEADROOM_THREADS, ToolExecutor, ToolExecutorBusyError
+from src.domain.value_objects.diagram_result import IMAGE_FORMAT_PATH
+from tests.fixtures.diagram_specs import SIMPLE_AWS_SPEC
+
+
+class TestToolExecutor:
+    """Tests for ToolExecutor"""
+
+    @pytest.fixture
+    def executor(self):
+        """Create executor with two threads"""
+        executor = ToolExecutor(max_workers=2)
+        yield executor
+        executor.shutdown()
+
+    def test_returns_result_and_raises_errors(self, executor):
+        """Test results and exceptions come back to the caller"""
+        def fail():
+            raise ValueError("bad spec")
+
+        async def main():
+            assert await executor.run(lambda a, b=0: a + b, 1, b=2) == 3
+            with pytest.raises(ValueError, match="bad spec"):
+                await executor.run(fail)
+
+        asyncio.run(main())
+
+    def test_event_loop_stays_responsive(self, executor):
+        """Test other coroutines run while a blocking call is in progress"""
+        order = []
+
+        def render():
+            time.sleep(0.2)
+            order.append("render")
+
+        async def lookup():
+            await asyncio.sleep(0)
+            order.append("lookup")
+
+        async def main():
+            await asyncio.gather(executor.run(render), lookup())
+
+        asyncio.run(main())
+
+        assert order == ["lookup", "render"]
+
+    def test_calls_beyond_threads_are_refused(self, executor):
+        """Test a call finding every thread taken is refused instead of queued"""
+        release = threading.Event()
+
+        async def main():
+            running = [asyncio.ensure_future(executor.run(release.wait, 5)) for _ in range(2)]
+            await asyncio.sleep(0)
+            with pytest.raises(ToolExecutorBusyError):
+                await executor.run(lambda: None)
+            release.set()
+            await asyncio.gather(*running)
+            assert await executor.run(lambda: "free") == "free"
+
+        asyncio.run(main())
+
+        assert executor.stats() == {'active': 0, 'max_workers': 2, 'rejected': 1}
+
+    def test_default_threads_cover_render_queue(self, monkeypatch):
+        """Test the default pool has a thread for every render the scheduler admits"""
+        monkeypatch.delenv('DIAGRAM_TOOL_THREADS', raising=False)
+        monkeypatch.setenv('DIAGRAM_RENDER_CONCURRENCY', '2')
+        monkeypatch.setenv('DIAGRAM_RENDER_QUEUE_SIZE', '10')
+
+        assert ToolExecutor().max_workers == 2 + 10 + HEADROOM_THREADS
+
+    def test_diagram_tool_renders_in_executor(self, executor):
+        """Test the diagram tool runs the service off the event loop thread"""
+        service = Mock()
+        threads = []
+
+        def create(spec, image_format):
+            threads.append(threading.current_thread())
+            return {'success': False, 'error': 'no renderer', 'issues': None}
+
+        service.create_diagram_from_spec.side_effect = create
+        tool = DiagramTool(service, executor)
+
+        response = asyncio.run(tool.create_diagram_from_json(json.dumps(SIMPLE_AWS_SPEC)))
+
+        assert response == "❌ Error: no renderer"
+        assert threads[0] is not threading.main_thread()
+        assert service.create_diagram_from_spec.call_args.kwargs == {'image_format': IMAGE_FORMAT_PATH}
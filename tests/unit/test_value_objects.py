@@ -1,5 +1,7 @@
 """Tests for domain value objects"""
 import pytest
+from dataclasses import replace
+from unittest.mock import Mock
 
 from src.domain.value_objects.diagram_specification import (
     DiagramSpecification,
@@ -8,6 +10,8 @@ from src.domain.value_objects.diagram_specification import (
     ComponentCluster
 )
 from src.domain.value_objects.diagram_result import DiagramResult
+from src.domain.value_objects.lazy_image import EncodedImage, LazyImage
+from src.domain.value_objects.specification_delta import SpecificationDelta
 from tests.fixtures.diagram_specs import SIMPLE_AWS_SPEC, CLUSTERED_SPEC
 
 
@@ -90,6 +94,15 @@ class TestDiagramSpecification:
         assert spec.clusters[0].name == "Web Tier"
         assert len(spec.clusters[0].component_ids) == 2
     
+    def test_from_dict_output_formats(self):
+        """Test output formats always start with PNG and reject unknown formats"""
+        spec = DiagramSpecification.from_dict({**SIMPLE_AWS_SPEC, 'output_formats': ['SVG', 'png', 'dot']})
+        
+        assert spec.output_formats == ["png", "svg", "dot"]
+        assert DiagramSpecification.from_dict(SIMPLE_AWS_SPEC).output_formats == ["png"]
+        with pytest.raises(ValueError):
+            DiagramSpecification.from_dict({**SIMPLE_AWS_SPEC, 'output_formats': ['gif']})
+    
     def test_get_direction(self):
         """Test direction calculation"""
         spec_v = DiagramSpecification(title="Test", layout="vertical")
@@ -107,6 +120,12 @@ class TestDiagramSpecification:
         assert len(unclustered) == 1
         assert unclustered[0].id == "lb"
     
+    def test_to_dict_round_trip(self):
+        """Test that to_dict output parses back to an equal specification"""
+        spec = DiagramSpecification.from_dict(CLUSTERED_SPEC)
+        
+        assert DiagramSpecification.from_dict(spec.to_dict()) == spec
+    
     def test_get_component_by_id(self):
         """Test finding component by ID"""
         spec = DiagramSpecification.from_dict(SIMPLE_AWS_SPEC)
@@ -117,6 +136,101 @@ class TestDiagramSpecification:
         
         missing = spec.get_component_by_id("nonexistent")
         assert missing is None
+    
+    def test_lookups_are_indexed(self):
+        """Test id and cluster indexes, including specs built by replace"""
+        spec = DiagramSpecification.from_dict({
+            "title": "Test",
+            "components": [
+                {"id": "a", "type": "EC2"},
+                {"id": "b", "type": "RDS"},
+                {"id": "a", "type": "Lambda"}
+            ],
+            "clusters": [{"name": "one", "components": ["a"]}, {"name": "two", "components": ["a", "b"]}]
+        })
+        
+        assert spec.get_component_by_id("a").type == "EC2"
+        assert spec.get_component_cluster("a").name == "one"
+        assert spec.get_component_cluster("b").name == "two"
+        assert spec.get_unclustered_components() == []
+        
+        trimmed = replace(spec, components=spec.components[1:2], clusters=[])
+        assert trimmed.get_component_by_id("a") is None
+        assert trimmed.get_component_cluster("b") is None
+        assert [c.id for c in trimmed.get_unclustered_components()] == ["b"]
+    
+    def test_value_objects_use_slots(self):
+        """Test components and specifications carry no per-instance dict"""
+        spec = DiagramSpecification.from_dict(CLUSTERED_SPEC)
+        
+        assert not hasattr(spec, '__dict__')
+        assert not hasattr(spec.components[0], '__dict__')
+        assert not hasattr(spec.connections[0], '__dict__')
+        assert not hasattr(spec.clusters[0], '__dict__')
+
+
+class TestSpecificationDelta:
+    """Tests for SpecificationDelta value object"""
+    
+    def test_remove_component_drops_connections_and_membership(self):
+        """Test removing a component removes everything that refers to it"""
+        spec = DiagramSpecification.from_dict(CLUSTERED_SPEC)
+        updated = SpecificationDelta.from_dict({'remove_components': ['web1']}).apply_to(spec)
+        
+        assert spec.get_component_by_id("web1") is not None
+        assert updated.get_component_by_id("web1") is None
+        assert all("web1" not in (c.from_id, c.to_id) for c in updated.connections)
+        assert updated.clusters[0].component_ids == ["web2"]
+    
+    def test_add_component_to_cluster(self):
+        """Test an added component can join a new or existing cluster"""
+        spec = DiagramSpecification.from_dict(CLUSTERED_SPEC)
+        updated = SpecificationDelta.from_dict({
+            'add_components': [
+                {'id': 'cache', 'type': 'ElastiCache', 'category': 'database', 'cluster': 'Database Tier'},
+                {'id': 'queue', 'type': 'SQS', 'category': 'integration', 'cluster': 'Messaging'}
+            ],
+            'add_connections': [{'from': 'web1', 'to': 'cache'}]
+        }).apply_to(spec)
+        
+        assert len(updated.components) == 7
+        assert updated.connections[-1].to_id == "cache"
+        assert updated.clusters[1].component_ids == ["db1", "db2", "cache"]
+        assert updated.clusters[2].name == "Messaging"
+        assert updated.clusters[2].component_ids == ["queue"]
+    
+    def test_add_existing_component_replaces_it(self):
+        """Test re-adding a component id updates it in place"""
+        spec = DiagramSpecification.from_dict(SIMPLE_AWS_SPEC)
+        updated = SpecificationDelta.from_dict({
+            'add_components': [{'id': 'db1', 'type': 'Aurora', 'category': 'database'}]
+        }).apply_to(spec)
+        
+        assert [c.id for c in updated.components] == ["web1", "db1"]
+        assert updated.components[1].type == "Aurora"
+    
+    def test_remove_connection_and_cluster(self):
+        """Test removing a connection by endpoints and a cluster by name"""
+        spec = DiagramSpecification.from_dict(CLUSTERED_SPEC)
+        updated = SpecificationDelta.from_dict({
+            'remove_connections': [{'from': 'lb', 'to': 'web1'}],
+            'remove_clusters': ['Web Tier']
+        }).apply_to(spec)
+        
+        assert len(updated.connections) == len(spec.connections) - 1
+        assert [cl.name for cl in updated.clusters] == ["Database Tier"]
+        assert len(updated.components) == 5
+    
+    def test_cluster_membership_moves(self):
+        """Test adding a cluster takes its components out of other clusters"""
+        spec = DiagramSpecification.from_dict(CLUSTERED_SPEC)
+        updated = SpecificationDelta.from_dict({
+            'add_clusters': [{'name': 'Primary', 'components': ['web1', 'db1']}]
+        }).apply_to(spec)
+        
+        assert updated.clusters[0].component_ids == ["web2"]
+        assert updated.clusters[1].component_ids == ["db2"]
+        assert updated.clusters[2].component_ids == ["web1", "db1"]
 
 
 class TestDiagramResult:
@@ -163,4 +277,35 @@ class TestDiagramResult:
         assert isinstance(result_dict, dict)
         assert result_dict['success'] is True
         assert result_dict['title'] == "Test"
-
+    
+    def test_lazy_image_is_optimized_on_demand(self, tmp_path):
+        """Test image data is only produced for formats that include it"""
+        path = tmp_path / "diagram.png"
+        path.write_bytes(b"x" * 2048)
+        optimize = Mock(return_value=EncodedImage(b"small", 2048, 1.5, "png-rgb-max"))
+        result = DiagramResult.success_result(
+            title="Test",
+            file_path=str(path),
+            image=LazyImage(str(path), optimize),
+            components_count=2,
+            connections_count=1,
+            provider="aws"
+        )
+        
+        path_only = result.to_dict("path")
+        assert path_only['image_base64'] is None
+        assert 'image_bytes' not in path_only
+        assert path_only['image_stats'] is None
+        optimize.assert_not_called()
+        
+        assert result.to_dict("bytes")['image_bytes'] == b"small"
+        with_data = result.to_dict("base64")
+        assert with_data['image_base64'] == "c21hbGw="
+        assert with_data['image_stats']['encoded_bytes'] == 5
+        assert with_data['image_stats']['savings_percent'] == 99.8
+        optimize.assert_called_once_with(str(path))
+    
+    def test_to_dict_rejects_unknown_image_format(self):
+        """Test an unknown image format is an error"""
+        with pytest.raises(ValueError):
+            DiagramResult.failure_result("error").to_dict("jpeg")